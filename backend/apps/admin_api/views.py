@@ -6,10 +6,13 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Count, Sum, Q, Avg
 from django.utils import timezone
+from django.db import transaction as db_transaction
 from datetime import timedelta
 from apps.users.models import User
+from apps.users.tokens import blacklist_user_tokens
 from apps.policies.models import Policy, PolicyType, InsuranceCompany
 from apps.claims.models import Claim
+from apps.claims.actions import auto_assign_response, bulk_transition_response
 from apps.payments.models import Transaction
 from apps.policies.serializers import PolicyTypeSerializer, InsuranceCompanySerializer
 from apps.payments.models import PaymentSchedule
@@ -232,6 +235,8 @@ class UserManagementViewSet(viewsets.ViewSet):
             user = User.objects.get(pk=pk)
             user.is_active = False
             user.save()
+            # save() retires the cached auth snapshot; also revoke refresh tokens
+            blacklist_user_tokens([user.pk])
             return Response({'message': 'User suspended successfully'})
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=404)
@@ -278,25 +283,34 @@ class ClaimsManagementViewSet(viewsets.ViewSet):
         except Claim.DoesNotExist:
             return Response({'error': 'Claim not found'}, status=404)
 
+    @action(detail=False, methods=['post'], url_path='auto-assign')
+    def auto_assign(self, request):
+        return auto_assign_response(request)
+
+    @action(detail=False, methods=['post'], url_path=r'bulk-(?P<operation>assign|approve|reject|settle)')
+    def bulk(self, request, operation=None):
+        return bulk_transition_response(request, operation)
+
     @action(detail=True, methods=['patch'])
     def assign(self, request, pk=None):
-        try:
+        assessor_id = request.data.get('assessor_id')
+        # Row lock so auto-assignment (SKIP LOCKED) leaves this claim alone
+        with db_transaction.atomic():
+            if not Claim.objects.select_for_update().filter(pk=pk).exists():
+                return Response({'error': 'Claim not found'}, status=404)
             claim = Claim.objects.select_related(
                 'user', 'policy', 'policy__policy_type', 'assessor'
             ).annotate(documents_count=Count('documents')).get(pk=pk)
-        except Claim.DoesNotExist:
-            return Response({'error': 'Claim not found'}, status=404)
 
-        assessor_id = request.data.get('assessor_id')
-        try:
-            assessor = User.objects.get(pk=assessor_id)
-            claim.assessor = assessor
-            claim.status = 'under_review'
-            claim.assigned_at = timezone.now()
-            claim.save()
-            return Response(serialize_claim(claim))
-        except User.DoesNotExist:
-            return Response({'error': 'Assessor not found'}, status=400)
+            try:
+                assessor = User.objects.get(pk=assessor_id)
+                claim.assessor = assessor
+                claim.status = 'under_review'
+                claim.assigned_at = timezone.now()
+                claim.save()
+                return Response(serialize_claim(claim))
+            except User.DoesNotExist:
+                return Response({'error': 'Assessor not found'}, status=400)
 
     @action(detail=True, methods=['patch'])
     def approve(self, request, pk=None):
@@ -698,11 +712,12 @@ def get_revenue_report(request):
 @permission_classes([IsAdmin])
 def get_claims_report(request):
     claims = Claim.objects.all()
+    status_counts = dict(claims.values_list('status').annotate(count=Count('id')).order_by())
     by_status = [
-        {'status': s, 'count': claims.filter(status=s).count()}
+        {'status': s, 'count': status_counts.get(s, 0)}
         for s in ['submitted', 'under_review', 'approved', 'rejected', 'settled']
     ]
-    total_claims = claims.count()
+    total_claims = sum(status_counts.values())
     total_policies = Policy.objects.count()
     avg_settlement = claims.filter(amount_approved__isnull=False).aggregate(
         avg=Avg('amount_approved')
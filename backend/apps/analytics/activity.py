@@ -0,0 +1,245 @@
+"""
+Activity Recorder
+Buffered UserActivity ingestion. record_activity() appends an event to an
+in-process buffer and returns immediately; the buffer is written with one
+bulk INSERT (or COPY on PostgreSQL for large batches) every
+ACTIVITY_FLUSH_SIZE events or ACTIVITY_FLUSH_INTERVAL_MS milliseconds.
+
+Under back-pressure (buffer full, or the database write fails) pending
+events are handed to a Celery task instead of being dropped or written on
+the request thread.
+"""
+
+import atexit
+import csv
+import io
+import ipaddress
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT_MAX_LENGTH = 512
+COPY_MIN_BATCH = 200
+
+COLUMNS = [
+    'id', 'user_id', 'action', 'resource_type', 'resource_id',
+    'ip_address', 'user_agent', 'metadata', 'timestamp'
+]
+# NOT NULL text columns: COPY must read an empty field in these as '', not NULL
+TEXT_COLUMNS = ['action', 'resource_type', 'resource_id', 'user_agent']
+
+
+def _event(action, user=None, user_id=None, resource_type='', resource_id='',
+           ip_address=None, user_agent='', metadata=None, timestamp=None):
+    if user is not None and getattr(user, 'is_authenticated', False):
+        user_id = user.pk
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': str(user_id) if user_id else None,
+        'action': action,
+        'resource_type': resource_type or '',
+        'resource_id': str(resource_id or ''),
+        'ip_address': ip_address or None,
+        'user_agent': (user_agent or '')[:USER_AGENT_MAX_LENGTH],
+        'metadata': metadata or {},
+        'timestamp': (timestamp or timezone.now()).isoformat(),
+    }
+
+
+def write_events(events):
+    """Insert serialised events in one statement"""
+    if not events:
+        return 0
+    if connection.vendor == 'postgresql' and len(events) >= COPY_MIN_BATCH:
+        _copy_events(events)
+    else:
+        from .models import UserActivity
+        UserActivity.objects.bulk_create([UserActivity(**event) for event in events])
+    return len(events)
+
+
+def _copy_events(events):
+    """
+    COPY FROM STDIN: cheaper than INSERT for large batches.
+    In CSV format an unquoted empty field is NULL, which is what None is
+    written as; FORCE_NOT_NULL keeps blank text values as ''.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for event in events:
+        writer.writerow([
+            '' if event[column] is None else (
+                json.dumps(event[column]) if column == 'metadata' else event[column]
+            )
+            for column in COLUMNS
+        ])
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY user_activities ({', '.join(COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(TEXT_COLUMNS)}))",
+            buffer
+        )
+
+
+class ActivityRecorder:
+    """
+    Process-local event buffer with size- and time-triggered flushes.
+    One instance per process (see get_recorder()).
+    """
+
+    def __init__(self, flush_size=None, flush_interval_ms=None, capacity=None):
+        self.flush_size = flush_size or getattr(settings, 'ACTIVITY_FLUSH_SIZE', 100)
+        self.flush_interval = (flush_interval_ms or getattr(settings, 'ACTIVITY_FLUSH_INTERVAL_MS', 2000)) / 1000
+        self.capacity = capacity or getattr(settings, 'ACTIVITY_BUFFER_CAPACITY', 10000)
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._pid = None
+
+    def record(self, action, **fields):
+        event = _event(action, **fields)
+        with self._lock:
+            self._buffer.append(event)
+            size = len(self._buffer)
+        self._ensure_flusher()
+
+        if size >= self.capacity:
+            # Writer cannot keep up: hand the backlog to a worker
+            self.spill()
+        elif size >= self.flush_size:
+            self._wakeup.set()
+
+    def _drain(self):
+        with self._lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+        return events
+
+    def flush(self):
+        """Write everything buffered; spill to Celery if the write fails"""
+        with self._flush_lock:
+            events = self._drain()
+            self._last_flush = time.monotonic()
+            if not events:
+                return 0
+            try:
+                return write_events(events)
+            except Exception as e:
+                logger.warning(f"Activity flush of {len(events)} events failed, spilling to queue: {str(e)}")
+                _spill(events)
+                return 0
+            finally:
+                if threading.current_thread() is self._thread:
+                    # The flusher thread holds its own connection between flushes
+                    connection.close()
+
+    def spill(self):
+        events = self._drain()
+        if events:
+            _spill(events)
+        return len(events)
+
+    def pending(self):
+        return len(self._buffer)
+
+    def _ensure_flusher(self):
+        import os
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._buffer:
+                self.flush()
+
+
+def _spill(events):
+    from .tasks import ingest_activities
+
+    try:
+        ingest_activities.delay(events)
+    except Exception as e:
+        logger.error(f"Dropped {len(events)} activity events: {str(e)}")
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = ActivityRecorder()
+                atexit.register(_recorder.flush)
+    return _recorder
+
+
+def _valid_ip(value):
+    try:
+        return str(ipaddress.ip_address((value or '').strip()))
+    except ValueError:
+        return None
+
+
+def client_ip(request):
+    """
+    Caller's address, always a valid IP or None (one bad value would fail
+    the whole batched COPY). X-Forwarded-For is only read behind
+    TRUSTED_PROXY_COUNT reverse proxies, and then only the entry the
+    outermost of them appended; anything left of it is client-supplied.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = forwarded.split(',')
+        ip = _valid_ip(hops[-min(proxies, len(hops))])
+        if ip:
+            return ip
+    return _valid_ip(request.META.get('REMOTE_ADDR'))
+
+
+def record_activity(action, user=None, request=None, resource_type='', resource_id='', metadata=None):
+    """
+    Record a UserActivity without a database round-trip on the caller's thread.
+
+    Args:
+        action: One of UserActivity.ACTION_CHOICES
+        request: Optional; supplies the user, IP address and user agent
+    """
+    if not getattr(settings, 'ACTIVITY_RECORDING_ENABLED', True):
+        return
+    if request is not None and user is None:
+        user = getattr(request, 'user', None)
+    get_recorder().record(
+        action,
+        user=user,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        ip_address=client_ip(request) if request is not None else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request is not None else '',
+        metadata=metadata,
+    )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserActivity
+from .models import UserActivity, ClaimDuration, ClaimDurationDaily
 
 
 @admin.register(UserActivity)
@@ -37,3 +37,34 @@ class UserActivityAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Make activity logs read-only"""
         return False
+
+
+@admin.register(ClaimDuration)
+class ClaimDurationAdmin(admin.ModelAdmin):
+    """Admin interface for ClaimDuration model"""
+
+    list_display = (
+        'claim', 'claim_type', 'filed_to_assigned',
+        'assigned_to_assessed', 'assessed_to_settled', 'updated_at'
+    )
+    list_filter = ('claim_type',)
+    search_fields = ('claim__claim_number',)
+    readonly_fields = ('updated_at',)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('claim')
+
+
+@admin.register(ClaimDurationDaily)
+class ClaimDurationDailyAdmin(admin.ModelAdmin):
+    """Admin interface for ClaimDurationDaily model"""
+
+    list_display = ('date', 'claim_type', 'stage', 'count', 'total_seconds')
+    list_filter = ('stage', 'claim_type')
+    date_hierarchy = 'date'
+    readonly_fields = ('updated_at',)
+
+    def has_add_permission(self, request):
+        """Rollups are written by the metrics task only"""
+        return False
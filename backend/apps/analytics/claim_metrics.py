@@ -0,0 +1,183 @@
+"""
+Claim SLA Metrics
+Materialises per-claim stage durations and rolls them into daily
+percentile sketches per claim type.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from apps.claims.models import Claim
+from .models import ClaimDuration, ClaimDurationDaily
+from .sketch import DurationSketch
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# stage -> (start timestamp field, end timestamp field) on Claim
+STAGES = {
+    'filed_to_assigned': ('filed_date', 'assigned_at'),
+    'assigned_to_assessed': ('assigned_at', 'assessment_date'),
+    'assessed_to_settled': ('assessment_date', 'settlement_date'),
+    'filed_to_assessed': ('filed_date', 'assessment_date'),
+}
+
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def record_claim_durations(claim_ids):
+    """
+    Record newly completed stages for the given claims.
+
+    Stages already recorded are left alone, so calling this repeatedly for
+    the same claim only adds each stage to the daily sketches once. Duration
+    rows are locked while stages are filled in, so concurrent calls for the
+    same claim serialise instead of both merging a stage.
+
+    Returns:
+        int: Number of stage durations recorded
+    """
+    claims = list(Claim.objects.filter(pk__in=claim_ids).values(
+        'id', 'type', 'filed_date', 'assigned_at', 'assessment_date', 'settlement_date'
+    ))
+    if not claims:
+        return 0
+
+    daily = defaultdict(DurationSketch)
+
+    with db_transaction.atomic():
+        # Every claim gets a row up front so there is always something to lock
+        ClaimDuration.objects.bulk_create(
+            [ClaimDuration(claim_id=claim['id'], claim_type=claim['type']) for claim in claims],
+            ignore_conflicts=True
+        )
+        durations = {
+            row.claim_id: row
+            for row in ClaimDuration.objects.select_for_update()
+            .filter(claim_id__in=[claim['id'] for claim in claims])
+            .order_by('claim_id')
+        }
+
+        to_update = []
+        for claim in claims:
+            duration = durations.get(claim['id'])
+            if duration is None:
+                continue
+
+            changed = False
+            for stage, (start_field, end_field) in STAGES.items():
+                start, end = claim[start_field], claim[end_field]
+                if getattr(duration, stage) is not None or not start or not end or end < start:
+                    continue
+                seconds = (end - start).total_seconds()
+                setattr(duration, stage, seconds)
+                daily[(timezone.localdate(end), claim['type'], stage)].add(seconds)
+                changed = True
+
+            if changed:
+                to_update.append(duration)
+
+        if to_update:
+            now = timezone.now()
+            for duration in to_update:
+                duration.updated_at = now
+            ClaimDuration.objects.bulk_update(to_update, list(STAGES) + ['updated_at'])
+        _merge_daily(daily)
+
+    return sum(sketch.count for sketch in daily.values())
+
+
+def _merge_daily(daily):
+    """Merge sketches into their (date, claim_type, stage) rows, creating rows as needed"""
+    if not daily:
+        return
+
+    ClaimDurationDaily.objects.bulk_create(
+        [ClaimDurationDaily(date=day, claim_type=claim_type, stage=stage) for day, claim_type, stage in daily],
+        ignore_conflicts=True
+    )
+    # Lock in one fixed order, so concurrent merges cannot deadlock
+    rows = ClaimDurationDaily.objects.select_for_update().filter(
+        date__in={key[0] for key in daily},
+        stage__in={key[2] for key in daily},
+        claim_type__in={key[1] for key in daily},
+    ).order_by('date', 'claim_type', 'stage')
+    now = timezone.now()
+    updated = []
+    for row in rows:
+        sketch = daily.get((row.date, row.claim_type, row.stage))
+        if sketch is None:
+            continue
+        merged = DurationSketch(row.buckets, row.count, row.total_seconds).merge(sketch)
+        row.buckets = merged.to_json()
+        row.count = merged.count
+        row.total_seconds = merged.total
+        row.updated_at = now
+        updated.append(row)
+    ClaimDurationDaily.objects.bulk_update(updated, ['buckets', 'count', 'total_seconds', 'updated_at'])
+
+
+def claim_sla_percentiles(from_date, to_date, claim_type=None):
+    """
+    Stage duration percentiles (in hours) for claims whose stage finished
+    between from_date and to_date inclusive.
+
+    Returns:
+        dict: {stage: {'count', 'mean', 'p50', 'p90', 'p99', 'by_type': {...}}}
+    """
+    rows = ClaimDurationDaily.objects.filter(date__gte=from_date, date__lte=to_date)
+    if claim_type:
+        rows = rows.filter(claim_type=claim_type)
+
+    overall = defaultdict(DurationSketch)
+    by_type = defaultdict(lambda: defaultdict(DurationSketch))
+    for row in rows.values_list('stage', 'claim_type', 'buckets', 'count', 'total_seconds'):
+        stage, row_type, buckets, count, total = row
+        sketch = DurationSketch(buckets, count, total)
+        overall[stage].merge(sketch)
+        by_type[stage][row_type].merge(sketch)
+
+    return {
+        stage: dict(
+            _summary(overall[stage]),
+            by_type={row_type: _summary(sketch) for row_type, sketch in by_type[stage].items()}
+        )
+        for stage in STAGES
+    }
+
+
+def _summary(sketch):
+    summary = {'count': sketch.count, 'mean': _hours(sketch.mean)}
+    for label, q in QUANTILES.items():
+        summary[label] = _hours(sketch.quantile(q))
+    return summary
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+
+def rebuild_claim_durations(chunk_size=1000):
+    """
+    Recompute all durations and sketches from claim timestamps.
+    Used to backfill existing claims or repair the rollups.
+    """
+    with db_transaction.atomic():
+        ClaimDurationDaily.objects.all().delete()
+        ClaimDuration.objects.all().delete()
+
+    claim_ids = Claim.objects.order_by('pk').values_list('pk', flat=True)
+    batch, total = [], 0
+    for claim_id in claim_ids.iterator(chunk_size=chunk_size):
+        batch.append(claim_id)
+        if len(batch) >= chunk_size:
+            total += record_claim_durations(batch)
+            batch = []
+    if batch:
+        total += record_claim_durations(batch)
+
+    logger.info(f"Rebuilt claim duration metrics: {total} stage durations")
+    return total
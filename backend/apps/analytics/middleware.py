@@ -0,0 +1,59 @@
+"""
+Activity Middleware
+Records UserActivity for successful requests to the routes below, through
+the buffered recorder. Actions that need context the URL does not carry
+(login, logout) are recorded explicitly with record_activity().
+"""
+
+import re
+
+from .activity import record_activity
+
+UUID = r'[0-9a-f-]{36}'
+
+# (method, path pattern, action, resource type, accepted status codes)
+ACTIVITY_ROUTES = [
+    ('GET', rf'^/api/v1/policies/my-policies/(?P<id>{UUID})/$', 'view_policy', 'policy', {200}),
+    ('GET', rf'^/api/v1/policies/types/(?P<id>{UUID})/$', 'view_policy', 'policy_type', {200}),
+    ('POST', r'^/api/v1/policies/my-policies/$', 'purchase_policy', 'policy', {201}),
+    ('POST', r'^/api/v1/claims/$', 'file_claim', 'claim', {201}),
+    ('POST', r'^/api/v1/payments/(mpesa/)?initiate/$', 'make_payment', 'transaction', {200, 201}),
+    ('GET', rf'^/api/v1/documents/(?P<id>{UUID})/download/$', 'download_document', 'document', {200}),
+    ('GET', rf'^/api/v1/payments/transactions/(?P<id>{UUID})/receipt/pdf/$', 'download_document', 'receipt', {200, 302, 304}),
+]
+
+_COMPILED = [
+    (method, re.compile(pattern), action, resource_type, statuses)
+    for method, pattern, action, resource_type, statuses in ACTIVITY_ROUTES
+]
+
+
+class ActivityMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if request.path.startswith('/api/v1/'):
+            for method, pattern, action, resource_type, statuses in _COMPILED:
+                if request.method != method or response.status_code not in statuses:
+                    continue
+                match = pattern.match(request.path)
+                if match:
+                    # DRF sets the authenticated user back on the Django request
+                    record_activity(
+                        action,
+                        request=request,
+                        resource_type=resource_type,
+                        resource_id=match.groupdict().get('id') or _created_id(response),
+                    )
+                    break
+
+        return response
+
+
+def _created_id(response):
+    data = getattr(response, 'data', None)
+    return data.get('id', '') if isinstance(data, dict) else ''
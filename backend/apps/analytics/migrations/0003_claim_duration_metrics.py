@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:38
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+        ('claims', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimDuration',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('claim_type', models.CharField(db_index=True, max_length=50)),
+                ('filed_to_assigned', models.FloatField(blank=True, null=True)),
+                ('assigned_to_assessed', models.FloatField(blank=True, null=True)),
+                ('assessed_to_settled', models.FloatField(blank=True, null=True)),
+                ('filed_to_assessed', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('claim', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='duration', to='claims.claim')),
+            ],
+            options={
+                'db_table': 'claim_durations',
+            },
+        ),
+        migrations.CreateModel(
+            name='ClaimDurationDaily',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('claim_type', models.CharField(max_length=50)),
+                ('stage', models.CharField(choices=[('filed_to_assigned', 'Filed → Assigned'), ('assigned_to_assessed', 'Assigned → Assessed'), ('assessed_to_settled', 'Assessed → Settled'), ('filed_to_assessed', 'Filed → Assessed')], max_length=30)),
+                ('count', models.IntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('buckets', models.JSONField(default=dict, help_text='DurationSketch bucket counts')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Claim Duration Dailies',
+                'db_table': 'claim_duration_daily',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['stage', 'date'], name='claim_durat_stage_550c65_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='claimdurationdaily',
+            constraint=models.UniqueConstraint(fields=('date', 'claim_type', 'stage'), name='unique_claim_duration_day'),
+        ),
+    ]
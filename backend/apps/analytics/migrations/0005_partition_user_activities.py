@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def partition_user_activities(apps, schema_editor):
+    from bowman_insurance.partitioning import convert_to_partitioned
+    convert_to_partitioned('user_activities', schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # Not atomic: user_activities stays readable and writable while its rows are copied
+    # in batches into the partitioned table; only the final rename swap takes an
+    # exclusive lock. If interrupted, the original table is untouched and
+    # re-running the migration starts the copy over.
+    atomic = False
+
+    dependencies = [
+        ('analytics', '0004_activity_event_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_user_activities, migrations.RunPython.noop),
+    ]
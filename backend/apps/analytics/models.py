@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class UserActivity(models.Model):
@@ -24,7 +25,8 @@ class UserActivity(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     metadata = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the event happens, not when the buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         db_table = 'user_activities'
@@ -40,4 +42,65 @@ class UserActivity(models.Model):
         return f"{user_str} - {self.action} at {self.timestamp}"
 
 
-# For now, analytics will be simple. More complex models can be added later
+class ClaimDuration(models.Model):
+    """
+    Materialised stage durations for a claim, in seconds.
+    Written when the claim's status history changes; a stage is recorded
+    once, when both of its timestamps are known.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    claim = models.OneToOneField('claims.Claim', on_delete=models.CASCADE, related_name='duration')
+    claim_type = models.CharField(max_length=50, db_index=True)
+
+    filed_to_assigned = models.FloatField(null=True, blank=True)
+    assigned_to_assessed = models.FloatField(null=True, blank=True)
+    assessed_to_settled = models.FloatField(null=True, blank=True)
+    filed_to_assessed = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'claim_durations'
+
+    def __str__(self):
+        return f"Durations for {self.claim_id}"
+
+
+class ClaimDurationDaily(models.Model):
+    """
+    Daily percentile sketch of one claim stage for one claim type.
+    The day is the date the stage finished.
+    """
+
+    STAGE_CHOICES = [
+        ('filed_to_assigned', 'Filed → Assigned'),
+        ('assigned_to_assessed', 'Assigned → Assessed'),
+        ('assessed_to_settled', 'Assessed → Settled'),
+        ('filed_to_assessed', 'Filed → Assessed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    claim_type = models.CharField(max_length=50)
+    stage = models.CharField(max_length=30, choices=STAGE_CHOICES)
+
+    count = models.IntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    buckets = models.JSONField(default=dict, help_text='DurationSketch bucket counts')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'claim_duration_daily'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'claim_type', 'stage'], name='unique_claim_duration_day'),
+        ]
+        indexes = [
+            models.Index(fields=['stage', 'date']),
+        ]
+        verbose_name_plural = 'Claim Duration Dailies'
+
+    def __str__(self):
+        return f"{self.date} {self.claim_type} {self.stage} (n={self.count})"
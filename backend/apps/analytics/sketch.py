@@ -0,0 +1,68 @@
+"""
+Duration Sketch
+Mergeable log-bucket histogram for percentile estimates over durations.
+
+Values are placed in geometric buckets so any quantile is returned within
+RELATIVE_ACCURACY of the true value, while a sketch stays a few dozen
+buckets in size no matter how many values it holds. Sketches for
+different days merge by adding bucket counts, which is what lets SLA
+reports cover any date range without touching the claims table.
+"""
+
+import math
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# Durations are recorded in seconds; anything shorter lands in the first bucket
+MIN_VALUE = 1.0
+
+
+class DurationSketch:
+
+    def __init__(self, buckets=None, count=0, total=0.0):
+        self.buckets = {int(key): value for key, value in (buckets or {}).items()}
+        self.count = count
+        self.total = total
+
+    @staticmethod
+    def bucket_for(value):
+        return math.ceil(math.log(max(value, MIN_VALUE)) / LOG_GAMMA)
+
+    @staticmethod
+    def bucket_value(index):
+        """Representative value of a bucket (within RELATIVE_ACCURACY of anything in it)"""
+        return 2 * GAMMA ** index / (GAMMA + 1)
+
+    def add(self, value):
+        index = self.bucket_for(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        for index, value in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + value
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return self.bucket_value(index)
+        return self.bucket_value(max(self.buckets))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_json(self):
+        """Bucket counts with string keys, for a JSONField"""
+        return {str(index): value for index, value in self.buckets.items()}
@@ -0,0 +1,30 @@
+"""Analytics Celery tasks"""
+from celery import shared_task
+
+
+@shared_task
+def record_claim_durations(claim_ids):
+    """Materialise stage durations for claims whose status history changed"""
+    from .claim_metrics import record_claim_durations as record
+    return record(claim_ids)
+
+
+@shared_task
+def rebuild_claim_durations():
+    """Recompute all claim durations and daily SLA sketches"""
+    from .claim_metrics import rebuild_claim_durations as rebuild
+    return rebuild()
+
+
+@shared_task
+def ingest_activities(events):
+    """Write activity events spilled from a web process's buffer"""
+    from .activity import write_events
+    return write_events(events)
+
+
+@shared_task
+def maintain_activity_partitions():
+    """Create upcoming monthly partitions and drop user activity past retention"""
+    from bowman_insurance.partitioning import maintain_table
+    return maintain_table('user_activities')
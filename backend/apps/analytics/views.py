@@ -4,11 +4,12 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django.db.models import Count, Sum, Avg, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from apps.policies.models import Policy
 from apps.claims.models import Claim
 from apps.payments.models import Transaction
 from apps.users.models import User
+from .claim_metrics import claim_sla_percentiles
 
 
 @api_view(['GET'])
@@ -113,28 +114,44 @@ def revenue_analytics(request):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def claims_analytics(request):
-    """Get claims analytics data"""
+    """
+    Get claims analytics data
+    Processing-time percentiles come from the daily SLA sketches and accept
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (default last 90 days) and ?type=
+    """
     # Claims by status
     claims_by_status = Claim.objects.values('status').annotate(
         count=Count('id')
-    )
+    ).order_by()
 
     # Claims by type
     claims_by_type = Claim.objects.values('type').annotate(
         count=Count('id')
-    )
+    ).order_by()
 
-    # Average claim processing time (in days)
-    avg_processing_time = Claim.objects.filter(
-        assessment_date__isnull=False
-    ).extra(
-        select={'processing_days': '(assessment_date - filed_date)'}
-    ).count()  # Simplified
+    today = timezone.localdate()
+    try:
+        to_date = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else today
+        from_date = (
+            date.fromisoformat(request.query_params['from'])
+            if request.query_params.get('from') else to_date - timedelta(days=90)
+        )
+    except ValueError:
+        return Response({'error': 'Dates must be YYYY-MM-DD'}, status=400)
+
+    sla = claim_sla_percentiles(from_date, to_date, claim_type=request.query_params.get('type'))
 
     return Response({
         'by_status': list(claims_by_status),
         'by_type': list(claims_by_type),
-        'total_claims': Claim.objects.count()
+        'total_claims': sum(row['count'] for row in claims_by_status),
+        'avg_processing_time': sla['filed_to_assessed']['mean'],
+        'processing_time': {
+            'from': from_date.isoformat(),
+            'to': to_date.isoformat(),
+            'unit': 'hours',
+            'stages': sla,
+        }
     })
 
 
@@ -0,0 +1,93 @@
+"""
+Claim Bulk Actions
+Request handling for auto-assignment and bulk transitions, shared by the
+claims API and the admin API: validates the payload and turns the result
+(or the validation error) into a Response.
+"""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import status
+from rest_framework.response import Response
+
+from .assignment import auto_assign_claims
+from .serializers import ClaimSettlementSerializer
+from .transitions import SETTLEMENT_FIELDS, TransitionError, bulk_transition
+
+
+BULK_TRANSITION_LIMIT = 500
+
+
+def auto_assign_response(request):
+    """Run auto-assignment with the request's optional limit"""
+    limit = request.data.get('limit')
+    if limit is not None and limit != '':
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit < 1:
+            return Response(
+                {'error': 'limit must be a whole number of at least 1'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        limit = None
+
+    result = auto_assign_claims(limit=limit, assigned_by=request.user)
+    return Response(result, status=status.HTTP_200_OK)
+
+
+def bulk_transition_response(request, operation):
+    """Validate and apply a bulk transition request"""
+    claim_ids = request.data.get('claim_ids') or []
+    if not isinstance(claim_ids, list) or len(claim_ids) > BULK_TRANSITION_LIMIT:
+        return Response(
+            {'error': f'claim_ids must be a list of at most {BULK_TRANSITION_LIMIT} ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    assessor = None
+    if operation == 'assign':
+        from apps.users.models import User
+        try:
+            assessor = User.objects.get(
+                id=request.data.get('assessor_id'), role__in=['admin', 'staff', 'assessor']
+            )
+        except (User.DoesNotExist, ValueError, DjangoValidationError):
+            return Response(
+                {'error': 'Invalid assessor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    settlement = request.data.get('settlement')
+    if operation == 'settle':
+        if not isinstance(settlement, dict):
+            return Response(
+                {'error': 'settlement must be an object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Same field validation as the single-claim settle action; amount and
+        # claim come from each claim, so only the payment details are checked
+        serializer = ClaimSettlementSerializer(
+            data={field: settlement[field] for field in SETTLEMENT_FIELDS if field in settlement},
+            partial=True
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        settlement = serializer.validated_data
+
+    try:
+        result = bulk_transition(
+            operation,
+            claim_ids,
+            changed_by=request.user,
+            notes=request.data.get('notes', ''),
+            amounts=request.data.get('amounts'),
+            assessor=assessor,
+            rejection_reason=request.data.get('rejection_reason', ''),
+            settlement=settlement,
+        )
+    except (TransitionError, DjangoValidationError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(result, status=status.HTTP_200_OK)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Claim, ClaimDocument, ClaimStatusHistory, ClaimSettlement
+from .models import Claim, ClaimDocument, ClaimStatusHistory, ClaimSettlement, ClaimFingerprint
 
 
 class ClaimDocumentInline(admin.TabularInline):
@@ -102,3 +102,24 @@ class ClaimSettlementAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('claim', 'processed_by')
+
+
+@admin.register(ClaimFingerprint)
+class ClaimFingerprintAdmin(admin.ModelAdmin):
+    list_display = ('claim', 'policy', 'incident_date', 'location_key', 'flagged', 'created_at')
+    list_filter = ('flagged', 'incident_date')
+    search_fields = ('claim__claim_number', 'policy__policy_number', 'location_key')
+    readonly_fields = (
+        'claim', 'policy', 'incident_date', 'location_key', 'amount_band',
+        'signature', 'duplicate_candidates', 'created_at'
+    )
+
+    fieldsets = (
+        (None, {'fields': ('claim', 'policy', 'flagged')}),
+        ('Fingerprint', {'fields': ('incident_date', 'location_key', 'amount_band', 'signature')}),
+        ('Detection', {'fields': ('duplicate_candidates',)}),
+        ('Timestamps', {'fields': ('created_at',)}),
+    )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('claim', 'policy')
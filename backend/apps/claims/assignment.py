@@ -0,0 +1,165 @@
+"""
+Automatic Claim Assignment
+Distributes submitted claims across assessors in one pass using an
+in-memory workload index built from a single aggregate query.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Claim, ClaimStatusHistory
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Claims an assessor is actively working on
+OPEN_STATUSES = ['under_review', 'documents_requested', 'assessment_complete']
+
+
+class AssessorLoad:
+    """Workload of a single assessor"""
+
+    __slots__ = ('id', 'name', 'open_claims', 'open_amount', 'types')
+
+    def __init__(self, assessor_id, name):
+        self.id = assessor_id
+        self.name = name
+        self.open_claims = 0
+        self.open_amount = Decimal('0')
+        self.types = defaultdict(int)
+
+    def add(self, claim_type, amount, count=1):
+        self.open_claims += count
+        self.open_amount += amount or 0
+        self.types[claim_type] += count
+
+
+class WorkloadIndex:
+    """
+    Open claims, open amount and claim-type mix per eligible assessor.
+
+    Built once per assignment pass and updated in memory as claims are
+    handed out, so a batch of any size costs two queries to plan.
+    """
+
+    def __init__(self, max_open_claims=None):
+        self.max_open_claims = max_open_claims or getattr(settings, 'CLAIM_ASSESSOR_MAX_OPEN', 25)
+        self.loads = {}
+
+    @classmethod
+    def build(cls, roles=None, max_open_claims=None):
+        index = cls(max_open_claims)
+        roles = roles or getattr(settings, 'CLAIM_ASSESSOR_ROLES', ['assessor', 'staff'])
+
+        for assessor in User.objects.filter(role__in=roles, is_active=True).only('id', 'first_name', 'last_name'):
+            index.loads[assessor.id] = AssessorLoad(assessor.id, assessor.full_name)
+
+        rows = (
+            Claim.objects.filter(assessor_id__in=index.loads.keys(), status__in=OPEN_STATUSES)
+            .values('assessor_id', 'type')
+            .annotate(total=Count('id'), amount=Sum('amount_claimed'))
+            .order_by()
+        )
+        for row in rows:
+            index.loads[row['assessor_id']].add(row['type'], row['amount'], row['total'])
+
+        return index
+
+    def pick(self, claim_type):
+        """
+        Least-loaded assessor with spare capacity. Ties on open claims go to
+        the assessor with the most experience of this claim type, then to
+        the one with the lowest open amount.
+        """
+        candidates = [load for load in self.loads.values() if load.open_claims < self.max_open_claims]
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda load: (load.open_claims, -load.types[claim_type], load.open_amount, str(load.id))
+        )
+
+    def snapshot(self):
+        return [
+            {
+                'assessor_id': str(load.id),
+                'assessor_name': load.name,
+                'open_claims': load.open_claims,
+                'open_amount': float(load.open_amount),
+                'types': dict(load.types),
+            }
+            for load in sorted(self.loads.values(), key=lambda load: load.open_claims)
+        ]
+
+
+def auto_assign_claims(limit=None, assigned_by=None):
+    """
+    Assign unassigned submitted claims, oldest first.
+
+    Claims are locked with SKIP LOCKED so concurrent runs, and manual
+    assignments (which lock the claim row too), never fight over the same
+    rows. Each assessor's share is written with one UPDATE and history rows
+    with one bulk insert.
+
+    Returns:
+        dict: assigned / unassigned counts and per-assessor totals
+    """
+    limit = limit or getattr(settings, 'CLAIM_AUTO_ASSIGN_BATCH_SIZE', 500)
+
+    with db_transaction.atomic():
+        claims = list(
+            Claim.objects.select_for_update(skip_locked=True)
+            .filter(status='submitted', assessor__isnull=True)
+            .order_by('filed_date')
+            .only('id', 'type', 'amount_claimed', 'status')[:limit]
+        )
+        if not claims:
+            return {'assigned': 0, 'unassigned': 0, 'assessors': {}}
+
+        index = WorkloadIndex.build()
+        plan = defaultdict(list)
+        for claim in claims:
+            load = index.pick(claim.type)
+            if load is None:
+                break
+            load.add(claim.type, claim.amount_claimed)
+            plan[load.id].append(claim)
+
+        now = timezone.now()
+        history = []
+        for assessor_id, assigned in plan.items():
+            Claim.objects.filter(pk__in=[claim.pk for claim in assigned]).update(
+                assessor_id=assessor_id,
+                status='under_review',
+                assigned_at=now,
+                updated_at=now,
+            )
+            notes = f'Auto-assigned to {index.loads[assessor_id].name}'
+            history.extend(
+                ClaimStatusHistory(
+                    claim_id=claim.pk,
+                    from_status=claim.status,
+                    to_status='under_review',
+                    notes=notes,
+                    changed_by=assigned_by,
+                )
+                for claim in assigned
+            )
+        ClaimStatusHistory.objects.bulk_create(history)
+
+    assigned_count = len(history)
+    logger.info(f"Auto-assigned {assigned_count} of {len(claims)} submitted claims")
+    return {
+        'assigned': assigned_count,
+        'unassigned': len(claims) - assigned_count,
+        'assessors': {str(assessor_id): len(assigned) for assessor_id, assigned in plan.items()},
+    }
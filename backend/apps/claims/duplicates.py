@@ -0,0 +1,250 @@
+"""
+Duplicate Claim Detection
+Incremental fingerprint index over claims. A new claim is compared only
+against candidates pulled from indexed lookups:
+- same policy with an incident date inside the window
+- same normalised location with an incident date inside the window
+- descriptions sharing at least one MinHash LSH band, with an incident
+  date inside CLAIM_DUPLICATE_DESCRIPTION_WINDOW_DAYS (most shared bands
+  first)
+At most CLAIM_DUPLICATE_MAX_CANDIDATES candidates are scored, so detection
+cost does not grow with the size of the claims table.
+"""
+
+import hashlib
+import math
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q
+
+from .models import Claim, ClaimFingerprint, ClaimSignatureBand
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# MinHash: NUM_BANDS bands of ROWS_PER_BAND hashes. Two descriptions with
+# Jaccard similarity s share a band with probability 1 - (1 - s^r)^b,
+# which is ~0.5 at s=0.5 and >0.95 at s=0.7.
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    """Fixed (a, b) pairs so signatures stay comparable across processes"""
+    perms = []
+    for i in range(NUM_HASHES):
+        digest = hashlib.blake2b(f'claim-minhash-{i}'.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], 'big') % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+PERMUTATIONS = _permutations()
+
+LOCATION_ABBREVIATIONS = {
+    'rd': 'road',
+    'st': 'street',
+    'ave': 'avenue',
+    'hwy': 'highway',
+    'opp': 'opposite',
+    'nbi': 'nairobi',
+    'msa': 'mombasa',
+}
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalise_location(location):
+    """Lowercase, expand common abbreviations and sort tokens so word order does not matter"""
+    tokens = [LOCATION_ABBREVIATIONS.get(token, token) for token in _WORD_RE.findall((location or '').lower())]
+    return ' '.join(sorted(set(tokens)))[:255]
+
+
+def amount_band(amount):
+    """Geometric band of ~25% width, so near-identical amounts share a band"""
+    return int(math.log(max(float(amount or 0), 1.0)) / math.log(1.25))
+
+
+def shingles(text):
+    words = _WORD_RE.findall((text or '').lower())
+    if len(words) < SHINGLE_SIZE:
+        return set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """MinHash signature of the description's word shingles, or [] if too short"""
+    values = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in shingles(text)
+    ]
+    if not values:
+        return []
+    return [
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in values)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def signature_bands(signature):
+    """(band, bucket) pairs for LSH lookups"""
+    if not signature:
+        return []
+    bands = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        bucket = hashlib.blake2b(','.join(map(str, rows)).encode(), digest_size=8).hexdigest()
+        bands.append((band, bucket))
+    return bands
+
+
+def estimated_similarity(signature, other):
+    if not signature or not other or len(signature) != len(other):
+        return 0.0
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def _candidate_fingerprints(claim, location_key, bands):
+    window = timedelta(days=getattr(settings, 'CLAIM_DUPLICATE_WINDOW_DAYS', 3))
+    date_range = (claim.incident_date - window, claim.incident_date + window)
+    limit = getattr(settings, 'CLAIM_DUPLICATE_MAX_CANDIDATES', 200)
+
+    # Strongest signals first, so they survive the cap
+    lookups = [
+        ClaimFingerprint.objects.filter(policy_id=claim.policy_id, incident_date__range=date_range)
+        .values_list('claim_id', flat=True)[:limit]
+    ]
+    if location_key:
+        lookups.append(
+            ClaimFingerprint.objects.filter(location_key=location_key, incident_date__range=date_range)
+            .values_list('claim_id', flat=True)[:limit]
+        )
+    if bands:
+        description_window = timedelta(days=getattr(settings, 'CLAIM_DUPLICATE_DESCRIPTION_WINDOW_DAYS', 365))
+        band_filter = Q()
+        for band, bucket in bands:
+            band_filter |= Q(band=band, bucket=bucket)
+        # A common band can match many claims; the ones sharing the most bands are the most similar
+        lookups.append(
+            ClaimSignatureBand.objects.filter(
+                band_filter,
+                incident_date__range=(claim.incident_date - description_window,
+                                      claim.incident_date + description_window),
+            )
+            .exclude(claim_id=claim.pk)
+            .values('claim_id')
+            .annotate(shared=Count('id'))
+            .order_by('-shared')
+            .values_list('claim_id', flat=True)[:limit]
+        )
+
+    candidate_ids = list(dict.fromkeys(claim_id for lookup in lookups for claim_id in lookup))
+    if claim.pk in candidate_ids:
+        candidate_ids.remove(claim.pk)
+    candidate_ids = candidate_ids[:limit]
+    if not candidate_ids:
+        return []
+    return list(
+        ClaimFingerprint.objects.filter(claim_id__in=candidate_ids)
+        .select_related('claim')
+        .only(
+            'claim_id', 'policy_id', 'incident_date', 'location_key', 'amount_band', 'signature',
+            'claim__claim_number', 'claim__status'
+        )
+    )
+
+
+def _score(claim, location_key, band, signature, candidate):
+    """Score a candidate in [0, 1] with the reasons that contributed"""
+    window = getattr(settings, 'CLAIM_DUPLICATE_WINDOW_DAYS', 3)
+    close_in_time = abs((candidate.incident_date - claim.incident_date).days) <= window
+
+    score, reasons = 0.0, []
+    if candidate.policy_id == claim.policy_id and close_in_time:
+        score += 0.5
+        reasons.append('same_policy_incident')
+    if location_key and candidate.location_key == location_key and close_in_time:
+        score += 0.3
+        reasons.append('same_location_incident')
+    if candidate.amount_band == band and reasons:
+        score += 0.1
+        reasons.append('similar_amount')
+
+    similarity = estimated_similarity(signature, candidate.signature)
+    if similarity >= getattr(settings, 'CLAIM_DUPLICATE_DESCRIPTION_SIMILARITY', 0.6):
+        score += 0.5 * similarity
+        reasons.append('similar_description')
+
+    return min(score, 1.0), reasons, similarity
+
+
+def index_claim(claim):
+    """
+    Fingerprint a claim, record its LSH bands and flag likely duplicates.
+
+    Returns:
+        ClaimFingerprint: The saved fingerprint, with duplicate_candidates
+        sorted by descending score
+    """
+    location_key = normalise_location(claim.incident_location)
+    band = amount_band(claim.amount_claimed)
+    signature = minhash(claim.description)
+    bands = signature_bands(signature)
+    threshold = getattr(settings, 'CLAIM_DUPLICATE_FLAG_SCORE', 0.6)
+
+    candidates = []
+    for candidate in _candidate_fingerprints(claim, location_key, bands):
+        score, reasons, similarity = _score(claim, location_key, band, signature, candidate)
+        if score >= threshold:
+            candidates.append({
+                'claim_id': str(candidate.claim_id),
+                'claim_number': candidate.claim.claim_number,
+                'status': candidate.claim.status,
+                'score': round(score, 2),
+                'description_similarity': round(similarity, 2),
+                'reasons': reasons,
+            })
+    candidates.sort(key=lambda item: item['score'], reverse=True)
+
+    with db_transaction.atomic():
+        fingerprint, _ = ClaimFingerprint.objects.update_or_create(
+            claim=claim,
+            defaults={
+                'policy_id': claim.policy_id,
+                'incident_date': claim.incident_date,
+                'location_key': location_key,
+                'amount_band': band,
+                'signature': signature,
+                'flagged': bool(candidates),
+                'duplicate_candidates': candidates,
+            }
+        )
+        ClaimSignatureBand.objects.filter(claim=claim).delete()
+        ClaimSignatureBand.objects.bulk_create([
+            ClaimSignatureBand(claim=claim, band=band_index, bucket=bucket, incident_date=claim.incident_date)
+            for band_index, bucket in bands
+        ])
+
+    if candidates:
+        logger.info(f"Claim {claim.claim_number} flagged as possible duplicate of {len(candidates)} claim(s)")
+    return fingerprint
+
+
+def rebuild_fingerprints(chunk_size=500):
+    """Fingerprint every claim without one, oldest first (backfill)"""
+    indexed = 0
+    queryset = Claim.objects.filter(fingerprint__isnull=True).order_by('filed_date')
+    for claim in queryset.iterator(chunk_size=chunk_size):
+        index_claim(claim)
+        indexed += 1
+    return indexed
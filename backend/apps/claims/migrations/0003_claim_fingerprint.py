@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0002_initial'),
+        ('policies', '0007_tpo_and_tor_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimFingerprint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('incident_date', models.DateField()),
+                ('location_key', models.CharField(blank=True, max_length=255)),
+                ('amount_band', models.IntegerField()),
+                ('signature', models.JSONField(blank=True, default=list, help_text='MinHash signature of the description')),
+                ('flagged', models.BooleanField(db_index=True, default=False)),
+                ('duplicate_candidates', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claim', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='claims.claim')),
+                ('policy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claim_fingerprints', to='policies.policy')),
+            ],
+            options={
+                'db_table': 'claim_fingerprints',
+                'indexes': [models.Index(fields=['policy', 'incident_date'], name='claim_finge_policy__776317_idx'), models.Index(fields=['location_key', 'incident_date'], name='claim_finge_locatio_f2ff89_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClaimSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('band', models.SmallIntegerField()),
+                ('bucket', models.CharField(max_length=16)),
+                ('claim', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='claims.claim')),
+            ],
+            options={
+                'db_table': 'claim_signature_bands',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='claim_signa_band_1883fc_idx')],
+            },
+        ),
+    ]
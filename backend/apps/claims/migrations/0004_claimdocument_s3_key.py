@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0003_claim_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claimdocument',
+            name='s3_key',
+            field=models.CharField(blank=True, help_text='Storage key when uploaded through an upload session', max_length=500),
+        ),
+    ]
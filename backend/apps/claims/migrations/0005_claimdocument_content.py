@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0004_claimdocument_s3_key'),
+        ('documents', '0005_document_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claimdocument',
+            name='content',
+            field=models.ForeignKey(blank=True, db_column='content_hash', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claim_documents', to='documents.documentcontent', to_field='content_hash'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-19 17:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_incident_date(apps, schema_editor):
+    """Copy each claim's incident date from its fingerprint onto its bands"""
+    ClaimFingerprint = apps.get_model('claims', 'ClaimFingerprint')
+    ClaimSignatureBand = apps.get_model('claims', 'ClaimSignatureBand')
+    ClaimSignatureBand.objects.update(incident_date=Subquery(
+        ClaimFingerprint.objects.filter(claim_id=OuterRef('claim_id')).values('incident_date')[:1]
+    ))
+    ClaimSignatureBand.objects.filter(incident_date__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0005_claimdocument_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claimsignatureband',
+            name='incident_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_incident_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='claimsignatureband',
+            name='incident_date',
+            field=models.DateField(),
+        ),
+        migrations.RemoveIndex(
+            model_name='claimsignatureband',
+            name='claim_signa_band_1883fc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='claimsignatureband',
+            index=models.Index(fields=['band', 'bucket', 'incident_date'], name='claim_signa_band_46bc22_idx'),
+        ),
+    ]
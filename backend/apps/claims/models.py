@@ -106,8 +106,18 @@ class ClaimDocument(models.Model):
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPE_CHOICES)
     title = models.CharField(max_length=200)
     file_url = models.URLField()
+    s3_key = models.CharField(max_length=500, blank=True, help_text='Storage key when uploaded through an upload session')
     file_size = models.IntegerField(help_text='File size in bytes')
     mime_type = models.CharField(max_length=100)
+    content = models.ForeignKey(
+        'documents.DocumentContent',
+        to_field='content_hash',
+        db_column='content_hash',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claim_documents'
+    )
 
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -125,6 +135,32 @@ class ClaimDocument(models.Model):
         return f"{self.document_type} for {self.claim.claim_number}"
 
 
+class ClaimStatusHistoryManager(models.Manager):
+    """
+    Schedules claim SLA metrics whenever history rows are written, whether
+    one at a time or in bulk.
+    """
+
+    def create(self, **kwargs):
+        row = super().create(**kwargs)
+        self._record_durations([row.claim_id])
+        return row
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._record_durations({obj.claim_id for obj in objs})
+        return objs
+
+    @staticmethod
+    def _record_durations(claim_ids):
+        from django.db import transaction as db_transaction
+        from apps.analytics.tasks import record_claim_durations
+
+        claim_ids = [str(claim_id) for claim_id in claim_ids if claim_id]
+        if claim_ids:
+            db_transaction.on_commit(lambda: record_claim_durations.delay(claim_ids))
+
+
 class ClaimStatusHistory(models.Model):
     """Track claim status changes"""
 
@@ -142,6 +178,8 @@ class ClaimStatusHistory(models.Model):
     )
     changed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ClaimStatusHistoryManager()
+
     class Meta:
         db_table = 'claim_status_history'
         ordering = ['-changed_at']
@@ -191,3 +229,55 @@ class ClaimSettlement(models.Model):
 
     def __str__(self):
         return f"Settlement for {self.claim.claim_number} - {self.amount}"
+
+
+class ClaimFingerprint(models.Model):
+    """
+    Duplicate-detection index entry for a claim.
+    Holds the normalised incident attributes and a MinHash signature of the
+    description; signature bands live in ClaimSignatureBand for LSH lookups.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    claim = models.OneToOneField(Claim, on_delete=models.CASCADE, related_name='fingerprint')
+    policy = models.ForeignKey('policies.Policy', on_delete=models.CASCADE, related_name='claim_fingerprints')
+    incident_date = models.DateField()
+    location_key = models.CharField(max_length=255, blank=True)
+    amount_band = models.IntegerField()
+    signature = models.JSONField(default=list, blank=True, help_text='MinHash signature of the description')
+
+    # Detection result at filing time
+    flagged = models.BooleanField(default=False, db_index=True)
+    duplicate_candidates = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'claim_fingerprints'
+        indexes = [
+            models.Index(fields=['policy', 'incident_date']),
+            models.Index(fields=['location_key', 'incident_date']),
+        ]
+
+    def __str__(self):
+        return f"Fingerprint for {self.claim_id}"
+
+
+class ClaimSignatureBand(models.Model):
+    """One LSH band of a claim description's MinHash signature"""
+
+    id = models.BigAutoField(primary_key=True)
+    claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='signature_bands')
+    band = models.SmallIntegerField()
+    bucket = models.CharField(max_length=16)
+    # Copied from the claim so band lookups can be bounded by date from the index
+    incident_date = models.DateField()
+
+    class Meta:
+        db_table = 'claim_signature_bands'
+        indexes = [
+            models.Index(fields=['band', 'bucket', 'incident_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.claim_id} band {self.band}"
@@ -4,17 +4,20 @@ Serializers for Claims App
 from rest_framework import serializers
 from .models import Claim, ClaimDocument, ClaimStatusHistory, ClaimSettlement
 from apps.policies.models import Policy
+from apps.documents.serializers import ContentListSerializer, DocumentContentSerializer
 
 
 class ClaimDocumentSerializer(serializers.ModelSerializer):
     """Serializer for claim documents"""
+    content = DocumentContentSerializer(read_only=True)
 
     class Meta:
         model = ClaimDocument
         fields = [
             'id', 'claim', 'document_type', 'title', 'file_url',
-            'file_size', 'mime_type', 'uploaded_by', 'uploaded_at'
+            'file_size', 'mime_type', 'uploaded_by', 'uploaded_at', 'content'
         ]
+        list_serializer_class = ContentListSerializer
         read_only_fields = ['id', 'uploaded_by', 'uploaded_at']
 
 
@@ -80,6 +83,43 @@ class ClaimSerializer(serializers.ModelSerializer):
         ]
 
 
+class ClaimListSerializer(serializers.ModelSerializer):
+    """
+    Compact claim representation for list endpoints.
+    Document and history counts come from queryset annotations; the nested
+    payloads are only returned by ClaimSerializer on retrieve.
+    """
+    user_name = serializers.CharField(source='user.full_name', read_only=True)
+    policy_number = serializers.CharField(source='policy.policy_number', read_only=True)
+    policy_type = serializers.CharField(source='policy.policy_type.name', read_only=True)
+    company_name = serializers.CharField(source='policy.insurance_company.name', read_only=True)
+    assessor_name = serializers.CharField(source='assessor.full_name', read_only=True, allow_null=True)
+    documents_count = serializers.IntegerField(read_only=True)
+    history_count = serializers.IntegerField(read_only=True)
+    is_pending = serializers.BooleanField(read_only=True)
+    possible_duplicate = serializers.BooleanField(source='fingerprint.flagged', read_only=True, default=False)
+
+    class Meta:
+        model = Claim
+        fields = [
+            'id', 'claim_number', 'policy', 'policy_number',
+            'policy_type', 'company_name', 'user', 'user_name',
+            'type', 'incident_date', 'amount_claimed', 'amount_approved',
+            'status', 'assessor', 'assessor_name', 'filed_date',
+            'updated_at', 'documents_count', 'history_count', 'is_pending',
+            'possible_duplicate'
+        ]
+        read_only_fields = fields
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # The duplicate flag is an internal fraud signal, not shown to customers
+        request = self.context.get('request')
+        if request is None or getattr(request.user, 'role', None) not in ['admin', 'staff', 'assessor']:
+            fields.pop('possible_duplicate', None)
+        return fields
+
+
 class ClaimCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating claims"""
 
@@ -140,6 +180,10 @@ class ClaimCreateSerializer(serializers.ModelSerializer):
             changed_by=claim.user
         )
 
+        # Flag likely duplicates for assessors before the claim enters the queue
+        from .duplicates import index_claim
+        index_claim(claim)
+
         return claim
 
 
@@ -165,14 +209,6 @@ class ClaimUpdateSerializer(serializers.ModelSerializer):
         if old_status != new_status:
             from django.utils import timezone
 
-            ClaimStatusHistory.objects.create(
-                claim=claim,
-                from_status=old_status,
-                to_status=new_status,
-                notes=validated_data.get('assessor_notes', ''),
-                changed_by=self.context['request'].user
-            )
-
             # Update timestamps based on status
             if new_status == 'under_review' and not claim.assigned_at:
                 claim.assigned_at = timezone.now()
@@ -183,6 +219,15 @@ class ClaimUpdateSerializer(serializers.ModelSerializer):
 
             claim.save()
 
+            # Written after the timestamps so SLA metrics see them
+            ClaimStatusHistory.objects.create(
+                claim=claim,
+                from_status=old_status,
+                to_status=new_status,
+                notes=validated_data.get('assessor_notes', ''),
+                changed_by=self.context['request'].user
+            )
+
         return claim
 
 
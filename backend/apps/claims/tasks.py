@@ -0,0 +1,50 @@
+"""Claims Celery tasks"""
+from celery import shared_task
+
+
+@shared_task
+def auto_assign_claims():
+    """Distribute unassigned submitted claims across assessors"""
+    from .assignment import auto_assign_claims as run_auto_assignment
+    return run_auto_assignment()
+
+
+CLAIM_NOTIFICATION_TYPES = {
+    'approved': 'claim_approved',
+    'rejected': 'claim_rejected',
+    'settled': 'claim_settled',
+}
+
+
+@shared_task
+def notify_claim_status_change(claim_ids, to_status):
+    """
+    Notify claim owners in-app; merged into their digests with any other recent updates.
+    Bulk status changes stay off email and SMS, as they were before digesting.
+    """
+    from apps.notifications.digest import notify_many
+    from .models import Claim
+
+    status_label = dict(Claim.STATUS_CHOICES).get(to_status, to_status)
+    notification_type = CLAIM_NOTIFICATION_TYPES.get(to_status, 'claim_status_update')
+
+    return notify_many(
+        [
+            {
+                'user_id': claim['user_id'],
+                'type': notification_type,
+                'title': f"Claim {claim['claim_number']} {status_label.lower()}",
+                'message': f"Your claim {claim['claim_number']} is now {status_label.lower()}.",
+                'action_url': '/dashboard/claims',
+            }
+            for claim in Claim.objects.filter(pk__in=claim_ids).values('user_id', 'claim_number')
+        ],
+        channels=['in_app']
+    )
+
+
+@shared_task
+def rebuild_claim_fingerprints():
+    """Backfill the duplicate-detection index for claims filed before it existed"""
+    from .duplicates import rebuild_fingerprints
+    return rebuild_fingerprints()
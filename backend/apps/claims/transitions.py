@@ -0,0 +1,203 @@
+"""
+Claim State Transitions
+Allowed status changes and set-based bulk transitions for the admin queue.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, Value, When
+from django.utils import timezone
+
+from .models import Claim, ClaimSettlement, ClaimStatusHistory
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# from_status -> statuses a claim may move to
+ALLOWED_TRANSITIONS = {
+    'submitted': {'under_review', 'documents_requested', 'rejected'},
+    'under_review': {'under_review', 'documents_requested', 'assessment_complete', 'approved', 'rejected'},
+    'documents_requested': {'under_review', 'rejected'},
+    'assessment_complete': {'under_review', 'approved', 'rejected'},
+    'approved': {'settled'},
+    'rejected': set(),
+    'settled': set(),
+}
+
+# Bulk operation -> resulting status
+BULK_TRANSITIONS = {
+    'assign': 'under_review',
+    'approve': 'approved',
+    'reject': 'rejected',
+    'settle': 'settled',
+}
+
+# ClaimSettlement fields a bulk settle copies onto every settlement
+SETTLEMENT_FIELDS = [
+    'payment_method', 'bank_name', 'account_number', 'mpesa_phone',
+    'cheque_number', 'reference_number', 'notes',
+]
+
+
+class TransitionError(Exception):
+    """Raised when a bulk transition request is invalid as a whole"""
+
+
+def can_transition(from_status, to_status):
+    return to_status in ALLOWED_TRANSITIONS.get(from_status, set())
+
+
+def _parse_amounts(amounts):
+    """Normalise {claim_id: amount} to Decimals keyed by string id"""
+    if not isinstance(amounts or {}, dict):
+        raise TransitionError('amounts must map claim ids to approved amounts')
+    parsed = {}
+    for claim_id, amount in (amounts or {}).items():
+        try:
+            value = Decimal(str(amount))
+        except (InvalidOperation, TypeError):
+            raise TransitionError(f'Invalid amount for claim {claim_id}')
+        if value <= 0:
+            raise TransitionError(f'Amount for claim {claim_id} must be greater than zero')
+        parsed[str(claim_id)] = value
+    return parsed
+
+
+def bulk_transition(operation, claim_ids, changed_by, notes='', amounts=None,
+                    assessor=None, rejection_reason='', settlement=None):
+    """
+    Apply one transition to a set of claims.
+
+    Claims are locked, checked against ALLOWED_TRANSITIONS, then moved with
+    a single UPDATE, one bulk insert of history rows (and settlements for
+    'settle'), all in one transaction. Owner notifications are enqueued as
+    one task after commit.
+
+    Args:
+        operation: 'assign', 'approve', 'reject' or 'settle'
+        claim_ids: Claim ids to transition
+        changed_by: User performing the transition
+        amounts: {claim_id: amount_approved} for 'approve'; every claim needs
+            an entry no greater than its amount claimed
+        assessor: Assessor for 'assign'
+        rejection_reason: Required for 'reject'
+        settlement: Validated payment details for 'settle' (SETTLEMENT_FIELDS)
+
+    Returns:
+        dict: {'updated': [ids], 'skipped': [{'id', 'reason'}]}
+    """
+    to_status = BULK_TRANSITIONS.get(operation)
+    if to_status is None:
+        raise TransitionError(f'Unknown operation: {operation}')
+    if not claim_ids:
+        raise TransitionError('claim_ids is required')
+    if operation == 'assign' and assessor is None:
+        raise TransitionError('Assessor is required')
+    if operation == 'reject' and not rejection_reason:
+        raise TransitionError('Rejection reason is required')
+    if operation == 'settle':
+        if not isinstance(settlement, dict):
+            raise TransitionError('settlement must be an object')
+        if not settlement.get('payment_method'):
+            raise TransitionError('Settlement payment method is required')
+
+    amounts = _parse_amounts(amounts) if operation == 'approve' else {}
+    requested = {str(claim_id) for claim_id in claim_ids}
+    if operation == 'approve' and not requested <= amounts.keys():
+        raise TransitionError('Approved amount is required for every claim')
+    now = timezone.now()
+
+    with db_transaction.atomic():
+        rows = {
+            str(row['id']): row
+            for row in Claim.objects.select_for_update()
+            .filter(pk__in=requested)
+            .values('id', 'status', 'amount_claimed', 'amount_approved')
+        }
+
+        if operation == 'settle':
+            already_settled = {
+                str(claim_id) for claim_id in
+                ClaimSettlement.objects.filter(claim_id__in=rows.keys()).values_list('claim_id', flat=True)
+            }
+        else:
+            already_settled = set()
+
+        valid, skipped = [], []
+        for claim_id in sorted(requested):
+            row = rows.get(claim_id)
+            if row is None:
+                skipped.append({'id': claim_id, 'reason': 'Claim not found'})
+            elif not can_transition(row['status'], to_status):
+                skipped.append({'id': claim_id, 'reason': f"Cannot {operation} a claim that is {row['status']}"})
+            elif claim_id in already_settled:
+                skipped.append({'id': claim_id, 'reason': 'Claim already has a settlement'})
+            elif operation == 'approve' and amounts[claim_id] > row['amount_claimed']:
+                skipped.append({'id': claim_id, 'reason': 'Approved amount exceeds the amount claimed'})
+            else:
+                valid.append(row)
+
+        if not valid:
+            return {'updated': [], 'skipped': skipped}
+
+        valid_ids = [row['id'] for row in valid]
+        updates = {'status': to_status, 'updated_at': now}
+
+        if operation == 'assign':
+            updates.update(assessor=assessor, assigned_at=now)
+        elif operation == 'approve':
+            updates.update(
+                assessment_date=now,
+                assessor_notes=notes,
+                amount_approved=Case(
+                    *[
+                        When(pk=row['id'], then=Value(amounts[str(row['id'])]))
+                        for row in valid
+                    ],
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                ),
+            )
+        elif operation == 'reject':
+            updates.update(assessment_date=now, rejection_reason=rejection_reason)
+        elif operation == 'settle':
+            updates.update(settlement_date=now)
+
+        Claim.objects.filter(pk__in=valid_ids).update(**updates)
+
+        if operation == 'settle':
+            settlement_fields = {field: settlement.get(field) or '' for field in SETTLEMENT_FIELDS}
+            ClaimSettlement.objects.bulk_create([
+                ClaimSettlement(
+                    claim_id=row['id'],
+                    amount=row['amount_approved'] or row['amount_claimed'],
+                    processed_by=changed_by,
+                    **settlement_fields
+                )
+                for row in valid
+            ])
+
+        history_notes = {
+            'assign': f'Assigned to {assessor.full_name}' if assessor else '',
+            'approve': notes,
+            'reject': rejection_reason,
+            'settle': f"Settlement processed via {(settlement or {}).get('payment_method', '')}",
+        }[operation]
+        ClaimStatusHistory.objects.bulk_create([
+            ClaimStatusHistory(
+                claim_id=row['id'],
+                from_status=row['status'],
+                to_status=to_status,
+                notes=history_notes,
+                changed_by=changed_by,
+            )
+            for row in valid
+        ])
+
+        from .tasks import notify_claim_status_change
+        notify_ids = [str(claim_id) for claim_id in valid_ids]
+        db_transaction.on_commit(lambda: notify_claim_status_change.delay(notify_ids, to_status))
+
+    logger.info(f"Bulk {operation}: {len(valid)} claims updated, {len(skipped)} skipped")
+    return {'updated': [str(claim_id) for claim_id in valid_ids], 'skipped': skipped}
@@ -8,12 +8,18 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Count, Sum, Q, Avg
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum, Q, Avg, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from datetime import timedelta
 
-from .models import Claim, ClaimDocument, ClaimStatusHistory, ClaimSettlement
+from .actions import auto_assign_response, bulk_transition_response
+from .assignment import WorkloadIndex
+from .duplicates import index_claim
+from .models import Claim, ClaimDocument, ClaimFingerprint, ClaimStatusHistory, ClaimSettlement
 from .serializers import (
     ClaimSerializer,
+    ClaimListSerializer,
     ClaimCreateSerializer,
     ClaimUpdateSerializer,
     ClaimDocumentSerializer,
@@ -23,6 +29,18 @@ from .serializers import (
 )
 
 
+def _related_count(model):
+    """Correlated COUNT(*) of a claim's related rows, without joining them into the claim query"""
+    counts = (
+        model.objects.filter(claim=OuterRef('pk'))
+        .order_by()
+        .values('claim')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 class ClaimViewSet(viewsets.ModelViewSet):
     """
     ViewSet for claims management
@@ -37,25 +55,54 @@ class ClaimViewSet(viewsets.ModelViewSet):
     ordering_fields = ['filed_date', 'amount_claimed', 'status']
     ordering = ['-filed_date']
 
+    LIST_ACTIONS = ['list', 'my_claims', 'pending']
+
     def get_queryset(self):
         user = self.request.user
 
         # Admin/staff can see all claims
         if user.role in ['admin', 'staff']:
             queryset = Claim.objects.all()
+        elif user.role == 'assessor' and self.action == 'duplicates':
+            # Assessors check duplicates on the claims assigned to them
+            queryset = Claim.objects.filter(assessor=user)
         else:
             queryset = Claim.objects.filter(user=user)
 
-        return queryset.select_related(
+        queryset = queryset.select_related(
             'policy', 'user', 'assessor',
             'policy__policy_type', 'policy__insurance_company'
-        ).prefetch_related('documents', 'status_history')
+        )
+
+        # Related rows are only loaded for the actions that render them
+        if self.action in self.LIST_ACTIONS:
+            queryset = queryset.select_related('fingerprint').defer(
+                'fingerprint__signature', 'fingerprint__duplicate_candidates'
+            ).annotate(
+                documents_count=_related_count(ClaimDocument),
+                history_count=_related_count(ClaimStatusHistory),
+            )
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'documents',
+                    queryset=ClaimDocument.objects.select_related('content').defer('content__text')
+                ),
+                Prefetch(
+                    'status_history',
+                    queryset=ClaimStatusHistory.objects.select_related('changed_by')
+                )
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'create':
             return ClaimCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return ClaimUpdateSerializer
+        elif self.action in self.LIST_ACTIONS:
+            return ClaimListSerializer
         return ClaimSerializer
 
     def perform_create(self, serializer):
@@ -95,6 +142,28 @@ class ClaimViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(claims, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def auto_assign(self, request):
+        """Assign submitted claims to the least-loaded assessors (admin only)"""
+        if request.user.role not in ['admin', 'staff']:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return auto_assign_response(request)
+
+    @action(detail=False, methods=['get'])
+    def workload(self, request):
+        """Current open workload per assessor (admin only)"""
+        if request.user.role not in ['admin', 'staff']:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return Response(WorkloadIndex.build().snapshot())
+
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
         """Assign claim to assessor (admin only)"""
@@ -116,27 +185,30 @@ class ClaimViewSet(viewsets.ModelViewSet):
         # Assign assessor
         from apps.users.models import User
         try:
-            assessor = User.objects.get(id=assessor_id, role__in=['admin', 'staff'])
+            assessor = User.objects.get(id=assessor_id, role__in=['admin', 'staff', 'assessor'])
         except User.DoesNotExist:
             return Response(
                 {'error': 'Invalid assessor'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        old_status = claim.status
-        claim.assessor = assessor
-        claim.status = 'under_review'
-        claim.assigned_at = timezone.now()
-        claim.save()
+        # Row lock so auto-assignment (SKIP LOCKED) leaves this claim alone
+        with db_transaction.atomic():
+            claim = Claim.objects.select_for_update().get(pk=claim.pk)
+            old_status = claim.status
+            claim.assessor = assessor
+            claim.status = 'under_review'
+            claim.assigned_at = timezone.now()
+            claim.save()
 
-        # Create status history
-        ClaimStatusHistory.objects.create(
-            claim=claim,
-            from_status=old_status,
-            to_status='under_review',
-            notes=f'Assigned to {assessor.full_name}',
-            changed_by=request.user
-        )
+            # Create status history
+            ClaimStatusHistory.objects.create(
+                claim=claim,
+                from_status=old_status,
+                to_status='under_review',
+                notes=f'Assigned to {assessor.full_name}',
+                changed_by=request.user
+            )
 
         return Response(
             {'message': f'Claim assigned to {assessor.full_name}'},
@@ -268,6 +340,55 @@ class ClaimViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def _bulk_transition(self, request, operation):
+        """Shared handler for the bulk_* actions"""
+        if request.user.role not in ['admin', 'staff']:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return bulk_transition_response(request, operation)
+
+    @action(detail=False, methods=['post'])
+    def bulk_assign(self, request):
+        """Assign many claims to one assessor (admin only)"""
+        return self._bulk_transition(request, 'assign')
+
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        """Approve many claims; amounts must give the approved amount per claim (admin only)"""
+        return self._bulk_transition(request, 'approve')
+
+    @action(detail=False, methods=['post'])
+    def bulk_reject(self, request):
+        """Reject many claims with one reason (admin only)"""
+        return self._bulk_transition(request, 'reject')
+
+    @action(detail=False, methods=['post'])
+    def bulk_settle(self, request):
+        """Settle many approved claims with shared payment details (admin only)"""
+        return self._bulk_transition(request, 'settle')
+
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """Likely duplicates flagged when the claim was filed (admin, or the assigned assessor)"""
+        if request.user.role not in ['admin', 'staff', 'assessor']:
+            return Response(
+                {'error': 'Admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        claim = self.get_object()
+        fingerprint = ClaimFingerprint.objects.filter(claim=claim).first()
+        if fingerprint is None or request.query_params.get('refresh'):
+            fingerprint = index_claim(claim)
+
+        return Response({
+            'flagged': fingerprint.flagged,
+            'candidates': fingerprint.duplicate_candidates,
+        })
+
     @action(detail=True, methods=['post'])
     def upload_document(self, request, pk=None):
         """Upload document for claim"""
@@ -295,7 +416,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
     def documents(self, request, pk=None):
         """Get claim documents"""
         claim = self.get_object()
-        documents = claim.documents.all()
+        documents = claim.documents.select_related('content').defer('content__text')
         serializer = ClaimDocumentSerializer(documents, many=True)
         return Response(serializer.data)
 
@@ -303,7 +424,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
     def history(self, request, pk=None):
         """Get claim status history"""
         claim = self.get_object()
-        history = claim.status_history.all()
+        history = claim.status_history.select_related('changed_by')
         serializer = ClaimStatusHistorySerializer(history, many=True)
         return Response(serializer.data)
 
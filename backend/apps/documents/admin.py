@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Document
+from .models import Document, DocumentContent, UploadSession
 
 
 @admin.register(Document)
@@ -7,15 +7,43 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ('filename', 'type', 'user', 'policy', 'file_size', 'is_verified', 'uploaded_at')
     list_filter = ('type', 'is_verified', 'uploaded_at')
     search_fields = ('filename', 'user__email', 'policy__policy_number', 's3_key')
-    readonly_fields = ('uploaded_at', 'updated_at')
+    readonly_fields = ('uploaded_at', 'updated_at', 'content')
     date_hierarchy = 'uploaded_at'
 
     fieldsets = (
         (None, {'fields': ('user', 'policy')}),
-        ('Document Details', {'fields': ('type', 'title', 'filename', 'file_size', 'mime_type', 's3_key')}),
+        ('Document Details', {'fields': ('type', 'title', 'filename', 'file_size', 'mime_type', 's3_key', 'content')}),
         ('Verification', {'fields': ('is_verified', 'verified_by', 'verified_at')}),
         ('Timestamps', {'fields': ('uploaded_at', 'updated_at')}),
     )
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user', 'policy', 'verified_by')
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'target', 'user', 'status', 'backend', 'file_size', 'created_at')
+    list_filter = ('status', 'target', 'backend', 'created_at')
+    search_fields = ('filename', 'user__email', 's3_key')
+    readonly_fields = ('created_at', 'completed_at', 's3_upload_id')
+    date_hierarchy = 'created_at'
+
+    fieldsets = (
+        (None, {'fields': ('user', 'target', 'status', 'backend')}),
+        ('File', {'fields': ('filename', 'mime_type', 'file_size', 'checksum_sha256')}),
+        ('Storage', {'fields': ('s3_key', 's3_upload_id', 'part_size', 'part_count')}),
+        ('Result', {'fields': ('metadata', 'document', 'claim_document', 'failure_reason')}),
+        ('Timestamps', {'fields': ('created_at', 'expires_at', 'completed_at')}),
+    )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(DocumentContent)
+class DocumentContentAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'mime_type', 'status', 'ref_count', 'page_count', 'file_size', 'processed_at')
+    list_filter = ('status', 'mime_type')
+    search_fields = ('content_hash', 'storage_key')
+    readonly_fields = ('created_at', 'processed_at', 'released_at', 'ref_count')
@@ -0,0 +1,178 @@
+"""
+Content-Addressed Blobs
+Identical files are stored once under blobs/<aa>/<sha256> and shared by
+every Document and ClaimDocument with that content.
+
+- adopt(): points a freshly hashed record at the shared blob, copying its
+  bytes there the first time the hash is seen and dropping the duplicate
+  object otherwise
+- reusable_content(): lets an upload session complete without any bytes
+  when the user already holds the same file
+- release() / collect_unreferenced_blobs(): reference counting and cleanup
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Document, DocumentContent, UploadSession
+from .storage import copy_object, delete_object, object_url
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def blob_key(content_hash):
+    return f"blobs/{content_hash[:2]}/{content_hash}"
+
+
+def _set_record_key(record, key):
+    """Point a Document / ClaimDocument at a storage key (and its URL for claim documents)"""
+    fields = {'s3_key': key, 'content': record.content_id}
+    if not isinstance(record, Document):
+        fields['file_url'] = object_url(key)
+    type(record).objects.filter(pk=record.pk).update(**fields)
+    for field, value in fields.items():
+        if field != 'content':
+            setattr(record, field, value)
+
+
+def adopt(record, content_hash, source_key):
+    """
+    Link a record to the blob for its content.
+
+    The first record with a hash has its object copied to the blob key;
+    later records drop their own copy once the transaction commits. Only
+    objects written by an upload session are ever deleted: a key registered
+    by a client may be somebody else's object.
+
+    Returns:
+        DocumentContent: The shared content row
+    """
+    with db_transaction.atomic():
+        content = DocumentContent.objects.select_for_update().get(content_hash=content_hash)
+        if not content.storage_key:
+            content.storage_key = copy_object(source_key, blob_key(content_hash))
+
+        DocumentContent.objects.filter(pk=content.pk).update(
+            storage_key=content.storage_key,
+            ref_count=F('ref_count') + 1,
+            released_at=None,
+        )
+        record.content_id = content_hash
+        _set_record_key(record, content.storage_key)
+
+        if source_key != content.storage_key and UploadSession.objects.filter(s3_key=source_key).exists():
+            db_transaction.on_commit(lambda: _delete_quietly(source_key))
+
+    content.refresh_from_db()
+    return content
+
+
+def _delete_quietly(key):
+    try:
+        delete_object(key)
+    except Exception as e:
+        logger.error(f"Failed to delete object {key}: {str(e)}")
+
+
+def reusable_content(user, content_hash, file_size):
+    """
+    Stored content the user already holds, so an upload can complete
+    without sending the bytes. Restricted to the user's own records so a
+    hash alone never grants access to someone else's file.
+    """
+    from apps.claims.models import ClaimDocument
+
+    if not content_hash:
+        return None
+    content = DocumentContent.objects.filter(
+        content_hash=content_hash, file_size=file_size
+    ).exclude(storage_key='').first()
+    if content is None:
+        return None
+
+    owns = (
+        Document.objects.filter(user=user, content_id=content_hash).exists()
+        or ClaimDocument.objects.filter(uploaded_by=user, content_id=content_hash).exists()
+    )
+    return content if owns else None
+
+
+def attach(content):
+    """Count a new record created directly against an existing blob"""
+    DocumentContent.objects.filter(pk=content.pk).update(ref_count=F('ref_count') + 1, released_at=None)
+
+
+def release(record):
+    """Drop a record's reference (call before deleting the record)"""
+    if not record.content_id:
+        return
+    DocumentContent.objects.filter(content_hash=record.content_id).update(ref_count=F('ref_count') - 1)
+    DocumentContent.objects.filter(
+        content_hash=record.content_id, ref_count__lte=0, released_at__isnull=True
+    ).update(released_at=timezone.now())
+
+
+def reconcile_ref_counts():
+    """
+    Recompute ref_count from the referencing rows in one UPDATE.
+    Corrects drift from cascade deletes, which bypass release().
+    """
+    from apps.claims.models import ClaimDocument
+
+    def references(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(content_id=OuterRef('content_hash'))
+                .order_by().values('content_id').annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+    updated = DocumentContent.objects.update(ref_count=references(Document) + references(ClaimDocument))
+    DocumentContent.objects.filter(ref_count__lte=0, released_at__isnull=True).update(released_at=timezone.now())
+    DocumentContent.objects.filter(ref_count__gt=0, released_at__isnull=False).update(released_at=None)
+    return updated
+
+
+def collect_unreferenced_blobs(limit=500):
+    """
+    Delete blobs (and their derived files) unreferenced for longer than
+    BLOB_RELEASE_GRACE_HOURS. The grace period covers in-flight uploads
+    that are about to adopt the blob again.
+    """
+    from apps.claims.models import ClaimDocument
+
+    grace = timedelta(hours=getattr(settings, 'BLOB_RELEASE_GRACE_HOURS', 24))
+    candidates = DocumentContent.objects.filter(
+        ref_count__lte=0, released_at__lt=timezone.now() - grace
+    ).order_by('released_at')[:limit]
+
+    deleted = 0
+    for content in candidates:
+        with db_transaction.atomic():
+            content = DocumentContent.objects.select_for_update().filter(
+                pk=content.pk, ref_count__lte=0
+            ).first()
+            if content is None:
+                continue
+            if (
+                Document.objects.filter(content_id=content.content_hash).exists()
+                or ClaimDocument.objects.filter(content_id=content.content_hash).exists()
+            ):
+                continue
+            keys = [content.storage_key, content.thumbnail_key, content.preview_key]
+            content.delete()
+            db_transaction.on_commit(lambda keys=keys: [_delete_quietly(key) for key in keys if key])
+        deleted += 1
+
+    if deleted:
+        logger.info(f"Deleted {deleted} unreferenced blobs")
+    return deleted
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:42
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0004_claimdocument_s3_key'),
+        ('documents', '0003_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('document', 'Document'), ('claim_document', 'Claim Document')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('aborted', 'Aborted'), ('expired', 'Expired'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('backend', models.CharField(choices=[('s3', 'S3'), ('local', 'Local')], max_length=10)),
+                ('filename', models.CharField(max_length=255)),
+                ('mime_type', models.CharField(max_length=100)),
+                ('file_size', models.BigIntegerField(help_text='Declared size in bytes')),
+                ('checksum_sha256', models.CharField(blank=True, help_text='Client-declared SHA-256 (hex)', max_length=64)),
+                ('s3_key', models.CharField(max_length=500, unique=True)),
+                ('s3_upload_id', models.CharField(blank=True, max_length=255)),
+                ('part_size', models.BigIntegerField()),
+                ('part_count', models.IntegerField()),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('failure_reason', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('claim_document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='claims.claimdocument')),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='documents.document')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'upload_sessions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'status'], name='upload_sess_user_id_73c91f_idx'), models.Index(fields=['status', 'expires_at'], name='upload_sess_status_bb43bc_idx')],
+            },
+        ),
+    ]
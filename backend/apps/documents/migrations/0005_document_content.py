@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file (hex)', max_length=64, unique=True)),
+                ('mime_type', models.CharField(max_length=100)),
+                ('file_size', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('thumbnail_key', models.CharField(blank=True, max_length=500)),
+                ('preview_key', models.CharField(blank=True, max_length=500)),
+                ('width', models.IntegerField(blank=True, null=True)),
+                ('height', models.IntegerField(blank=True, null=True)),
+                ('page_count', models.IntegerField(blank=True, null=True)),
+                ('text', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'document_contents',
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='content',
+            field=models.ForeignKey(blank=True, db_column='content_hash', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='documents.documentcontent', to_field='content_hash'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentcontent',
+            name='ref_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documentcontent',
+            name='released_at',
+            field=models.DateTimeField(blank=True, help_text='When ref_count last dropped to zero', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentcontent',
+            name='storage_key',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='s3_key',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='documentcontent',
+            index=models.Index(condition=models.Q(('ref_count__lte', 0)), fields=['released_at'], name='document_content_unref_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_content_addressed_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completing', 'Completing'), ('completed', 'Completed'), ('aborted', 'Aborted'), ('expired', 'Expired'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
@@ -28,10 +28,22 @@ class Document(models.Model):
     type = models.CharField(max_length=50, choices=DOCUMENT_TYPE_CHOICES, db_index=True)
     title = models.CharField(max_length=200)
     filename = models.CharField(max_length=255)
-    s3_key = models.CharField(max_length=500, unique=True)
+    # Shared blobs/<aa>/<sha256> key once processed; identical files share one object
+    s3_key = models.CharField(max_length=500, db_index=True)
     file_size = models.IntegerField(help_text='File size in bytes')
     mime_type = models.CharField(max_length=100)
 
+    # Derived artefacts (thumbnail, page count, text), shared by identical uploads
+    content = models.ForeignKey(
+        'DocumentContent',
+        to_field='content_hash',
+        db_column='content_hash',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='documents'
+    )
+
     # Verification
     is_verified = models.BooleanField(default=False)
     verified_by = models.ForeignKey(
@@ -63,3 +75,126 @@ class Document(models.Model):
         """Generate S3 presigned URL"""
         # Will be implemented in views/serializers
         return f"/api/v1/documents/{self.id}/download/"
+
+
+class DocumentContent(models.Model):
+    """
+    Content-addressed blob, keyed by SHA-256.
+    Documents and claim documents with identical content share one row and
+    one stored object (storage_key), so a duplicate upload is neither stored
+    nor processed twice. ref_count tracks the referencing records; blobs
+    left unreferenced are deleted by a periodic task.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+
+    content_hash = models.CharField(max_length=64, unique=True, help_text='SHA-256 of the file (hex)')
+    mime_type = models.CharField(max_length=100)
+    file_size = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+
+    # Stored object
+    storage_key = models.CharField(max_length=500, blank=True)
+    ref_count = models.IntegerField(default=0)
+    released_at = models.DateTimeField(null=True, blank=True, help_text='When ref_count last dropped to zero')
+
+    # Images: downscaled JPEGs; PDFs: taken from the first page's embedded image, if any
+    thumbnail_key = models.CharField(max_length=500, blank=True)
+    preview_key = models.CharField(max_length=500, blank=True)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+
+    # PDFs
+    page_count = models.IntegerField(null=True, blank=True)
+    text = models.TextField(blank=True)
+
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'document_contents'
+        indexes = [
+            models.Index(fields=['released_at'], condition=models.Q(ref_count__lte=0), name='document_content_unref_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """
+    Direct-to-storage multipart upload.
+    The client uploads parts straight to presigned S3 URLs (or the local
+    chunk endpoint in development); completing the session verifies the
+    parts and creates the Document or ClaimDocument.
+    """
+
+    TARGET_CHOICES = [
+        ('document', 'Document'),
+        ('claim_document', 'Claim Document'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completing', 'Completing'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+        ('expired', 'Expired'),
+        ('failed', 'Failed'),
+    ]
+
+    BACKEND_CHOICES = [
+        ('s3', 'S3'),
+        ('local', 'Local'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    backend = models.CharField(max_length=10, choices=BACKEND_CHOICES)
+
+    # Declared file
+    filename = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+    file_size = models.BigIntegerField(help_text='Declared size in bytes')
+    checksum_sha256 = models.CharField(max_length=64, blank=True, help_text='Client-declared SHA-256 (hex)')
+
+    # Multipart layout
+    s3_key = models.CharField(max_length=500, unique=True)
+    s3_upload_id = models.CharField(max_length=255, blank=True)
+    part_size = models.BigIntegerField()
+    part_count = models.IntegerField()
+
+    # Fields for the record created on completion (type, title, policy / claim)
+    metadata = models.JSONField(default=dict, blank=True)
+    failure_reason = models.TextField(blank=True)
+
+    document = models.ForeignKey(
+        Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions'
+    )
+    claim_document = models.ForeignKey(
+        'claims.ClaimDocument', on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions'
+    )
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
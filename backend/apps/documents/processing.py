@@ -0,0 +1,208 @@
+"""
+Document Processing
+Derives thumbnails, previews, page counts and text from uploaded files.
+
+Work is keyed by the SHA-256 of the file: every stage records its result on
+the DocumentContent row and is skipped when already present, so retries and
+duplicate uploads cost one read and a hash. Hashing is also where a record
+is moved onto its shared content-addressed blob (see blobs.py).
+"""
+
+import hashlib
+import io
+import tempfile
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .blobs import adopt
+from .models import DocumentContent
+from .storage import object_exists, open_object, save_object
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+IMAGE_MIME_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif', 'image/bmp', 'image/tiff'}
+PDF_MIME_TYPES = {'application/pdf'}
+
+THUMBNAIL_SIZE = (256, 256)
+PREVIEW_SIZE = (1280, 1280)
+
+
+def schedule_processing(record):
+    """Queue processing for a Document or ClaimDocument once the transaction commits"""
+    from apps.claims.models import ClaimDocument
+    from .tasks import process_claim_document, process_document
+
+    task = process_claim_document if isinstance(record, ClaimDocument) else process_document
+    record_id = str(record.pk)
+    db_transaction.on_commit(lambda: task.delay(record_id))
+
+
+def derived_key(content_hash, name):
+    return f"derived/{content_hash[:2]}/{content_hash}/{name}"
+
+
+def _spool(key):
+    """Copy an object into a local temp file, hashing it on the way"""
+    sha256 = hashlib.sha256()
+    spooled = tempfile.SpooledTemporaryFile(max_size=16 * MB)
+    source = open_object(key)
+    try:
+        while True:
+            chunk = source.read(MB)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            spooled.write(chunk)
+    finally:
+        source.close()
+    size = spooled.tell()
+    spooled.seek(0)
+    return spooled, sha256.hexdigest(), size
+
+
+def _save_jpeg(image, key, size):
+    from PIL import Image
+
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, format='JPEG', quality=80, optimize=True)
+    save_object(key, buffer.getvalue(), 'image/jpeg')
+    return key
+
+
+def _image_stage(content, image):
+    """Thumbnail + preview from a PIL image (skipped when already stored)"""
+    from PIL import ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    content.width, content.height = image.size
+    for field, name, size in (
+        ('thumbnail_key', 'thumbnail.jpg', THUMBNAIL_SIZE),
+        ('preview_key', 'preview.jpg', PREVIEW_SIZE),
+    ):
+        if getattr(content, field):
+            continue
+        key = derived_key(content.content_hash, name)
+        if not object_exists(key):
+            _save_jpeg(image, key, size)
+        setattr(content, field, key)
+
+
+def _process_image(content, fileobj):
+    from PIL import Image
+
+    with Image.open(fileobj) as image:
+        _image_stage(content, image)
+
+
+def _process_pdf(content, fileobj):
+    from PyPDF2 import PdfReader
+    from PIL import Image
+
+    reader = PdfReader(fileobj)
+    if reader.is_encrypted:
+        raise ValueError('PDF is encrypted')
+
+    if content.page_count is None:
+        content.page_count = len(reader.pages)
+
+    if not content.text:
+        max_chars = getattr(settings, 'DOCUMENT_TEXT_MAX_CHARS', 100000)
+        parts, length = [], 0
+        for page in reader.pages:
+            text = (page.extract_text() or '').strip()
+            if text:
+                parts.append(text)
+                length += len(text)
+            if length >= max_chars:
+                break
+        content.text = '\n\n'.join(parts)[:max_chars]
+
+    # No PDF rasteriser is available, so scanned PDFs use the largest image
+    # embedded in the first page; text-only PDFs get no thumbnail.
+    if not content.thumbnail_key and reader.pages:
+        try:
+            images = list(reader.pages[0].images)
+        except Exception:
+            images = []
+        if images:
+            largest = max(images, key=lambda img: len(img.data))
+            with Image.open(io.BytesIO(largest.data)) as image:
+                _image_stage(content, image)
+
+
+def process_file(record, key, mime_type):
+    """
+    Run the pipeline for a Document or ClaimDocument stored at key.
+
+    Returns:
+        DocumentContent: The (possibly shared) content row linked to the
+        record, or None if the upload failed its declared checksum
+    """
+    from .uploads import reject_mismatched_upload
+
+    if record.content_id:
+        content = record.content
+        if content.status in ['completed', 'unsupported']:
+            return content
+
+    spooled, digest, size = _spool(key)
+    with spooled:
+        if not record.content_id and reject_mismatched_upload(record, key, digest):
+            return None
+
+        content, _ = DocumentContent.objects.get_or_create(
+            content_hash=digest,
+            defaults={'mime_type': mime_type, 'file_size': size}
+        )
+        if record.content_id != digest:
+            content = adopt(record, digest, key)
+
+        if content.status in ['completed', 'unsupported']:
+            return content
+
+        try:
+            if mime_type in IMAGE_MIME_TYPES:
+                _process_image(content, spooled)
+            elif mime_type in PDF_MIME_TYPES:
+                _process_pdf(content, spooled)
+            else:
+                content.status = 'unsupported'
+        except Exception as e:
+            logger.error(f"Processing {key} failed: {str(e)}")
+            content.status = 'failed'
+            content.error = str(e)[:1000]
+        else:
+            if content.status != 'unsupported':
+                content.status = 'completed'
+                content.error = ''
+
+    content.processed_at = timezone.now()
+    # Only the pipeline's own fields: ref_count, released_at and storage_key
+    # may have changed under a concurrent adopt() or release() meanwhile
+    content.save(update_fields=[
+        'status', 'error', 'processed_at', 'thumbnail_key', 'preview_key',
+        'width', 'height', 'page_count', 'text',
+    ])
+    return content
+
+
+def process_document(document):
+    return process_file(document, document.s3_key, document.mime_type)
+
+
+def process_claim_document(claim_document):
+    """Claim documents are processed only when stored by us (uploaded through a session)"""
+    if not claim_document.s3_key:
+        return None
+    return process_file(claim_document, claim_document.s3_key, claim_document.mime_type)
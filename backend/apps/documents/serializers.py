@@ -1,6 +1,62 @@
 """Serializers for Documents App"""
+from django.db import models
 from rest_framework import serializers
-from .models import Document
+from .models import Document, DocumentContent, UploadSession
+from .processing import schedule_processing
+from .storage import cached_download_urls
+from apps.claims.models import Claim, ClaimDocument
+from apps.policies.models import Policy
+
+
+def sign_content_urls(context, contents):
+    """
+    Sign the thumbnail and preview URLs of many DocumentContent rows with
+    one cache round trip, memoised in the serializer context.
+    """
+    urls = context.setdefault('content_urls', {})
+    missing = {
+        key
+        for content in contents if content is not None
+        for key in (content.thumbnail_key, content.preview_key)
+        if key and key not in urls
+    }
+    if missing:
+        urls.update(cached_download_urls((key, None) for key in missing))
+    return urls
+
+
+class ContentListSerializer(serializers.ListSerializer):
+    """List serializer for records with a nested content: signs every URL up front"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        sign_content_urls(self.context, [item.content for item in items if item.content_id])
+        return super().to_representation(items)
+
+
+class DocumentContentSerializer(serializers.ModelSerializer):
+    """Processing results shared by every upload of the same file"""
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DocumentContent
+        fields = [
+            'content_hash', 'status', 'page_count', 'width', 'height',
+            'thumbnail_url', 'preview_url', 'processed_at'
+        ]
+        read_only_fields = fields
+
+    def _url(self, obj, key):
+        if not key:
+            return None
+        return sign_content_urls(self.context, [obj]).get(key)
+
+    def get_thumbnail_url(self, obj):
+        return self._url(obj, obj.thumbnail_key)
+
+    def get_preview_url(self, obj):
+        return self._url(obj, obj.preview_key)
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -9,6 +65,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     policy_number = serializers.CharField(source='policy.policy_number', read_only=True, allow_null=True)
     verified_by_name = serializers.CharField(source='verified_by.full_name', read_only=True, allow_null=True)
     file_url = serializers.CharField(read_only=True)
+    content = DocumentContentSerializer(read_only=True)
 
     class Meta:
         model = Document
@@ -16,8 +73,9 @@ class DocumentSerializer(serializers.ModelSerializer):
             'id', 'user', 'user_name', 'policy', 'policy_number',
             'type', 'title', 'filename', 's3_key', 'file_size',
             'mime_type', 'is_verified', 'verified_by', 'verified_by_name',
-            'verified_at', 'uploaded_at', 'updated_at', 'file_url'
+            'verified_at', 'uploaded_at', 'updated_at', 'file_url', 'content'
         ]
+        list_serializer_class = ContentListSerializer
         read_only_fields = [
             'id', 'user', 's3_key', 'verified_by', 'verified_at',
             'uploaded_at', 'updated_at'
@@ -31,6 +89,101 @@ class DocumentUploadSerializer(serializers.ModelSerializer):
         model = Document
         fields = ['policy', 'type', 'title', 'filename', 's3_key', 'file_size', 'mime_type']
 
+    def validate_s3_key(self, value):
+        # Clients may only register objects under their own upload prefix
+        prefix = f"documents/{self.context['request'].user.pk}/"
+        if not value.startswith(prefix) or '..' in value.split('/'):
+            raise serializers.ValidationError(f'Key must be under {prefix}')
+        # Keys are shared only through content-addressed blobs, never registered twice
+        if Document.objects.filter(s3_key=value).exists():
+            raise serializers.ValidationError('This file has already been registered')
+        return value
+
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        document = super().create(validated_data)
+        schedule_processing(document)
+        return document
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Request to start a direct-to-storage upload"""
+    target = serializers.ChoiceField(choices=UploadSession.TARGET_CHOICES, default='document')
+    filename = serializers.CharField(max_length=255)
+    mime_type = serializers.CharField(max_length=100)
+    file_size = serializers.IntegerField(min_value=1)
+    checksum_sha256 = serializers.RegexField(r'^[A-Fa-f0-9]{64}$', required=False, allow_blank=True)
+    title = serializers.CharField(max_length=200, required=False, allow_blank=True)
+
+    # target=document
+    type = serializers.ChoiceField(choices=Document.DOCUMENT_TYPE_CHOICES, required=False)
+    policy = serializers.UUIDField(required=False, allow_null=True)
+
+    # target=claim_document
+    claim = serializers.UUIDField(required=False)
+    document_type = serializers.ChoiceField(choices=ClaimDocument.DOCUMENT_TYPE_CHOICES, required=False)
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        is_staff = user.role in ['admin', 'staff']
+
+        if attrs['target'] == 'document':
+            if not attrs.get('type'):
+                raise serializers.ValidationError({'type': 'This field is required.'})
+            policy_id = attrs.get('policy')
+            if policy_id:
+                policies = Policy.objects.filter(pk=policy_id)
+                if not is_staff:
+                    policies = policies.filter(user=user)
+                if not policies.exists():
+                    raise serializers.ValidationError({'policy': 'Policy not found'})
+        else:
+            claim_id = attrs.get('claim')
+            if not claim_id:
+                raise serializers.ValidationError({'claim': 'This field is required.'})
+            claims = Claim.objects.filter(pk=claim_id)
+            if not is_staff:
+                claims = claims.filter(user=user)
+            if not claims.exists():
+                raise serializers.ValidationError({'claim': 'Claim not found'})
+
+        return attrs
+
+    def session_metadata(self):
+        data = self.validated_data
+        if data['target'] == 'document':
+            return {
+                'type': data['type'],
+                'title': data.get('title', ''),
+                'policy': str(data['policy']) if data.get('policy') else None,
+            }
+        return {
+            'claim': str(data['claim']),
+            'document_type': data.get('document_type', 'other'),
+            'title': data.get('title', ''),
+        }
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for upload sessions"""
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'status', 'backend', 'filename', 'mime_type',
+            'file_size', 'part_size', 'part_count', 'document',
+            'claim_document', 'failure_reason', 'created_at',
+            'expires_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
+class UploadPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField(max_length=100)
+    checksum_sha256 = serializers.CharField(max_length=64, required=False, allow_blank=True)
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """Parts as reported back by each part upload (ETag and x-amz-checksum-sha256 headers)"""
+    parts = UploadPartSerializer(many=True, allow_empty=False)
@@ -0,0 +1,200 @@
+"""
+Document Storage
+Shared S3 access for documents and claim evidence. The boto3 client is
+created once per process; when S3 is not configured (local development)
+callers fall back to Django's default storage under MEDIA_ROOT.
+
+Presigned download URLs are cached per object and reused until shortly
+before they expire, so repeated downloads do not re-sign.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def s3_enabled():
+    """True when S3 credentials and a bucket are configured"""
+    access_key = getattr(settings, 'AWS_ACCESS_KEY_ID', None)
+    return bool(
+        access_key
+        and access_key != 'local-dev-placeholder'
+        and getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
+    )
+
+
+def get_bucket():
+    return settings.AWS_STORAGE_BUCKET_NAME
+
+
+def get_s3_client():
+    """Process-wide boto3 S3 client (thread-safe once created)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+                from botocore.config import Config
+
+                _client = boto3.client(
+                    's3',
+                    region_name=getattr(settings, 'AWS_S3_REGION_NAME', 'us-east-1'),
+                    aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+                    aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None),
+                    config=Config(
+                        signature_version=getattr(settings, 'AWS_S3_SIGNATURE_VERSION', 's3v4'),
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                    ),
+                )
+    return _client
+
+
+def open_object(key):
+    """Readable binary stream for a stored object"""
+    if s3_enabled():
+        return get_s3_client().get_object(Bucket=get_bucket(), Key=key)['Body']
+    from django.core.files.storage import default_storage
+    return default_storage.open(key, 'rb')
+
+
+def object_exists(key):
+    if s3_enabled():
+        from botocore.exceptions import ClientError
+        try:
+            get_s3_client().head_object(Bucket=get_bucket(), Key=key)
+        except ClientError:
+            return False
+        return True
+    from django.core.files.storage import default_storage
+    return default_storage.exists(key)
+
+
+def save_object(key, content, content_type):
+    """Store bytes under an exact key (overwriting, unlike default_storage.save)"""
+    if s3_enabled():
+        get_s3_client().put_object(
+            Bucket=get_bucket(),
+            Key=key,
+            Body=content,
+            ContentType=content_type,
+            ServerSideEncryption='AES256',
+        )
+        return key
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    if default_storage.exists(key):
+        default_storage.delete(key)
+    return default_storage.save(key, ContentFile(content))
+
+
+def copy_object(source_key, target_key):
+    """Server-side copy (no bytes pass through the worker on S3)"""
+    if s3_enabled():
+        get_s3_client().copy_object(
+            Bucket=get_bucket(),
+            Key=target_key,
+            CopySource={'Bucket': get_bucket(), 'Key': source_key},
+            ServerSideEncryption='AES256',
+            MetadataDirective='COPY',
+        )
+        return target_key
+    from django.core.files.storage import default_storage
+    with default_storage.open(source_key, 'rb') as source:
+        if default_storage.exists(target_key):
+            default_storage.delete(target_key)
+        return default_storage.save(target_key, source)
+
+
+def delete_object(key):
+    if not key:
+        return
+    if s3_enabled():
+        get_s3_client().delete_object(Bucket=get_bucket(), Key=key)
+        return
+    from django.core.files.storage import default_storage
+    default_storage.delete(key)
+
+
+def object_url(key, request=None):
+    """
+    Permanent (unsigned) location of an object. S3 objects are private, so
+    this identifies the object; downloads still go through a presigned URL.
+    """
+    if s3_enabled():
+        region = getattr(settings, 'AWS_S3_REGION_NAME', 'us-east-1')
+        return f"https://{get_bucket()}.s3.{region}.amazonaws.com/{key}"
+    url = f"{settings.MEDIA_URL}{key}"
+    return request.build_absolute_uri(url) if request else url
+
+
+def presigned_download_url(key, expires_in=3600, filename=None):
+    """Presigned GET URL for an object, or the local media URL without S3"""
+    if not s3_enabled():
+        return f"{settings.MEDIA_URL}{key}"
+
+    params = {'Bucket': get_bucket(), 'Key': key}
+    if filename:
+        params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
+    return get_s3_client().generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+
+def _download_cache_key(key, filename=None):
+    digest = hashlib.sha1(f'{key}|{filename or ""}'.encode()).hexdigest()
+    return f'presigned_download:{digest}'
+
+
+def _download_cache_timeout():
+    """Serve a cached URL until REFRESH_MARGIN seconds before it expires"""
+    expires_in = getattr(settings, 'PRESIGNED_URL_EXPIRY', 3600)
+    margin = getattr(settings, 'PRESIGNED_URL_REFRESH_MARGIN', 300)
+    return expires_in, max(expires_in - margin, 0)
+
+
+def cached_download_urls(objects):
+    """
+    Presigned GET URLs for many objects, signing only those not cached.
+
+    Args:
+        objects: iterable of (s3_key, filename) pairs
+
+    Returns:
+        dict: {s3_key: url}
+    """
+    objects = [(key, filename) for key, filename in objects if key]
+    if not objects:
+        return {}
+
+    expires_in, timeout = _download_cache_timeout()
+    cache_keys = {_download_cache_key(key, filename): (key, filename) for key, filename in objects}
+    cached = cache.get_many(list(cache_keys)) if timeout else {}
+
+    urls, signed = {}, {}
+    for cache_key, (key, filename) in cache_keys.items():
+        url = cached.get(cache_key)
+        if url is None:
+            url = presigned_download_url(key, expires_in=expires_in, filename=filename)
+            signed[cache_key] = url
+        urls[key] = url
+
+    if signed and timeout and s3_enabled():
+        cache.set_many(signed, timeout)
+    return urls
+
+
+def cached_download_url(key, filename=None):
+    """Presigned GET URL for one object, reused from the cache when still fresh"""
+    return cached_download_urls([(key, filename)])[key]
+
+
+def forget_download_url(key, filename=None):
+    """Drop a cached URL, e.g. when the object is deleted"""
+    cache.delete(_download_cache_key(key, filename))
@@ -0,0 +1,69 @@
+"""Document Celery tasks"""
+from celery import shared_task
+
+
+@shared_task
+def expire_upload_sessions():
+    """Abort upload sessions that were never completed"""
+    from .uploads import expire_sessions
+    return expire_sessions()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_document(self, document_id):
+    """Generate thumbnails / page count / text for a document"""
+    from .models import Document
+    from .processing import process_document as run_pipeline
+
+    try:
+        document = Document.objects.select_related('content').get(pk=document_id)
+    except Document.DoesNotExist:
+        return None
+    try:
+        content = run_pipeline(document)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+    return content.status if content else None
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_claim_document(self, claim_document_id):
+    """Generate thumbnails / page count / text for a claim document"""
+    from apps.claims.models import ClaimDocument
+    from .processing import process_claim_document as run_pipeline
+
+    try:
+        claim_document = ClaimDocument.objects.select_related('content').get(pk=claim_document_id)
+    except ClaimDocument.DoesNotExist:
+        return None
+    try:
+        content = run_pipeline(claim_document)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+    return content.status if content else None
+
+
+@shared_task
+def process_unprocessed_documents(limit=1000):
+    """Queue processing for documents that have never been processed (backfill)"""
+    from apps.claims.models import ClaimDocument
+    from .models import Document
+
+    queued = 0
+    for document_id in Document.objects.filter(content__isnull=True).values_list('pk', flat=True)[:limit]:
+        process_document.delay(str(document_id))
+        queued += 1
+    claim_documents = ClaimDocument.objects.filter(content__isnull=True).exclude(s3_key='')
+    for claim_document_id in claim_documents.values_list('pk', flat=True)[:limit]:
+        process_claim_document.delay(str(claim_document_id))
+        queued += 1
+    return queued
+
+
+@shared_task
+def collect_unreferenced_blobs():
+    """Recount blob references and delete blobs no longer referenced"""
+    from .blobs import collect_unreferenced_blobs as collect, reconcile_ref_counts
+
+    reconcile_ref_counts()
+    return collect()
@@ -0,0 +1,497 @@
+"""
+Upload Sessions
+Presigned multipart uploads straight to S3, so large files (accident photo
+sets, videos) never pass through the application servers. Without S3 the
+same flow runs against a local chunk endpoint that writes parts under
+MEDIA_ROOT, so clients can be developed against one API.
+
+S3 multipart uploads use SHA-256 part checksums: each part PUT carries an
+x-amz-checksum-sha256 header that S3 checks against the bytes, and
+completion uses the checksums S3 recorded rather than anything the client
+reports, so completing never reads the object back. A declared whole-file
+SHA-256 is checked by the processing task, which hashes the object anyway
+(see reject_mismatched_upload).
+
+Completion talks to S3 outside any database transaction: the session is
+moved to 'completing' under a short row lock, the upload is verified and
+completed, and the record is created in a second transaction. If that
+fails, the stored object is deleted rather than orphaned.
+"""
+
+import hashlib
+import math
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction as db_transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .blobs import attach, reusable_content
+from .models import Document, UploadSession
+from .processing import schedule_processing
+from .storage import delete_object, get_bucket, get_s3_client, object_url, s3_enabled
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# S3 requires every part except the last to be at least 5 MB
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+
+DOCUMENT_MIME_TYPES = {
+    'application/pdf', 'image/jpeg', 'image/png', 'image/heic', 'image/webp',
+}
+CLAIM_EVIDENCE_MIME_TYPES = DOCUMENT_MIME_TYPES | {
+    'video/mp4', 'video/quicktime',
+}
+
+
+class UploadError(Exception):
+    """Raised when an upload session cannot be started or completed"""
+
+
+class IncompleteUploadError(UploadError):
+    """Completion was requested before every part arrived; the session stays open"""
+
+
+def upload_policy(target):
+    """(allowed mime types, max bytes) for an upload target"""
+    if target == 'claim_document':
+        return (
+            CLAIM_EVIDENCE_MIME_TYPES,
+            getattr(settings, 'CLAIM_EVIDENCE_UPLOAD_MAX_BYTES', 200 * MB),
+        )
+    return DOCUMENT_MIME_TYPES, getattr(settings, 'DOCUMENT_UPLOAD_MAX_BYTES', 20 * MB)
+
+
+def _safe_filename(filename):
+    name = os.path.basename(filename or '').strip() or 'upload'
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name)[:150]
+
+
+def _part_layout(file_size):
+    part_size = max(getattr(settings, 'UPLOAD_PART_SIZE', 8 * MB), MIN_PART_SIZE)
+    part_size = max(part_size, math.ceil(file_size / MAX_PARTS))
+    return part_size, max(1, math.ceil(file_size / part_size))
+
+
+def _local_part_dir(session):
+    return os.path.join(settings.MEDIA_ROOT, 'upload-sessions', str(session.pk))
+
+
+def start_session(user, target, filename, mime_type, file_size, checksum_sha256='', metadata=None):
+    """
+    Create an upload session after checking the type and size policy.
+    On S3 this also opens the multipart upload.
+
+    When the user already holds a file with the declared checksum and size,
+    the session completes immediately against the stored blob and no parts
+    need to be uploaded.
+    """
+    allowed_types, max_bytes = upload_policy(target)
+    if mime_type not in allowed_types:
+        raise UploadError(f'File type {mime_type} is not allowed')
+    if file_size <= 0 or file_size > max_bytes:
+        raise UploadError(f'File size must be between 1 byte and {max_bytes // MB} MB')
+
+    part_size, part_count = _part_layout(file_size)
+    session = UploadSession(
+        user=user,
+        target=target,
+        backend='s3' if s3_enabled() else 'local',
+        filename=_safe_filename(filename),
+        mime_type=mime_type,
+        file_size=file_size,
+        checksum_sha256=(checksum_sha256 or '').lower(),
+        part_size=part_size,
+        part_count=part_count,
+        metadata=metadata or {},
+        expires_at=timezone.now() + timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 6 * 3600)),
+    )
+    prefix = f"claims/{metadata['claim']}" if target == 'claim_document' else f"documents/{user.pk}"
+    session.s3_key = f"{prefix}/{session.pk}/{session.filename}"
+
+    reusable = reusable_content(user, session.checksum_sha256, file_size)
+    if reusable is not None:
+        with db_transaction.atomic():
+            session.status = 'completed'
+            session.completed_at = timezone.now()
+            session.part_count = 0
+            session.save()
+            _create_record(session, key=reusable.storage_key, content=reusable)
+            attach(reusable)
+            session.save(update_fields=['document', 'claim_document'])
+        return session
+
+    if session.backend == 's3':
+        response = get_s3_client().create_multipart_upload(
+            Bucket=get_bucket(),
+            Key=session.s3_key,
+            ContentType=mime_type,
+            ServerSideEncryption='AES256',
+            ChecksumAlgorithm='SHA256',
+            Metadata={'upload-session': str(session.pk)},
+        )
+        session.s3_upload_id = response['UploadId']
+
+    session.save()
+    return session
+
+
+def part_urls(session, request=None):
+    """
+    Upload URL for every part. S3 URLs are presigned PUTs valid until the
+    session expires (the PUT must send the part's base64 SHA-256 as
+    x-amz-checksum-sha256); local URLs point at the chunk endpoint.
+    """
+    urls = []
+    if session.status != 'pending':
+        return urls
+    for part_number in range(1, session.part_count + 1):
+        if session.backend == 's3':
+            expires_in = max(int((session.expires_at - timezone.now()).total_seconds()), 60)
+            url = get_s3_client().generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': get_bucket(),
+                    'Key': session.s3_key,
+                    'UploadId': session.s3_upload_id,
+                    'PartNumber': part_number,
+                    'ChecksumAlgorithm': 'SHA256',
+                },
+                ExpiresIn=expires_in,
+            )
+        else:
+            path = reverse(
+                'upload-session-upload-part', kwargs={'pk': session.pk, 'part_number': part_number}
+            )
+            url = request.build_absolute_uri(path) if request else path
+        urls.append({'part_number': part_number, 'url': url})
+    return urls
+
+
+def _expected_part_size(session, part_number):
+    if part_number < session.part_count:
+        return session.part_size
+    return session.file_size - session.part_size * (session.part_count - 1)
+
+
+def save_local_part(session, part_number, stream):
+    """
+    Development stand-in for S3 UploadPart: stores the raw request body.
+
+    Returns:
+        str: ETag (MD5 hex of the part), as S3 would return
+    """
+    if session.backend != 'local':
+        raise UploadError('Parts for this session must be uploaded to S3')
+    if session.status != 'pending' or session.expires_at < timezone.now():
+        raise UploadError('Upload session is no longer open')
+    if not 1 <= part_number <= session.part_count:
+        raise UploadError('Invalid part number')
+
+    expected = _expected_part_size(session, part_number)
+    part_dir = _local_part_dir(session)
+    os.makedirs(part_dir, exist_ok=True)
+
+    md5 = hashlib.md5()
+    written = 0
+    path = os.path.join(part_dir, f'{part_number:05d}.part')
+    with open(path, 'wb') as target:
+        while True:
+            chunk = stream.read(MB)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > expected:
+                target.close()
+                os.remove(path)
+                raise UploadError(f'Part {part_number} exceeds {expected} bytes')
+            md5.update(chunk)
+            target.write(chunk)
+    return md5.hexdigest()
+
+
+def _normalise_parts(session, parts):
+    """Validate the client's part list: every part exactly once, in order"""
+    normalised = sorted(
+        (
+            {
+                'part_number': int(part['part_number']),
+                'etag': str(part['etag']).strip('"'),
+                'checksum_sha256': part.get('checksum_sha256') or '',
+            }
+            for part in parts
+        ),
+        key=lambda part: part['part_number']
+    )
+    if [part['part_number'] for part in normalised] != list(range(1, session.part_count + 1)):
+        raise UploadError(f'Expected parts 1..{session.part_count}')
+    return normalised
+
+
+def _verify_s3_parts(session, parts):
+    """
+    Check every part against what S3 recorded and complete the upload with
+    S3's own ETags and checksums. Only metadata is read back.
+    """
+    client = get_s3_client()
+    uploaded = {}
+    kwargs = {'Bucket': get_bucket(), 'Key': session.s3_key, 'UploadId': session.s3_upload_id}
+    while True:
+        response = client.list_parts(**kwargs)
+        for part in response.get('Parts', []):
+            uploaded[part['PartNumber']] = part
+        if not response.get('IsTruncated'):
+            break
+        kwargs['PartNumberMarker'] = response['NextPartNumberMarker']
+
+    total = 0
+    for part in parts:
+        stored = uploaded.get(part['part_number'])
+        if stored is None:
+            raise IncompleteUploadError(f"Part {part['part_number']} was not uploaded")
+        if not stored.get('ChecksumSHA256'):
+            raise UploadError(f"Part {part['part_number']} was uploaded without a SHA-256 checksum")
+        if part['checksum_sha256'] and stored['ChecksumSHA256'] != part['checksum_sha256']:
+            raise UploadError(f"Checksum mismatch on part {part['part_number']}")
+        if _expected_part_size(session, part['part_number']) != stored['Size']:
+            raise UploadError(f"Part {part['part_number']} has the wrong size")
+        total += stored['Size']
+    if total != session.file_size:
+        raise UploadError(f'Uploaded {total} bytes, expected {session.file_size}')
+
+    client.complete_multipart_upload(
+        Bucket=get_bucket(),
+        Key=session.s3_key,
+        UploadId=session.s3_upload_id,
+        MultipartUpload={'Parts': [
+            {
+                'PartNumber': part['part_number'],
+                'ETag': uploaded[part['part_number']]['ETag'],
+                'ChecksumSHA256': uploaded[part['part_number']]['ChecksumSHA256'],
+            }
+            for part in parts
+        ]},
+    )
+    head = client.head_object(Bucket=get_bucket(), Key=session.s3_key)
+    if head['ContentLength'] != session.file_size:
+        client.delete_object(Bucket=get_bucket(), Key=session.s3_key)
+        raise UploadError('Stored object size does not match the declared size')
+
+
+def _assemble_local_parts(session, parts):
+    """Verify part MD5s, concatenate into default storage and check the SHA-256"""
+    part_dir = _local_part_dir(session)
+    sha256 = hashlib.sha256()
+    total = 0
+
+    with tempfile.TemporaryFile() as assembled:
+        for part in parts:
+            path = os.path.join(part_dir, f"{part['part_number']:05d}.part")
+            if not os.path.exists(path):
+                raise IncompleteUploadError(f"Part {part['part_number']} was not uploaded")
+            md5 = hashlib.md5()
+            with open(path, 'rb') as source:
+                while True:
+                    chunk = source.read(MB)
+                    if not chunk:
+                        break
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                    assembled.write(chunk)
+                    total += len(chunk)
+            if md5.hexdigest() != part['etag']:
+                raise UploadError(f"Checksum mismatch on part {part['part_number']}")
+
+        if total != session.file_size:
+            raise UploadError(f'Uploaded {total} bytes, expected {session.file_size}')
+        if session.checksum_sha256 and sha256.hexdigest() != session.checksum_sha256:
+            raise UploadError('File checksum does not match')
+
+        assembled.seek(0)
+        default_storage.save(session.s3_key, File(assembled, name=session.filename))
+
+    shutil.rmtree(part_dir, ignore_errors=True)
+
+
+def _create_record(session, request=None, key=None, content=None):
+    """Create the Document / ClaimDocument for a session, stored at key (default: the session key)"""
+    key = key or session.s3_key
+    metadata = session.metadata
+    if session.target == 'document':
+        session.document = Document.objects.create(
+            user=session.user,
+            policy_id=metadata.get('policy'),
+            type=metadata.get('type', 'other'),
+            title=metadata.get('title') or session.filename,
+            filename=session.filename,
+            s3_key=key,
+            file_size=session.file_size,
+            mime_type=session.mime_type,
+            content=content,
+        )
+    else:
+        from apps.claims.models import ClaimDocument
+        session.claim_document = ClaimDocument.objects.create(
+            claim_id=metadata['claim'],
+            document_type=metadata.get('document_type', 'other'),
+            title=metadata.get('title') or session.filename,
+            file_url=object_url(key, request),
+            s3_key=key,
+            file_size=session.file_size,
+            mime_type=session.mime_type,
+            uploaded_by=session.user,
+            content=content,
+        )
+
+
+def complete_session(session, parts, request=None):
+    """
+    Verify the uploaded parts and create the Document / ClaimDocument.
+
+    Args:
+        parts: [{'part_number': int, 'etag': str, 'checksum_sha256': str}] as
+            returned by each part PUT (the checksum is base64, S3 only)
+
+    Raises:
+        UploadError: a malformed part list can be resubmitted; a failed
+        verification marks the session failed and discards the upload
+    """
+    try:
+        normalised = _normalise_parts(session, parts)
+    except (KeyError, ValueError, TypeError):
+        raise UploadError('Invalid part list')
+
+    # Claim the session; the lock is only held for this status change
+    with db_transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'completed':
+            return session
+        if session.status == 'completing':
+            raise UploadError('Upload session is already being completed')
+        if session.status != 'pending':
+            raise UploadError(f'Upload session is {session.status}')
+        expired = session.expires_at < timezone.now()
+        if not expired:
+            session.status = 'completing'
+            session.save(update_fields=['status'])
+
+    if expired:
+        abort_session(session, status='expired')
+        raise UploadError('Upload session has expired')
+
+    try:
+        if session.backend == 's3':
+            _verify_s3_parts(session, normalised)
+        else:
+            _assemble_local_parts(session, normalised)
+    except IncompleteUploadError:
+        UploadSession.objects.filter(pk=session.pk).update(status='pending')
+        raise
+    except UploadError as e:
+        _discard(session)
+        UploadSession.objects.filter(pk=session.pk).update(status='failed', failure_reason=str(e))
+        raise
+
+    try:
+        with db_transaction.atomic():
+            _create_record(session, request)
+            schedule_processing(session.document or session.claim_document)
+            session.status = 'completed'
+            session.completed_at = timezone.now()
+            session.save(update_fields=['status', 'completed_at', 'document', 'claim_document'])
+    except Exception as e:
+        _delete_stored(session)
+        UploadSession.objects.filter(pk=session.pk).update(status='failed', failure_reason=str(e)[:1000])
+        raise
+    return session
+
+
+def reject_mismatched_upload(record, key, content_hash):
+    """
+    Check a freshly processed record against the whole-file SHA-256 its
+    upload session declared. On a mismatch the session is marked failed and
+    the record and its object are removed.
+
+    Returns:
+        bool: True if the record was rejected
+    """
+    session = (
+        UploadSession.objects.filter(s3_key=key, status='completed')
+        .exclude(checksum_sha256='').exclude(checksum_sha256=content_hash)
+        .first()
+    )
+    if session is None:
+        return False
+    logger.warning(f"Upload session {session.pk}: file checksum does not match, discarding")
+    with db_transaction.atomic():
+        UploadSession.objects.filter(pk=session.pk).update(
+            status='failed', failure_reason='File checksum does not match'
+        )
+        record.delete()
+        db_transaction.on_commit(lambda: _delete_stored(session))
+    return True
+
+
+def _delete_stored(session):
+    """Drop the completed object of a session whose record could not be kept"""
+    try:
+        delete_object(session.s3_key)
+    except Exception as e:
+        logger.error(f"Failed to delete object {session.s3_key}: {str(e)}")
+
+
+def _discard(session):
+    """Drop anything uploaded so far"""
+    if session.backend == 's3':
+        try:
+            get_s3_client().abort_multipart_upload(
+                Bucket=get_bucket(), Key=session.s3_key, UploadId=session.s3_upload_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {session.pk}: {str(e)}")
+    else:
+        shutil.rmtree(_local_part_dir(session), ignore_errors=True)
+
+
+def abort_session(session, status='aborted'):
+    if session.status != 'pending':
+        return session
+    _discard(session)
+    session.status = status
+    session.save(update_fields=['status'])
+    return session
+
+
+def expire_sessions():
+    """
+    Abort pending sessions past their expiry, and sessions whose worker died
+    mid-completion (run periodically)
+    """
+    now = timezone.now()
+    expired = 0
+    stale = UploadSession.objects.filter(status='pending', expires_at__lt=now)
+    for session in stale.iterator(chunk_size=200):
+        abort_session(session, status='expired')
+        expired += 1
+
+    stuck = UploadSession.objects.filter(status='completing', expires_at__lt=now - timedelta(hours=1))
+    for session in stuck.iterator(chunk_size=200):
+        _discard(session)
+        _delete_stored(session)
+        UploadSession.objects.filter(pk=session.pk, status='completing').update(
+            status='failed', failure_reason='Completion did not finish'
+        )
+        expired += 1
+    return expired
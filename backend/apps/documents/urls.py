@@ -4,6 +4,8 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
+# Registered before the document routes so 'uploads' is not taken as a document id
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload-session')
 router.register(r'', views.DocumentViewSet, basename='document')
 
 urlpatterns = [
@@ -1,11 +1,30 @@
 """Documents Views"""
-from rest_framework import viewsets, status, filters
+from rest_framework import mixins, viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction as db_transaction
+from django.db.models import Q
 from django.utils import timezone
-from .models import Document
-from .serializers import DocumentSerializer, DocumentUploadSerializer
+from .blobs import release
+from .models import Document, DocumentContent, UploadSession
+from .serializers import (
+    DocumentSerializer,
+    DocumentUploadSerializer,
+    UploadSessionCreateSerializer,
+    UploadSessionSerializer,
+    UploadCompleteSerializer
+)
+from .storage import cached_download_url, cached_download_urls, forget_download_url
+from .uploads import (
+    UploadError, IncompleteUploadError, abort_session, complete_session,
+    part_urls, save_local_part, start_session
+)
+
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
@@ -18,7 +37,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'filename', 'type']
+    search_fields = ['title', 'filename', 'type', 'content__text']
     ordering_fields = ['uploaded_at', 'title']
     ordering = ['-uploaded_at']
 
@@ -30,13 +49,20 @@ class DocumentViewSet(viewsets.ModelViewSet):
         else:
             queryset = Document.objects.filter(user=user)
 
-        return queryset.select_related('user', 'policy', 'verified_by')
+        return queryset.select_related('user', 'policy', 'verified_by', 'content').defer('content__text')
 
     def get_serializer_class(self):
         if self.action == 'create':
             return DocumentUploadSerializer
         return DocumentSerializer
 
+    def perform_destroy(self, instance):
+        with db_transaction.atomic():
+            release(instance)
+            instance.delete()
+        if not instance.content_id:
+            forget_download_url(instance.s3_key)
+
     @action(detail=True, methods=['post'])
     def verify(self, request, pk=None):
         """Verify a document (admin only)"""
@@ -57,28 +83,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Get download URL for document"""
-        from django.conf import settings as django_settings
         document = self.get_object()
 
         try:
-            import boto3
-            s3_client = boto3.client(
-                's3',
-                region_name=getattr(django_settings, 'AWS_S3_REGION_NAME', 'us-east-1'),
-                aws_access_key_id=getattr(django_settings, 'AWS_ACCESS_KEY_ID', None),
-                aws_secret_access_key=getattr(django_settings, 'AWS_SECRET_ACCESS_KEY', None),
-            )
-            download_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': django_settings.AWS_STORAGE_BUCKET_NAME,
-                    'Key': document.s3_key,
-                },
-                ExpiresIn=3600,
-            )
-        except Exception:
-            # Fallback for local dev (no S3 configured)
-            download_url = f"/media/{document.s3_key}"
+            download_url = cached_download_url(document.s3_key)
+        except Exception as e:
+            logger.error(f"Failed to sign download for document {document.pk}: {str(e)}")
+            return Response({'error': 'Download is temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
         return Response({
             'download_url': download_url,
@@ -86,6 +97,72 @@ class DocumentViewSet(viewsets.ModelViewSet):
             'mime_type': document.mime_type
         })
 
+    @action(detail=True, methods=['get'])
+    def text(self, request, pk=None):
+        """Text extracted from the document (PDFs only)"""
+        document = self.get_object()
+        content = DocumentContent.objects.filter(content_hash=document.content_id).only('status', 'page_count', 'text').first()
+        if content is None:
+            return Response({'status': 'pending', 'page_count': None, 'text': ''})
+        return Response({'status': content.status, 'page_count': content.page_count, 'text': content.text})
+
+    @action(detail=False, methods=['get'], url_path='download-urls')
+    def download_urls(self, request):
+        """
+        Download URLs for every document of a policy or claim in one call
+        GET /api/v1/documents/download-urls/?policy_id=... or ?claim_id=...
+        """
+        policy_id = request.query_params.get('policy_id')
+        claim_id = request.query_params.get('claim_id')
+        if not policy_id and not claim_id:
+            return Response({'error': 'policy_id or claim_id required'}, status=400)
+
+        try:
+            if policy_id:
+                records = list(
+                    self.get_queryset().filter(policy_id=policy_id)
+                    .values('id', 'title', 'filename', 's3_key', 'mime_type')
+                )
+            else:
+                records = self._claim_document_records(request, claim_id)
+        except DjangoValidationError:
+            records = None
+        if records is None:
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            urls = cached_download_urls(
+                (record['s3_key'], None) for record in records if record['s3_key']
+            )
+        except Exception as e:
+            logger.error(f"Failed to sign downloads: {str(e)}")
+            return Response({'error': 'Download is temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        results = []
+        for record in records:
+            file_url = record.pop('file_url', None)
+            record['download_url'] = urls.get(record.pop('s3_key')) or file_url
+            results.append(record)
+        return Response({'count': len(results), 'results': results})
+
+    def _claim_document_records(self, request, claim_id):
+        from apps.claims.models import Claim, ClaimDocument
+
+        claims = Claim.objects.all()
+        if request.user.role == 'assessor':
+            # Assessors see evidence for the claims assigned to them (and their own)
+            claims = claims.filter(Q(assessor=request.user) | Q(user=request.user))
+        elif request.user.role not in ['admin', 'staff']:
+            claims = claims.filter(user=request.user)
+        if not claims.filter(pk=claim_id).exists():
+            return None
+
+        return [
+            dict(record, filename=record['title'])
+            for record in ClaimDocument.objects.filter(claim_id=claim_id)
+            .values('id', 'title', 's3_key', 'file_url', 'mime_type')
+        ]
+
     @action(detail=False, methods=['get'])
     def by_policy(self, request):
         """Get documents by policy"""
@@ -96,3 +173,86 @@ class DocumentViewSet(viewsets.ModelViewSet):
         documents = self.get_queryset().filter(policy_id=policy_id)
         serializer = self.get_serializer(documents, many=True)
         return Response(serializer.data)
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Direct-to-storage uploads for documents and claim evidence
+    POST /api/v1/documents/uploads/ - Start a session, returns part upload URLs
+    GET /api/v1/documents/uploads/:id/ - Session status
+    PUT /api/v1/documents/uploads/:id/parts/:n/ - Upload a part (local storage only)
+    POST /api/v1/documents/uploads/:id/complete/ - Verify parts and create the document
+    DELETE /api/v1/documents/uploads/:id/ - Abort the session
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+
+    def create(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            session = start_session(
+                user=request.user,
+                target=data['target'],
+                filename=data['filename'],
+                mime_type=data['mime_type'],
+                file_size=data['file_size'],
+                checksum_sha256=data.get('checksum_sha256', ''),
+                metadata=serializer.session_metadata(),
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = UploadSessionSerializer(session).data
+        response['parts'] = part_urls(session, request)
+        if session.status == 'completed':
+            # Same file already stored for this user: nothing to upload
+            response['record'] = self._record_data(session)
+        return Response(response, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, pk=None):
+        session = self.get_object()
+        abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<part_number>\d+)')
+    def upload_part(self, request, pk=None, part_number=None):
+        """Local stand-in for S3 UploadPart: raw request body is the part"""
+        session = self.get_object()
+        try:
+            etag = save_local_part(session, int(part_number), request.stream)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({'part_number': int(part_number), 'etag': etag})
+        response['ETag'] = f'"{etag}"'
+        return response
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Verify uploaded parts and create the Document / ClaimDocument"""
+        session = self.get_object()
+        serializer = UploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            session = complete_session(session, serializer.validated_data['parts'], request)
+        except IncompleteUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = UploadSessionSerializer(session).data
+        response['record'] = self._record_data(session)
+        return Response(response, status=status.HTTP_200_OK)
+
+    def _record_data(self, session):
+        if session.document_id:
+            return DocumentSerializer(session.document).data
+        from apps.claims.serializers import ClaimDocumentSerializer
+        return ClaimDocumentSerializer(session.claim_document).data
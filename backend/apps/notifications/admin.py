@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification, EmailLog, SMSLog
+from .models import Broadcast, Notification, EmailLog, SMSLog
 
 
 @admin.register(Notification)
@@ -21,6 +21,26 @@ class NotificationAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('title', 'type', 'status', 'sent_count', 'total_recipients', 'created_by', 'created_at')
+    list_filter = ('status', 'type', 'created_at')
+    search_fields = ('title', 'message')
+    readonly_fields = (
+        'status', 'total_recipients', 'opted_out', 'sent_count', 'last_recipient_id',
+        'error_message', 'created_by', 'created_at', 'started_at', 'completed_at'
+    )
+    date_hierarchy = 'created_at'
+
+    fieldsets = (
+        ('Broadcast Details', {'fields': ('type', 'title', 'message', 'action_url', 'segment')}),
+        ('Progress', {'fields': (
+            'status', 'total_recipients', 'opted_out', 'sent_count', 'last_recipient_id', 'error_message'
+        )}),
+        ('Timestamps', {'fields': ('created_by', 'created_at', 'started_at', 'completed_at')}),
+    )
+
+
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
     list_display = ('to_email', 'subject', 'status', 'sent_at', 'created_at')
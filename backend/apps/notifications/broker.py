@@ -0,0 +1,190 @@
+"""
+Notification Pub/Sub
+Fans events out to the SSE connections held by this process. Each process
+keeps a local registry of subscriber queues per channel:
+- InMemoryBroker: publish() delivers straight to the local registry
+  (development, single process)
+- RedisBroker: publish() goes through Redis PUBLISH; each process holds
+  one shared subscription and dispatches to its local queues, so Redis
+  sees one connection per worker rather than one per client
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+
+def _offer(queue, message):
+    """Enqueue without blocking; a slow client loses its oldest events"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(message)
+
+
+class InMemoryBroker:
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        # Channels with an upstream subscription (see _sync_channel)
+        self._active = set()
+        # (loop, channel) -> [asyncio.Lock, users]
+        self._channel_locks = {}
+
+    def publish(self, channel, message):
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                pass  # Loop already closed; the subscription is being torn down
+
+    @asynccontextmanager
+    async def _channel_guard(self, channel):
+        """Serialise upstream subscribe/unsubscribe for one channel"""
+        key = (asyncio.get_running_loop(), channel)
+        with self._lock:
+            guard = self._channel_locks.setdefault(key, [asyncio.Lock(), 0])
+            guard[1] += 1
+        try:
+            async with guard[0]:
+                yield
+        finally:
+            with self._lock:
+                guard[1] -= 1
+                if not guard[1]:
+                    del self._channel_locks[key]
+
+    async def _sync_channel(self, channel):
+        """
+        Bring the upstream subscription in line with the local subscriber set.
+        Runs under the channel guard, so a disconnect's UNSUBSCRIBE can never
+        land after a concurrent connect's SUBSCRIBE.
+        """
+        async with self._channel_guard(channel):
+            with self._lock:
+                wanted = bool(self._subscribers.get(channel))
+                if not wanted:
+                    self._subscribers.pop(channel, None)
+                active = channel in self._active
+            if wanted and not active:
+                await self._on_first_subscriber(channel)
+                with self._lock:
+                    self._active.add(channel)
+            elif active and not wanted:
+                with self._lock:
+                    self._active.discard(channel)
+                await self._on_last_subscriber(channel)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """Async context manager yielding an asyncio.Queue of messages"""
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[channel].add(entry)
+        try:
+            await self._sync_channel(channel)
+            yield entry[1]
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(entry)
+            await self._sync_channel(channel)
+
+    async def _on_first_subscriber(self, channel):
+        pass
+
+    async def _on_last_subscriber(self, channel):
+        pass
+
+
+class RedisBroker(InMemoryBroker):
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._pubsub = None
+        self._reader = None
+
+    def publish(self, channel, message):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(channel, json.dumps(message, default=str))
+
+    async def _ensure_reader(self):
+        if self._pubsub is None:
+            import redis.asyncio as aioredis
+            self._pubsub = aioredis.from_url(self.url).pubsub()
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def _read(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.5)
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self._dispatch(channel, json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification pub/sub reader error: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def _on_first_subscriber(self, channel):
+        await self._ensure_reader()
+        await self._pubsub.subscribe(channel)
+
+    async def _on_last_subscriber(self, channel):
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(channel)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'NOTIFICATION_PUBSUB_URL', '')
+                _broker = RedisBroker(url) if url else InMemoryBroker()
+    return _broker
+
+
+def user_channel(user_id):
+    return f'notifications:user:{user_id}'
+
+
+def publish_to_user(user_id, message):
+    try:
+        get_broker().publish(user_channel(user_id), message)
+    except Exception as e:
+        # Clients resync from Last-Event-ID, so a lost publish is not fatal
+        logger.warning(f"Failed to publish notification event: {str(e)}")
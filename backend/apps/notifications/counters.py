@@ -0,0 +1,107 @@
+"""
+Unread Notification Counters
+Per-user unread counts kept in the shared cache, so polling the unread
+count is a single cache read instead of a COUNT over the notifications
+table.
+
+Counters are adjusted with atomic cache increments after the database
+write commits, and rebuilt from the database on a miss. An increment
+against a missing counter is skipped; the next read rebuilds it. A
+rebuild holds a short "building" marker while it counts: a write that
+commits meanwhile clears the marker (or the fresh counter), so a count
+that may have missed it is never cached. Entries
+expire after NOTIFICATION_UNREAD_COUNT_TTL seconds, which bounds any
+drift from writes that bypass these helpers (raw updates, partition drops).
+Every change is also pushed to the user's notification stream.
+"""
+
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+from .events import publish_notifications, publish_unread_count
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _building_key(user_id):
+    return f'notifications:unread-building:{user_id}'
+
+
+# Outlives any COUNT, so a rebuild never loses its marker mid-count
+BUILDING_MARKER_SECONDS = 30
+
+
+def _ttl():
+    return getattr(settings, 'NOTIFICATION_UNREAD_COUNT_TTL', 3600)
+
+
+def get_unread_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        from .models import Notification
+        token = uuid.uuid4().hex
+        cache.set(_building_key(user_id), token, BUILDING_MARKER_SECONDS)
+        count = Notification.objects.filter(user_id=user_id, read=False).count()
+        # add(): never overwrite a counter another process has just created
+        if cache.add(_key(user_id), count, _ttl()) and cache.get(_building_key(user_id)) != token:
+            # A write committed while counting; the count may not include it
+            cache.delete(_key(user_id))
+        cache.delete(_building_key(user_id))
+    return max(count, 0)
+
+
+def _adjust(user_id, delta):
+    try:
+        value = cache.incr(_key(user_id), delta)
+    except ValueError:
+        # Not cached; rebuilt on the next read. A rebuild counting right
+        # now may have missed this write, so it must not cache its result.
+        cache.delete(_building_key(user_id))
+        return
+    if value < 0 or cache.get(_building_key(user_id)) is not None:
+        cache.delete(_key(user_id))
+        return
+    publish_unread_count(user_id, value)
+
+
+def adjust_unread_counts(deltas):
+    """
+    Apply {user_id: delta} once the current transaction commits.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and delta}
+    if not deltas:
+        return
+
+    def apply():
+        for user_id, delta in deltas.items():
+            _adjust(user_id, delta)
+
+    db_transaction.on_commit(apply)
+
+
+def notifications_created(notifications):
+    """Push new notifications to connected clients and bump their counters"""
+    notifications = list(notifications)
+    db_transaction.on_commit(lambda: publish_notifications(notifications))
+    adjust_unread_counts(Counter(n.user_id for n in notifications if not n.read))
+
+
+def invalidate_unread_count(user_id):
+    invalidate_unread_counts([user_id])
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop many counters in one cache round trip (bulk writes that skip adjust)"""
+    keys = [key for user_id in user_ids for key in (_key(user_id), _building_key(user_id))]
+    if keys:
+        db_transaction.on_commit(lambda: cache.delete_many(keys))
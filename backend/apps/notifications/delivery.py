@@ -0,0 +1,302 @@
+"""
+Email and SMS Delivery
+EmailLog and SMSLog double as an outbox. queue_* writes pending rows
+(no Celery task per message) and a drain task claims them in batches:
+
+- emails in a batch share one connection from EMAIL_BACKEND (SMTP to
+  SendGrid in production); each template is loaded once per batch and
+  identical renders are reused
+- SMS with identical text are sent as one bulk provider call via
+  SMS_BACKEND (Africa's Talking in production), to numbers normalised
+  to E.164 so the provider's per-recipient results match them
+- statuses are written back with one bulk UPDATE per batch
+
+Transient failures stay pending with exponential backoff until
+NOTIFICATION_DELIVERY_MAX_ATTEMPTS; permanent ones are marked failed.
+Claimed rows are leased (next_attempt_at pushed forward), so concurrent
+workers never pick up the same row and a crashed worker's rows are
+retried once the lease runs out.
+"""
+
+import json
+import smtplib
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import EmailLog, SMSLog
+from .sms import SMSSendError, get_sms_backend, normalize_phone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIR = 'notifications/email'
+EMAIL_FIELDS = ['status', 'error_message', 'next_attempt_at', 'sent_at']
+SMS_FIELDS = EMAIL_FIELDS + ['provider_response']
+
+
+# ==================== Queueing ====================
+
+def queue_emails(logs):
+    """Bulk-insert unsaved EmailLog rows and make sure a worker drains them"""
+    logs = EmailLog.objects.bulk_create(logs)
+    if logs:
+        _schedule_drain('email')
+    return logs
+
+
+def queue_email(to_email, subject, template, context=None, user=None):
+    return queue_emails([EmailLog(
+        user=user, to_email=to_email, subject=subject, template=template, context_data=context or {}
+    )])[0]
+
+
+def queue_sms_messages(logs):
+    """Bulk-insert unsaved SMSLog rows and make sure a worker drains them"""
+    logs = SMSLog.objects.bulk_create(logs)
+    if logs:
+        _schedule_drain('sms')
+    return logs
+
+
+def queue_sms(to_phone, message, user=None):
+    return queue_sms_messages([SMSLog(user=user, to_phone=to_phone, message=message)])[0]
+
+
+def _schedule_key(kind):
+    return f'notifications:delivery-scheduled:{kind}'
+
+
+def _schedule_drain(kind):
+    """Start one drain per burst of queued messages, not one per message"""
+    from .tasks import deliver_pending_emails, deliver_pending_sms
+
+    task = deliver_pending_emails if kind == 'email' else deliver_pending_sms
+    delay = getattr(settings, 'NOTIFICATION_DELIVERY_DEBOUNCE_SECONDS', 5)
+
+    def schedule():
+        if cache.add(_schedule_key(kind), 1, delay * 4):
+            task.apply_async(countdown=delay)
+
+    db_transaction.on_commit(schedule)
+
+
+# ==================== Claiming / results ====================
+
+def _claim(model, batch_size):
+    """Lease up to batch_size due rows to this worker"""
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'NOTIFICATION_DELIVERY_LEASE_SECONDS', 300))
+    with db_transaction.atomic():
+        rows = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if rows:
+            model.objects.filter(pk__in=[row.pk for row in rows]).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + lease,
+            )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'NOTIFICATION_DELIVERY_RETRY_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 3600))
+
+
+def _mark_sent(row, now):
+    row.status = 'sent'
+    row.sent_at = now
+    row.error_message = None
+
+
+def _mark_failed(row, error, retryable, now):
+    row.error_message = str(error)[:1000] or 'Delivery failed'
+    if retryable and row.attempts < getattr(settings, 'NOTIFICATION_DELIVERY_MAX_ATTEMPTS', 5):
+        row.next_attempt_at = now + _retry_delay(row.attempts)
+    else:
+        row.status = 'failed'
+
+
+# ==================== Email ====================
+
+class EmailRenderer:
+    """Per-batch template and render cache"""
+
+    def __init__(self):
+        self.templates = {}
+        self.rendered = {}
+
+    def _template(self, name, extension, required=True):
+        key = (name, extension)
+        if key not in self.templates:
+            try:
+                self.templates[key] = get_template(f'{EMAIL_TEMPLATE_DIR}/{name}.{extension}')
+            except TemplateDoesNotExist:
+                if required:
+                    raise
+                self.templates[key] = None
+        return self.templates[key]
+
+    def render(self, row):
+        """(text, html or None) for a log row"""
+        context = dict(row.context_data or {}, subject=row.subject)
+        key = (row.template, json.dumps(context, sort_keys=True, default=str))
+        if key not in self.rendered:
+            text = self._template(row.template, 'txt').render(context)
+            html_template = self._template(row.template, 'html', required=False)
+            self.rendered[key] = (text, html_template.render(context) if html_template else None)
+        return self.rendered[key]
+
+    def message(self, row, connection):
+        text, html = self.render(row)
+        message = EmailMultiAlternatives(
+            subject=row.subject,
+            body=text,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[row.to_email],
+            connection=connection,
+        )
+        if html:
+            message.attach_alternative(html, 'text/html')
+        return message
+
+
+def _smtp_retryable(exc):
+    """4xx replies and connection problems are transient; 5xx replies are not"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code < 500 for code, _ in exc.recipients.values())
+    code = getattr(exc, 'smtp_code', None)
+    if isinstance(code, int):
+        return code < 500
+    return True
+
+
+def deliver_email_batch(rows):
+    """Send claimed EmailLog rows over one connection and record the results"""
+    now = timezone.now()
+    renderer = EmailRenderer()
+    connection = get_connection(fail_silently=False)
+
+    outgoing = []
+    for row in rows:
+        try:
+            outgoing.append((row, renderer.message(row, connection)))
+        except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+            _mark_failed(row, f'Template error: {exc}', retryable=False, now=now)
+
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning(f"Email connection failed, retrying {len(outgoing)} email(s) later: {exc}")
+        for row, _ in outgoing:
+            _mark_failed(row, exc, retryable=True, now=now)
+        outgoing = []
+
+    try:
+        for index, (row, message) in enumerate(outgoing):
+            try:
+                connection.send_messages([message])
+                _mark_sent(row, timezone.now())
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as exc:
+                # Reconnect once; if that fails too, the rest of the batch waits for a retry
+                try:
+                    connection.close()
+                    connection.open()
+                    connection.send_messages([message])
+                    _mark_sent(row, timezone.now())
+                except Exception:
+                    for pending_row, _ in outgoing[index:]:
+                        _mark_failed(pending_row, exc, retryable=True, now=now)
+                    break
+            except Exception as exc:
+                _mark_failed(row, exc, retryable=_smtp_retryable(exc), now=now)
+    finally:
+        connection.close()
+
+    EmailLog.objects.bulk_update(rows, EMAIL_FIELDS)
+    return sum(1 for row in rows if row.status == 'sent')
+
+
+# ==================== SMS ====================
+
+def deliver_sms_batch(rows):
+    """Send claimed SMSLog rows, one provider call per distinct message text"""
+    now = timezone.now()
+    phones = {}
+    by_message = defaultdict(list)
+    for row in rows:
+        phones[row.pk] = normalize_phone(row.to_phone)
+        if phones[row.pk] is None:
+            _mark_failed(row, f'Invalid phone number: {row.to_phone}', retryable=False, now=now)
+        else:
+            by_message[row.message].append(row)
+    max_recipients = getattr(settings, 'SMS_BULK_MAX_RECIPIENTS', 1000)
+
+    with get_sms_backend() as backend:
+        for message, group in by_message.items():
+            for start in range(0, len(group), max_recipients):
+                chunk = group[start:start + max_recipients]
+                recipients = list(dict.fromkeys(phones[row.pk] for row in chunk))
+                try:
+                    results = backend.send_bulk(message, recipients)
+                except SMSSendError as exc:
+                    logger.warning(f"SMS bulk send to {len(recipients)} recipient(s) failed: {exc}")
+                    for row in chunk:
+                        _mark_failed(row, exc, retryable=True, now=now)
+                    continue
+                for row in chunk:
+                    result = results[phones[row.pk]]
+                    row.provider_response = result.response
+                    if result.sent:
+                        _mark_sent(row, now)
+                    else:
+                        _mark_failed(row, result.error, retryable=result.retryable, now=now)
+
+    SMSLog.objects.bulk_update(rows, SMS_FIELDS)
+    return sum(1 for row in rows if row.status == 'sent')
+
+
+# ==================== Draining ====================
+
+def _drain(kind, model, deliver):
+    cache.delete(_schedule_key(kind))
+    batch_size = getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_SIZE', 200)
+    deadline = time.monotonic() + getattr(settings, 'NOTIFICATION_DELIVERY_TIME_BUDGET', 50)
+
+    claimed = sent = 0
+    while time.monotonic() < deadline:
+        rows = _claim(model, batch_size)
+        if not rows:
+            break
+        claimed += len(rows)
+        sent += deliver(rows)
+    else:
+        # Out of time with work left: hand over to a fresh task
+        _schedule_drain(kind)
+
+    if claimed:
+        logger.info(f"Delivered {sent}/{claimed} {kind} message(s)")
+    return sent
+
+
+def drain_emails():
+    return _drain('email', EmailLog, deliver_email_batch)
+
+
+def drain_sms():
+    return _drain('sms', SMSLog, deliver_sms_batch)
@@ -0,0 +1,291 @@
+"""
+Notification Digests
+Coalesces outbound notifications per user and channel. notify_many()
+drops channels the user has opted out of, then buffers each event as a
+PendingNotification for the channel's window (NOTIFICATION_DIGEST_WINDOWS).
+When the oldest event for a (user, channel) is due, everything buffered
+for it is merged into one notification, email or SMS.
+
+Merging follows TYPE_RULES: events are listed by digest group, and
+repeats of one type collapse into a single counted line. A busy account
+that sees payment_received then policy_issued within the window gets one
+in-app notification, one email and one SMS instead of two of each.
+Urgent types skip the buffer.
+"""
+
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction as db_transaction
+from django.utils import timezone
+
+from .delivery import queue_emails, queue_sms_messages
+from .models import EmailLog, Notification, PendingNotification, SMSLog
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ['in_app', 'email', 'sms']
+
+DEFAULT_WINDOWS = {'in_app': 60, 'email': 300, 'sms': 300}
+
+# Digest groups in the order they are listed in a merged message
+GROUPS = ['payments', 'policy', 'claims', 'documents', 'system']
+
+# type -> (digest group, NotificationPreference category or None if always sent)
+TYPE_RULES = {
+    'payment_received': ('payments', 'payment_reminders'),
+    'payment_due': ('payments', 'payment_reminders'),
+    'payment_overdue': ('payments', 'payment_reminders'),
+    'policy_issued': ('policy', 'policy_updates'),
+    'policy_renewed': ('policy', 'policy_updates'),
+    'policy_expiring_soon': ('policy', 'policy_updates'),
+    'claim_submitted': ('claims', 'claim_updates'),
+    'claim_status_update': ('claims', 'claim_updates'),
+    'claim_approved': ('claims', 'claim_updates'),
+    'claim_rejected': ('claims', 'claim_updates'),
+    'claim_settled': ('claims', 'claim_updates'),
+    'document_uploaded': ('documents', 'policy_updates'),
+    'document_verified': ('documents', 'policy_updates'),
+    'system_message': ('system', None),
+}
+
+# Sent as soon as they are raised, never held for a digest
+URGENT_TYPES = {'payment_overdue'}
+
+SMS_MAX_LENGTH = 320
+
+
+# ==================== Preferences ====================
+
+def _preferences(user_ids):
+    """{user_id: {flag: bool}}, with model defaults for users without a preference row"""
+    from apps.users.models import NotificationPreference
+
+    flags = [
+        field.name for field in NotificationPreference._meta.get_fields()
+        if isinstance(field, models.BooleanField)
+    ]
+    defaults = {flag: NotificationPreference._meta.get_field(flag).default for flag in flags}
+    preferences = {user_id: defaults for user_id in user_ids}
+    for row in NotificationPreference.objects.filter(user_id__in=user_ids).values('user_id', *flags):
+        preferences[row.pop('user_id')] = row
+    return preferences
+
+
+def channel_allowed(preference, channel, notification_type):
+    if channel == 'in_app':
+        return preference.get('in_app_enabled', True)
+    category = TYPE_RULES.get(notification_type, ('system', None))[1]
+    if category is None:
+        return True
+    return preference.get(f'{channel}_{category}', True)
+
+
+# ==================== Buffering ====================
+
+def _windows():
+    return dict(DEFAULT_WINDOWS, **getattr(settings, 'NOTIFICATION_DIGEST_WINDOWS', {}))
+
+
+def notify_many(notifications, channels=None):
+    """
+    Buffer notifications for digesting, respecting each user's preferences.
+
+    Args:
+        notifications: iterable of dicts with user_id, type, title, message
+            and optionally action_url
+        channels: channels to send on (default: all)
+
+    Returns:
+        int: Buffered or sent (user, channel) events
+    """
+    notifications = [dict(item, user_id=uuid.UUID(str(item['user_id']))) for item in notifications]
+    if not notifications:
+        return 0
+    channels = channels or CHANNELS
+    preferences = _preferences({item['user_id'] for item in notifications})
+    windows = _windows()
+    now = timezone.now()
+
+    buffered, immediate = [], defaultdict(list)
+    for item in notifications:
+        for channel in channels:
+            if not channel_allowed(preferences[item['user_id']], channel, item['type']):
+                continue
+            event = PendingNotification(
+                user_id=item['user_id'],
+                channel=channel,
+                type=item['type'],
+                title=item['title'],
+                message=item['message'],
+                action_url=item.get('action_url', ''),
+                due_at=now + timedelta(seconds=windows.get(channel, 0)),
+            )
+            if item['type'] in URGENT_TYPES or not windows.get(channel):
+                immediate[channel].append(event)
+            else:
+                buffered.append(event)
+
+    PendingNotification.objects.bulk_create(buffered)
+    for channel, events in immediate.items():
+        _deliver(channel, _by_user(events))
+    return len(buffered) + sum(len(events) for events in immediate.values())
+
+
+def notify(user_id, type, title, message, action_url='', channels=None):
+    return notify_many(
+        [{'user_id': user_id, 'type': type, 'title': title, 'message': message, 'action_url': action_url}],
+        channels=channels
+    )
+
+
+# ==================== Merging ====================
+
+def _by_user(events):
+    grouped = defaultdict(list)
+    for event in events:
+        grouped[event.user_id].append(event)
+    return grouped
+
+
+def merge(events):
+    """
+    Merge one user's buffered events for a channel.
+
+    Returns:
+        dict: type, title, message, action_url, count, items (for templates)
+    """
+    if len(events) == 1:
+        event = events[0]
+        return {
+            'type': event.type,
+            'title': event.title,
+            'message': event.message,
+            'action_url': event.action_url,
+            'count': 1,
+            'items': [{'title': event.title, 'message': event.message}],
+        }
+
+    type_counts = Counter(event.type for event in events)
+    labels = dict(Notification.TYPE_CHOICES)
+    ordered = sorted(events, key=lambda event: (
+        GROUPS.index(TYPE_RULES.get(event.type, ('system', None))[0]), event.created_at or timezone.now()
+    ))
+
+    items, seen_types = [], set()
+    for event in ordered:
+        count = type_counts[event.type]
+        if count == 1:
+            items.append({'title': event.title, 'message': event.message})
+        elif event.type not in seen_types:
+            items.append({'title': f"{labels.get(event.type, event.type)} ({count})", 'message': event.message})
+        seen_types.add(event.type)
+
+    action_urls = {event.action_url for event in events}
+    return {
+        'type': events[0].type if len(type_counts) == 1 else 'system_message',
+        'title': f"{len(events)} updates on your account",
+        'message': '\n'.join(f"- {item['title']}" for item in items),
+        'action_url': action_urls.pop() if len(action_urls) == 1 else '/dashboard',
+        'count': len(events),
+        'items': items,
+    }
+
+
+def _sms_text(digest):
+    if digest['count'] == 1:
+        text = digest['message']
+    else:
+        text = f"{digest['title']}: " + '; '.join(item['title'] for item in digest['items'])
+    return text if len(text) <= SMS_MAX_LENGTH else text[:SMS_MAX_LENGTH - 3] + '...'
+
+
+def _deliver(channel, events_by_user):
+    """Write one notification / queued message per user"""
+    from apps.users.models import User
+
+    digests = {user_id: merge(events) for user_id, events in events_by_user.items()}
+    if not digests:
+        return 0
+
+    if channel == 'in_app':
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                type=digest['type'],
+                title=digest['title'][:200],
+                message=digest['message'],
+                action_url=digest['action_url'],
+            )
+            for user_id, digest in digests.items()
+        ])
+        return len(digests)
+
+    users = User.objects.filter(pk__in=list(digests), is_active=True).values('id', 'email', 'phone', 'first_name')
+    if channel == 'email':
+        queue_emails([
+            EmailLog(
+                user_id=user['id'],
+                to_email=user['email'],
+                subject=digests[user['id']]['title'][:255],
+                template='generic' if digests[user['id']]['count'] == 1 else 'digest',
+                context_data=dict(digests[user['id']], first_name=user['first_name']),
+            )
+            for user in users if user['email']
+        ])
+    elif channel == 'sms':
+        queue_sms_messages([
+            SMSLog(user_id=user['id'], to_phone=user['phone'], message=_sms_text(digests[user['id']]))
+            for user in users if user['phone']
+        ])
+    return len(digests)
+
+
+# ==================== Flushing ====================
+
+def flush_due_digests():
+    """
+    Merge and send every (user, channel) whose oldest buffered event is due.
+
+    Returns:
+        dict: {channel: digests sent}
+    """
+    batch_size = getattr(settings, 'NOTIFICATION_DIGEST_BATCH_SIZE', 500)
+    totals = {}
+    for channel in CHANNELS:
+        totals[channel] = 0
+        while True:
+            sent = _flush_batch(channel, batch_size)
+            if sent is None:
+                break
+            totals[channel] += sent
+
+    if any(totals.values()):
+        logger.info(f"Flushed notification digests: {totals}")
+    return totals
+
+
+def _flush_batch(channel, batch_size):
+    now = timezone.now()
+    with db_transaction.atomic():
+        user_ids = list(
+            PendingNotification.objects.filter(channel=channel, due_at__lte=now)
+            .order_by().values_list('user_id', flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return None
+        # skip_locked: a concurrent flush takes other users rather than waiting
+        events = list(
+            PendingNotification.objects.select_for_update(skip_locked=True)
+            .filter(channel=channel, user_id__in=user_ids)
+            .order_by('created_at')
+        )
+        if not events:
+            return None
+        sent = _deliver(channel, _by_user(events))
+        PendingNotification.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return sent
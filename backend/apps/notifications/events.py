@@ -0,0 +1,77 @@
+"""
+Notification Events
+Server-Sent Events payloads for the notification stream. A notification's
+event id is its (created_at in microseconds, id) pair, so a reconnecting
+client's Last-Event-ID tells the server which rows to replay from the
+table, including rows that share a timestamp.
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from .broker import publish_to_user
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def event_id(notification):
+    # Integer arithmetic: a float timestamp can be off by a microsecond
+    delta = notification.created_at - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f'{micros}-{notification.id}'
+
+
+def parse_event_id(value):
+    """
+    (created_at, id) encoded by event_id(), or None for a malformed id.
+    An id from before ids carried the row id parses as (created_at, None).
+    """
+    micros, _, notification_id = str(value).partition('-')
+    try:
+        created_at = EPOCH + timedelta(microseconds=int(micros))
+        return created_at, uuid.UUID(notification_id) if notification_id else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def notification_message(notification):
+    return {
+        'event': 'notification',
+        'id': event_id(notification),
+        'data': {
+            'id': str(notification.id),
+            'type': notification.type,
+            'title': notification.title,
+            'message': notification.message,
+            'action_url': notification.action_url,
+            'created_at': notification.created_at.isoformat(),
+        },
+    }
+
+
+def unread_count_message(count):
+    return {'event': 'unread_count', 'data': {'count': count}}
+
+
+def resync_message():
+    """Tells the client its replay was cut short and to reload the list"""
+    return {'event': 'resync', 'data': {'reason': 'replay_limit'}}
+
+
+def format_sse(message):
+    lines = []
+    if message.get('id'):
+        lines.append(f"id: {message['id']}")
+    lines.append(f"event: {message['event']}")
+    lines.append(f"data: {json.dumps(message['data'], default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def publish_notifications(notifications):
+    for notification in notifications:
+        publish_to_user(notification.user_id, notification_message(notification))
+
+
+def publish_unread_count(user_id, count):
+    publish_to_user(user_id, unread_count_message(count))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def partition_notifications(apps, schema_editor):
+    from bowman_insurance.partitioning import convert_to_partitioned
+    convert_to_partitioned('notifications', schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # Not atomic: notifications stays readable and writable while its rows are copied
+    # in batches into the partitioned table; only the final rename swap takes an
+    # exclusive lock. If interrupted, the original table is untouched and
+    # re-running the migration starts the copy over.
+    atomic = False
+
+    dependencies = [
+        ('notifications', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_notifications, migrations.RunPython.noop),
+    ]
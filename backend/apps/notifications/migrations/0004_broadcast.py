@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:57
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_partition_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('policy_issued', 'Policy Issued'), ('payment_received', 'Payment Received'), ('payment_due', 'Payment Due'), ('payment_overdue', 'Payment Overdue'), ('claim_submitted', 'Claim Submitted'), ('claim_status_update', 'Claim Status Update'), ('claim_approved', 'Claim Approved'), ('claim_rejected', 'Claim Rejected'), ('claim_settled', 'Claim Settled'), ('policy_expiring_soon', 'Policy Expiring Soon'), ('policy_renewed', 'Policy Renewed'), ('document_uploaded', 'Document Uploaded'), ('document_verified', 'Document Verified'), ('system_message', 'System Message')], default='system_message', max_length=50)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('action_url', models.CharField(blank=True, max_length=500)),
+                ('segment', models.JSONField(default=dict, help_text='Recipient filters, see apps.notifications.broadcasts')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('total_recipients', models.PositiveIntegerField(default=0)),
+                ('opted_out', models.PositiveIntegerField(default=0, help_text='Segment members excluded by their preferences')),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('last_recipient_id', models.UUIDField(blank=True, help_text='Resume point (recipients are sent in id order)', null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notification_broadcasts',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:59
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_broadcast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up for delivery before this time'),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up for delivery before this time'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='email_log_outbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='sms_log_outbox_idx'),
+        ),
+    ]
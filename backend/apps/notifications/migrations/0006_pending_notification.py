@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_delivery_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('channel', models.CharField(choices=[('in_app', 'In-app'), ('email', 'Email'), ('sms', 'SMS')], max_length=10)),
+                ('type', models.CharField(choices=[('policy_issued', 'Policy Issued'), ('payment_received', 'Payment Received'), ('payment_due', 'Payment Due'), ('payment_overdue', 'Payment Overdue'), ('claim_submitted', 'Claim Submitted'), ('claim_status_update', 'Claim Status Update'), ('claim_approved', 'Claim Approved'), ('claim_rejected', 'Claim Rejected'), ('claim_settled', 'Claim Settled'), ('policy_expiring_soon', 'Policy Expiring Soon'), ('policy_renewed', 'Policy Renewed'), ('document_uploaded', 'Document Uploaded'), ('document_verified', 'Document Verified'), ('system_message', 'System Message')], max_length=50)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('action_url', models.CharField(blank=True, max_length=500)),
+                ('due_at', models.DateTimeField(help_text='End of the coalescing window for this event')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'pending_notifications',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['channel', 'due_at'], name='pending_not_channel_e196b7_idx'), models.Index(fields=['channel', 'user'], name='pending_not_channel_2cc90c_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,23 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+
+class NotificationManager(models.Manager):
+    """Keeps the cached unread counters in step with inserts, single or bulk"""
+
+    def create(self, **kwargs):
+        notification = super().create(**kwargs)
+        from .counters import notifications_created
+        notifications_created([notification])
+        return notification
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        from .counters import notifications_created
+        notifications_created(objs)
+        return objs
 
 
 class Notification(models.Model):
@@ -33,6 +50,8 @@ class Notification(models.Model):
     read_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    objects = NotificationManager()
+
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
@@ -46,11 +65,94 @@ class Notification(models.Model):
 
     def mark_as_read(self):
         """Mark notification as read"""
-        from django.utils import timezone
         if not self.read:
+            from .counters import adjust_unread_counts
+            # Conditional update: concurrent requests decrement the counter once
+            updated = Notification.objects.filter(pk=self.pk, read=False).update(
+                read=True, read_at=timezone.now()
+            )
             self.read = True
-            self.read_at = timezone.now()
-            self.save(update_fields=['read', 'read_at'])
+            if updated:
+                adjust_unread_counts({self.user_id: -1})
+
+
+class PendingNotification(models.Model):
+    """Outbound notification buffered for a short window, then merged into a per-user digest"""
+
+    CHANNEL_CHOICES = [
+        ('in_app', 'In-app'),
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pending_notifications')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    type = models.CharField(max_length=50, choices=Notification.TYPE_CHOICES)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    action_url = models.CharField(max_length=500, blank=True)
+    due_at = models.DateTimeField(help_text='End of the coalescing window for this event')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'pending_notifications'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['channel', 'due_at']),
+            models.Index(fields=['channel', 'user']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel}: {self.title} ({self.user_id})"
+
+
+class Broadcast(models.Model):
+    """In-app notification sent to every user in a segment"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    type = models.CharField(max_length=50, choices=Notification.TYPE_CHOICES, default='system_message')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    action_url = models.CharField(max_length=500, blank=True)
+    segment = models.JSONField(default=dict, help_text='Recipient filters, see apps.notifications.broadcasts')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+
+    # Progress
+    total_recipients = models.PositiveIntegerField(default=0)
+    opted_out = models.PositiveIntegerField(default=0, help_text='Segment members excluded by their preferences')
+    sent_count = models.PositiveIntegerField(default=0)
+    last_recipient_id = models.UUIDField(null=True, blank=True, help_text='Resume point (recipients are sent in id order)')
+    error_message = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notification_broadcasts'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of recipients sent"""
+        if not self.total_recipients:
+            return 100.0 if self.status == 'completed' else 0.0
+        return round(100.0 * self.sent_count / self.total_recipients, 1)
 
 
 class EmailLog(models.Model):
@@ -70,12 +172,21 @@ class EmailLog(models.Model):
     context_data = models.JSONField(default=dict)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
     error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text='Not picked up for delivery before this time')
     sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'email_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='email_log_outbox_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"Email to {self.to_email} - {self.subject}"
@@ -97,12 +208,21 @@ class SMSLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
     provider_response = models.JSONField(default=dict, blank=True)
     error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text='Not picked up for delivery before this time')
     sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'sms_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='sms_log_outbox_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"SMS to {self.to_phone}"
@@ -1,6 +1,7 @@
 """Serializers for Notifications App"""
 from rest_framework import serializers
-from .models import Notification, EmailLog, SMSLog
+from .broadcasts import SegmentError, segment_users
+from .models import Broadcast, Notification, EmailLog, SMSLog
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -15,6 +16,40 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at', 'read_at']
 
 
+def validate_segment_definition(value):
+    try:
+        segment_users(value)
+    except SegmentError as exc:
+        raise serializers.ValidationError(str(exc))
+    return value
+
+
+class SegmentSerializer(serializers.Serializer):
+    """A recipient segment definition (see apps.notifications.broadcasts)"""
+    segment = serializers.JSONField(validators=[validate_segment_definition])
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    """Serializer for broadcasts, including send progress"""
+    progress = serializers.FloatField(read_only=True)
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True, allow_null=True)
+
+    class Meta:
+        model = Broadcast
+        fields = [
+            'id', 'type', 'title', 'message', 'action_url', 'segment', 'status',
+            'total_recipients', 'opted_out', 'sent_count', 'progress', 'error_message',
+            'created_by', 'created_by_name', 'created_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'total_recipients', 'opted_out', 'sent_count', 'error_message',
+            'created_by', 'created_at', 'started_at', 'completed_at'
+        ]
+
+    def validate_segment(self, value):
+        return validate_segment_definition(value)
+
+
 class EmailLogSerializer(serializers.ModelSerializer):
     """Serializer for email logs"""
 
@@ -0,0 +1,171 @@
+"""
+SMS Backends
+Pluggable SMS senders, selected with the SMS_BACKEND setting in the same
+way EMAIL_BACKEND selects a mail backend. A backend instance is opened
+once per delivery batch, so its HTTP connection is reused across sends.
+
+send_bulk() sends one message to many recipients in a single provider
+call and reports a result per phone number. Numbers are normalised to
+E.164 (normalize_phone) before sending, because providers echo them back
+in that form and results are matched on it.
+"""
+
+import logging
+import re
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_phone(phone):
+    """
+    E.164 form (+2547XXXXXXXX) of a stored phone number, or None if it is
+    not a usable number. Local numbers take SMS_DEFAULT_COUNTRY_CODE.
+    """
+    country_code = getattr(settings, 'SMS_DEFAULT_COUNTRY_CODE', '254')
+    phone = re.sub(r'[\s\-().]', '', phone or '')
+    if phone.startswith('+'):
+        digits = phone[1:]
+    elif phone.startswith('00'):
+        digits = phone[2:]
+    elif phone.startswith('0'):
+        digits = country_code + phone[1:]
+    elif phone.startswith(country_code):
+        digits = phone
+    else:
+        digits = country_code + phone
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        return None
+    return f'+{digits}'
+
+
+class SMSResult:
+    """Outcome for one recipient of a bulk send"""
+
+    def __init__(self, phone, sent, retryable=False, error='', response=None):
+        self.phone = phone
+        self.sent = sent
+        self.retryable = retryable
+        self.error = error
+        self.response = response or {}
+
+
+class SMSSendError(Exception):
+    """The whole provider call failed (nothing was sent); safe to retry"""
+
+
+class BaseSMSBackend:
+
+    def __init__(self, **kwargs):
+        pass
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send_bulk(self, message, phones):
+        """
+        Args:
+            phones: E.164 numbers (see normalize_phone)
+
+        Returns:
+            dict: {phone: SMSResult}
+        """
+        raise NotImplementedError
+
+
+class ConsoleBackend(BaseSMSBackend):
+    """Logs messages instead of sending them (development)"""
+
+    def send_bulk(self, message, phones):
+        logger.info(f"SMS to {len(phones)} recipient(s): {message}")
+        return {phone: SMSResult(phone, sent=True, response={'status': 'Logged'}) for phone in phones}
+
+
+class AfricasTalkingBackend(BaseSMSBackend):
+    """
+    Africa's Talking bulk messaging API: one request carries every
+    recipient of an identical message.
+    """
+
+    # Per-recipient status codes: 100 Processed, 101 Sent, 102 Queued
+    SUCCESS_CODES = {100, 101, 102}
+    # 405 InsufficientBalance, 500 InternalServerError, 501 GatewayError, 502 RejectedByGateway
+    RETRYABLE_CODES = {405, 500, 501, 502}
+
+    def __init__(self, **kwargs):
+        self.username = getattr(settings, 'AFRICASTALKING_USERNAME', None)
+        self.api_key = getattr(settings, 'AFRICASTALKING_API_KEY', None)
+        self.sender_id = getattr(settings, 'AFRICASTALKING_SENDER_ID', None)
+        self.url = getattr(
+            settings, 'AFRICASTALKING_API_URL', 'https://api.africastalking.com/version1/messaging'
+        )
+        self.timeout = getattr(settings, 'SMS_REQUEST_TIMEOUT', 30)
+        self.session = None
+
+    def open(self):
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+            self.session.headers.update({'apiKey': self.api_key or '', 'Accept': 'application/json'})
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def send_bulk(self, message, phones):
+        import requests
+
+        self.open()
+        data = {'username': self.username, 'to': ','.join(phones), 'message': message}
+        if self.sender_id:
+            data['from'] = self.sender_id
+        try:
+            response = self.session.post(self.url, data=data, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise SMSSendError(str(exc)) from exc
+        if response.status_code >= 500:
+            raise SMSSendError(f"Africa's Talking returned {response.status_code}")
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        message_data = payload.get('SMSMessageData') or {}
+        if response.status_code >= 400 or 'Recipients' not in message_data:
+            error = message_data.get('Message') or response.text[:500]
+            return {phone: SMSResult(phone, sent=False, error=error, response=payload) for phone in phones}
+
+        results = {}
+        for recipient in message_data['Recipients']:
+            code = recipient.get('statusCode')
+            phone = normalize_phone(recipient.get('number')) or recipient.get('number')
+            results[phone] = SMSResult(
+                phone,
+                sent=code in self.SUCCESS_CODES,
+                retryable=code in self.RETRYABLE_CODES,
+                error='' if code in self.SUCCESS_CODES else recipient.get('status', ''),
+                response=recipient,
+            )
+        # Numbers the provider did not echo back were not sent
+        for phone in phones:
+            if phone not in results:
+                results[phone] = SMSResult(phone, sent=False, error='No delivery report', response={})
+        return results
+
+
+def get_sms_backend(**kwargs):
+    backend = getattr(settings, 'SMS_BACKEND', 'apps.notifications.sms.AfricasTalkingBackend')
+    return import_string(backend)(**kwargs)
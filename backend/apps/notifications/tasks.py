@@ -4,11 +4,70 @@ from celery import shared_task
 
 @shared_task
 def send_email_notification(user_id, template, context):
-    # TODO Phase 10: SendGrid integration
-    pass
+    """Queue an email to a user (bulk senders should call delivery.queue_emails)"""
+    from apps.users.models import User
+    from .delivery import queue_email
+
+    user = User.objects.filter(pk=user_id).only('email').first()
+    if user is None:
+        return None
+    context = context or {}
+    subject = context.get('subject') or template.replace('_', ' ').capitalize()
+    return str(queue_email(user.email, subject, template, context, user=user).pk)
 
 
 @shared_task
 def send_sms_notification(user_id, message):
-    # TODO Phase 10: Africa's Talking integration
-    pass
+    """Queue an SMS to a user (bulk senders should call delivery.queue_sms_messages)"""
+    from apps.users.models import User
+    from .delivery import queue_sms
+
+    user = User.objects.filter(pk=user_id).only('phone').first()
+    if user is None or not user.phone:
+        return None
+    return str(queue_sms(user.phone, message, user=user).pk)
+
+
+@shared_task
+def deliver_pending_emails():
+    """Send queued emails in batches over a shared connection"""
+    from .delivery import drain_emails
+    return drain_emails()
+
+
+@shared_task
+def deliver_pending_sms():
+    """Send queued SMS, batching identical messages into bulk sends"""
+    from .delivery import drain_sms
+    return drain_sms()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_broadcast(self, broadcast_id):
+    """Fan a broadcast out to its segment (resumes where a failed run stopped)"""
+    from .broadcasts import run_broadcast
+    from .models import Broadcast
+
+    try:
+        return run_broadcast(broadcast_id)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            Broadcast.objects.filter(pk=broadcast_id, status='running').update(
+                status='failed', error_message=str(exc)[:1000]
+            )
+            raise
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def flush_notification_digests():
+    """Merge and send buffered notifications whose coalescing window has closed"""
+    from .digest import flush_due_digests
+    return flush_due_digests()
+
+
+@shared_task
+def cleanup_old_notifications():
+    """Create upcoming monthly partitions and drop notifications past retention"""
+    from bowman_insurance.partitioning import maintain_table
+    return maintain_table('notifications')
@@ -0,0 +1,383 @@
+"""
+Notification Delivery Tests
+Batched email and SMS delivery against a local fake SMTP server and a stub
+Africa's Talking endpoint, both listening on 127.0.0.1 for the test run.
+"""
+
+import json
+import socketserver
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .delivery import _claim, deliver_email_batch, deliver_sms_batch
+from .models import EmailLog, SMSLog
+
+
+# ==================== Fake SMTP server ====================
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib; replies to DATA per recipient from server.replies"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake.smtp ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-fake.smtp')
+                self.reply('250 8BITMIME')
+            elif verb in ('HELO', 'MAIL', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip().strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                rejection = next((server.replies[r] for r in recipients if r in server.replies), None)
+                if rejection:
+                    self.reply(rejection)
+                else:
+                    with server.lock:
+                        server.delivered.extend(recipients)
+                    self.reply('250 Queued')
+                recipients = []
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.delivered = []
+        self.replies = {}
+
+
+# ==================== Stub Africa's Talking endpoint ====================
+
+class StubAfricasTalkingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        form = {key: values[0] for key, values in parse_qs(body).items()}
+        server.requests.append({'api_key': self.headers.get('apiKey'), **form})
+
+        if server.status_code >= 400:
+            payload = {'SMSMessageData': {'Message': 'Rejected by stub'}}
+        else:
+            recipients = []
+            for phone in form['to'].split(','):
+                code, status = server.codes.get(phone, (101, 'Success'))
+                recipients.append({'number': phone, 'statusCode': code, 'status': status, 'cost': 'KES 0.8000'})
+            payload = {'SMSMessageData': {'Message': f'Sent to {len(recipients)}', 'Recipients': recipients}}
+
+        content = json.dumps(payload).encode()
+        self.send_response(server.status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubAfricasTalkingServer(HTTPServer):
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubAfricasTalkingHandler)
+        self.reset()
+
+    def reset(self):
+        self.requests = []
+        self.status_code = 201
+        self.codes = {}
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def _updates(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+
+# ==================== Email ====================
+
+class EmailDeliveryTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = FakeSMTPServer()
+        _serve(cls.smtp)
+        cls.settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=cls.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.reset()
+
+    def queue(self, *addresses):
+        EmailLog.objects.bulk_create([
+            EmailLog(
+                to_email=address, subject='Policy update', template='generic',
+                context_data={'title': 'Policy update', 'message': 'Your policy was renewed'},
+            )
+            for address in addresses
+        ])
+        return _claim(EmailLog, 50)
+
+    def test_batch_shares_one_connection(self):
+        rows = self.queue('a@example.com', 'b@example.com', 'c@example.com')
+
+        self.assertEqual(deliver_email_batch(rows), 3)
+
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertCountEqual(self.smtp.delivered, ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(EmailLog.objects.filter(status='sent', sent_at__isnull=False).count(), 3)
+
+    def test_4xx_retries_and_5xx_fails(self):
+        self.smtp.replies = {
+            'busy@example.com': '451 Try again later',
+            'gone@example.com': '550 Mailbox unavailable',
+        }
+        rows = self.queue('ok@example.com', 'busy@example.com', 'gone@example.com')
+        before = timezone.now()
+
+        self.assertEqual(deliver_email_batch(rows), 1)
+
+        self.assertEqual(self.smtp.connections, 1)
+        logs = {log.to_email: log for log in EmailLog.objects.all()}
+        self.assertEqual(logs['ok@example.com'].status, 'sent')
+
+        busy = logs['busy@example.com']
+        self.assertEqual(busy.status, 'pending')
+        self.assertEqual(busy.attempts, 1)
+        self.assertIn('451', busy.error_message)
+        self.assertGreaterEqual(busy.next_attempt_at, before + timedelta(seconds=59))
+
+        gone = logs['gone@example.com']
+        self.assertEqual(gone.status, 'failed')
+        self.assertIn('550', gone.error_message)
+
+    @override_settings(NOTIFICATION_DELIVERY_MAX_ATTEMPTS=1)
+    def test_4xx_fails_after_max_attempts(self):
+        self.smtp.replies = {'busy@example.com': '451 Try again later'}
+        rows = self.queue('busy@example.com')
+
+        deliver_email_batch(rows)
+
+        self.assertEqual(EmailLog.objects.get().status, 'failed')
+
+    def test_statuses_written_in_one_update(self):
+        self.smtp.replies = {'gone@example.com': '550 Mailbox unavailable'}
+        rows = self.queue('a@example.com', 'b@example.com', 'gone@example.com')
+
+        with CaptureQueriesContext(connection) as queries:
+            deliver_email_batch(rows)
+
+        self.assertEqual(len(_updates(queries.captured_queries)), 1)
+        self.assertEqual(EmailLog.objects.filter(status='sent').count(), 2)
+        self.assertEqual(EmailLog.objects.filter(status='failed').count(), 1)
+
+
+# ==================== SMS ====================
+
+class SMSDeliveryTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gateway = StubAfricasTalkingServer()
+        _serve(cls.gateway)
+        cls.settings_override = override_settings(
+            SMS_BACKEND='apps.notifications.sms.AfricasTalkingBackend',
+            AFRICASTALKING_API_URL=f'http://127.0.0.1:{cls.gateway.server_address[1]}/version1/messaging',
+            AFRICASTALKING_USERNAME='sandbox',
+            AFRICASTALKING_API_KEY='test-key',
+            AFRICASTALKING_SENDER_ID='BOWMAN',
+            SMS_REQUEST_TIMEOUT=5,
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.gateway.shutdown()
+        cls.gateway.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.gateway.reset()
+
+    def queue(self, *messages):
+        """messages: (phone, text) pairs"""
+        SMSLog.objects.bulk_create([SMSLog(to_phone=phone, message=text) for phone, text in messages])
+        return _claim(SMSLog, 50)
+
+    def test_identical_messages_share_one_request(self):
+        rows = self.queue(
+            ('+254700000001', 'Payment received'),
+            ('+254700000002', 'Payment received'),
+            ('+254700000003', 'Payment received'),
+            ('+254700000004', 'Policy issued'),
+            ('+254700000005', 'Policy issued'),
+        )
+
+        self.assertEqual(deliver_sms_batch(rows), 5)
+
+        self.assertEqual(len(self.gateway.requests), 2)
+        by_message = {request['message']: request for request in self.gateway.requests}
+        self.assertCountEqual(
+            by_message['Payment received']['to'].split(','),
+            ['+254700000001', '+254700000002', '+254700000003'],
+        )
+        self.assertCountEqual(by_message['Policy issued']['to'].split(','), ['+254700000004', '+254700000005'])
+        for request in self.gateway.requests:
+            self.assertEqual(request['api_key'], 'test-key')
+            self.assertEqual(request['username'], 'sandbox')
+            self.assertEqual(request['from'], 'BOWMAN')
+
+        log = SMSLog.objects.get(to_phone='+254700000001')
+        self.assertEqual(log.status, 'sent')
+        self.assertEqual(log.provider_response['statusCode'], 101)
+
+    @override_settings(SMS_BULK_MAX_RECIPIENTS=2)
+    def test_bulk_requests_respect_max_recipients(self):
+        rows = self.queue(*[(f'+25470000000{i}', 'Payment received') for i in range(1, 6)])
+
+        deliver_sms_batch(rows)
+
+        self.assertEqual([len(request['to'].split(',')) for request in self.gateway.requests], [2, 2, 1])
+        self.assertEqual(SMSLog.objects.filter(status='sent').count(), 5)
+
+    def test_local_numbers_are_sent_and_matched_in_e164(self):
+        rows = self.queue(
+            ('0700000001', 'Payment received'),
+            ('+254 700 000 002', 'Payment received'),
+            ('not-a-number', 'Payment received'),
+        )
+
+        self.assertEqual(deliver_sms_batch(rows), 2)
+
+        self.assertEqual(self.gateway.requests[0]['to'].split(','), ['+254700000001', '+254700000002'])
+        logs = {log.to_phone: log for log in SMSLog.objects.all()}
+        self.assertEqual(logs['0700000001'].status, 'sent')
+        self.assertEqual(logs['+254 700 000 002'].status, 'sent')
+        self.assertEqual(logs['not-a-number'].status, 'failed')
+        self.assertIn('Invalid phone number', logs['not-a-number'].error_message)
+
+    def test_recipient_codes_split_retry_and_failure(self):
+        self.gateway.codes = {
+            '+254700000002': (405, 'InsufficientBalance'),
+            '+254700000003': (403, 'InvalidPhoneNumber'),
+        }
+        rows = self.queue(
+            ('+254700000001', 'Payment received'),
+            ('+254700000002', 'Payment received'),
+            ('+254700000003', 'Payment received'),
+        )
+        before = timezone.now()
+
+        self.assertEqual(deliver_sms_batch(rows), 1)
+
+        self.assertEqual(len(self.gateway.requests), 1)
+        logs = {log.to_phone: log for log in SMSLog.objects.all()}
+        self.assertEqual(logs['+254700000001'].status, 'sent')
+
+        retried = logs['+254700000002']
+        self.assertEqual(retried.status, 'pending')
+        self.assertEqual(retried.error_message, 'InsufficientBalance')
+        self.assertGreaterEqual(retried.next_attempt_at, before + timedelta(seconds=59))
+
+        failed = logs['+254700000003']
+        self.assertEqual(failed.status, 'failed')
+        self.assertEqual(failed.provider_response['statusCode'], 403)
+
+    def test_http_5xx_retries_whole_request(self):
+        self.gateway.status_code = 503
+        rows = self.queue(('+254700000001', 'Payment received'), ('+254700000002', 'Payment received'))
+        before = timezone.now()
+
+        self.assertEqual(deliver_sms_batch(rows), 0)
+
+        for log in SMSLog.objects.all():
+            self.assertEqual(log.status, 'pending')
+            self.assertIn('503', log.error_message)
+            self.assertGreaterEqual(log.next_attempt_at, before + timedelta(seconds=59))
+
+    def test_http_4xx_fails_whole_request(self):
+        self.gateway.status_code = 401
+        rows = self.queue(('+254700000001', 'Payment received'), ('+254700000002', 'Payment received'))
+
+        self.assertEqual(deliver_sms_batch(rows), 0)
+
+        for log in SMSLog.objects.all():
+            self.assertEqual(log.status, 'failed')
+            self.assertEqual(log.error_message, 'Rejected by stub')
+
+    def test_statuses_written_in_one_update(self):
+        self.gateway.codes = {'+254700000003': (403, 'InvalidPhoneNumber')}
+        rows = self.queue(
+            ('+254700000001', 'Payment received'),
+            ('+254700000002', 'Policy issued'),
+            ('+254700000003', 'Policy issued'),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            deliver_sms_batch(rows)
+
+        self.assertEqual(len(_updates(queries.captured_queries)), 1)
+        self.assertEqual(SMSLog.objects.filter(status='sent').count(), 2)
+        self.assertEqual(SMSLog.objects.filter(status='failed').count(), 1)
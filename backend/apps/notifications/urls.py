@@ -4,8 +4,11 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
+router.register(r'broadcasts', views.BroadcastViewSet, basename='broadcast')
 router.register(r'', views.NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('stream/', views.notification_stream, name='notification-stream'),
+    path('stream/ticket/', views.StreamTicketView.as_view(), name='notification-stream-ticket'),
     path('', include(router.urls)),
 ]
@@ -1,11 +1,27 @@
 """Notifications Views"""
-from rest_framework import viewsets, status
+import asyncio
+import secrets
+
+from asgiref.sync import sync_to_async
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from .models import Notification
-from .serializers import NotificationSerializer
+from .models import Broadcast, Notification
+from .serializers import BroadcastSerializer, NotificationSerializer, SegmentSerializer
+from .broadcasts import count_segment
+from .broker import get_broker, user_channel
+from .counters import adjust_unread_counts, get_unread_count
+from .events import format_sse, notification_message, parse_event_id, resync_message, unread_count_message
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -24,6 +40,17 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.read:
+            adjust_unread_counts({instance.user_id: -1})
+
+    def perform_update(self, serializer):
+        was_read = serializer.instance.read
+        notification = serializer.save()
+        if notification.read != was_read:
+            adjust_unread_counts({notification.user_id: -1 if notification.read else 1})
+
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get unread notifications"""
@@ -34,8 +61,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get unread notification count"""
-        count = self.get_queryset().filter(read=False).count()
-        return Response({'count': count})
+        return Response({'count': get_unread_count(request.user.pk)})
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -47,8 +73,168 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().filter(read=False).update(
+        updated = self.get_queryset().filter(read=False).update(
             read=True,
             read_at=timezone.now()
         )
+        adjust_unread_counts({request.user.pk: -updated})
         return Response({'message': 'All notifications marked as read'})
+
+
+class IsAdmin(IsAuthenticated):
+    """Only admin and staff users send broadcasts"""
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and request.user.role in ['admin', 'staff']
+
+
+class BroadcastViewSet(mixins.CreateModelMixin,
+                       mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Notification broadcasts to a user segment
+    POST /api/v1/notifications/broadcasts/ - Create and start sending
+    POST /api/v1/notifications/broadcasts/preview/ - Count a segment's recipients
+    GET /api/v1/notifications/broadcasts/:id/ - Send progress
+    POST /api/v1/notifications/broadcasts/:id/cancel/ - Stop sending
+    """
+    queryset = Broadcast.objects.select_related('created_by')
+    serializer_class = BroadcastSerializer
+    permission_classes = [IsAdmin]
+    ordering = ['-created_at']
+
+    def perform_create(self, serializer):
+        from .tasks import send_broadcast
+        broadcast = serializer.save(created_by=self.request.user)
+        db_transaction.on_commit(lambda: send_broadcast.delay(str(broadcast.pk)))
+
+    @action(detail=False, methods=['post'])
+    def preview(self, request):
+        """Recipients a segment would reach, and how many opted out"""
+        serializer = SegmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipients, opted_out = count_segment(serializer.validated_data['segment'])
+        return Response({'recipients': recipients, 'opted_out': opted_out})
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Stop a pending or running broadcast; notifications already sent remain"""
+        broadcast = self.get_object()
+        cancelled = Broadcast.objects.filter(pk=broadcast.pk, status__in=['pending', 'running']).update(
+            status='cancelled',
+            completed_at=timezone.now()
+        )
+        if not cancelled:
+            return Response(
+                {'error': f'Broadcast is already {broadcast.status}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        broadcast.refresh_from_db()
+        return Response(self.get_serializer(broadcast).data)
+
+
+class StreamTicketView(APIView):
+    """
+    Issue a one-time ticket for the notification stream
+    POST /api/v1/notifications/stream/ticket/
+
+    EventSource cannot send an Authorization header, so the stream is
+    opened with a short-lived ticket instead of the JWT. The stream URL
+    points at the ASGI events service (NOTIFICATION_STREAM_BASE_URL); with
+    no base URL it is relative and the proxy must route it there.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ticket = secrets.token_urlsafe(32)
+        ttl = getattr(settings, 'NOTIFICATION_STREAM_TICKET_TTL', 60)
+        cache.set(f'notifications:stream-ticket:{ticket}', str(request.user.pk), ttl)
+        return Response({
+            'ticket': ticket,
+            'expires_in': ttl,
+            'stream_url': f"{settings.NOTIFICATION_STREAM_BASE_URL.rstrip('/')}"
+                          f"{reverse('notification-stream')}?ticket={ticket}",
+        }, status=status.HTTP_201_CREATED)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of new notifications and unread counts
+    GET /api/v1/notifications/stream/?ticket=...
+
+    Sends the Last-Event-ID header (or ?last_event_id=) on reconnect to
+    replay notifications created while disconnected; if more were missed
+    than NOTIFICATION_STREAM_REPLAY_LIMIT, a 'resync' event tells the client
+    to reload the list instead. Serve from an ASGI
+    worker; each connection is closed after NOTIFICATION_STREAM_MAX_SECONDS
+    and the client reconnects with its last event id.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the whole connection
+        return JsonResponse({'error': 'The notification stream is served by the events service'}, status=503)
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    ticket = request.GET.get('ticket', '')
+    ticket_key = f'notifications:stream-ticket:{ticket}'
+    user_id = await cache.aget(ticket_key) if ticket else None
+    if not user_id:
+        return JsonResponse({'error': 'Invalid or expired stream ticket'}, status=401)
+    await cache.adelete(ticket_key)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(
+        _stream_events(user_id, parse_event_id(last_event_id) if last_event_id else None),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    # Keeps GZipMiddleware from buffering the stream
+    response['Content-Encoding'] = 'identity'
+    return response
+
+
+def _missed_notifications(user_id, since):
+    """(notifications after the (created_at, id) cursor, whether more were left out)"""
+    limit = getattr(settings, 'NOTIFICATION_STREAM_REPLAY_LIMIT', 100)
+    created_at, notification_id = since
+    after = Q(created_at__gt=created_at)
+    if notification_id is not None:
+        after |= Q(created_at=created_at, id__gt=notification_id)
+    missed = list(
+        Notification.objects.filter(after, user_id=user_id)
+        .order_by('created_at', 'id')[:limit + 1]
+    )
+    return missed[:limit], len(missed) > limit
+
+
+async def _stream_events(user_id, since):
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+    max_seconds = getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 300)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+
+    yield 'retry: 3000\n\n'
+    # Subscribe before replaying so nothing created in between is missed
+    async with get_broker().subscribe(user_channel(user_id)) as queue:
+        replayed = set()
+        if since is not None:
+            missed, truncated = await sync_to_async(_missed_notifications)(user_id, since)
+            for notification in missed:
+                replayed.add(str(notification.id))
+                yield format_sse(notification_message(notification))
+            if truncated:
+                yield format_sse(resync_message())
+
+        count = await sync_to_async(get_unread_count)(user_id)
+        yield format_sse(unread_count_message(count))
+
+        while loop.time() < deadline:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message.get('event') == 'notification' and message['data']['id'] in replayed:
+                continue
+            yield format_sse(message)
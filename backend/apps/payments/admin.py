@@ -1,5 +1,15 @@
 from django.contrib import admin
-from .models import Transaction, PaymentSchedule, Refund
+from .models import (
+    Transaction, GatewayReference, PaymentSchedule, Refund,
+    ReconciliationReport, ReconciliationMismatch
+)
+
+
+class GatewayReferenceInline(admin.TabularInline):
+    model = GatewayReference
+    extra = 0
+    readonly_fields = ('gateway', 'external_id', 'created_at')
+    can_delete = False
 
 
 @admin.register(Transaction)
@@ -15,6 +25,7 @@ class TransactionAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('transaction_number', 'created_at', 'updated_at', 'completed_at')
     date_hierarchy = 'created_at'
+    inlines = [GatewayReferenceInline]
 
     fieldsets = (
         (None, {'fields': ('transaction_number', 'user', 'policy')}),
@@ -28,6 +39,17 @@ class TransactionAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'policy', 'policy__policy_type')
 
 
+@admin.register(GatewayReference)
+class GatewayReferenceAdmin(admin.ModelAdmin):
+    list_display = ('external_id', 'gateway', 'transaction', 'created_at')
+    list_filter = ('gateway', 'created_at')
+    search_fields = ('external_id', 'transaction__transaction_number')
+    readonly_fields = ('created_at',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('transaction')
+
+
 @admin.register(PaymentSchedule)
 class PaymentScheduleAdmin(admin.ModelAdmin):
     list_display = ('policy', 'installment_number', 'amount', 'due_date', 'status', 'created_at')
@@ -71,3 +93,31 @@ class RefundAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'transaction', 'transaction__user', 'transaction__policy', 'processed_by'
         )
+
+
+@admin.register(ReconciliationReport)
+class ReconciliationReportAdmin(admin.ModelAdmin):
+    list_display = (
+        'gateway', 'from_date', 'to_date', 'status', 'remote_count',
+        'matched_count', 'mismatch_count', 'started_at', 'finished_at'
+    )
+    list_filter = ('gateway', 'status', 'started_at')
+    readonly_fields = (
+        'last_page', 'remote_count', 'matched_count', 'mismatch_count',
+        'error_message', 'started_at', 'updated_at', 'finished_at'
+    )
+    date_hierarchy = 'started_at'
+
+
+@admin.register(ReconciliationMismatch)
+class ReconciliationMismatchAdmin(admin.ModelAdmin):
+    list_display = (
+        'reference', 'kind', 'remote_amount', 'local_amount',
+        'remote_status', 'local_status', 'report'
+    )
+    list_filter = ('kind', 'report')
+    search_fields = ('reference', 'transaction__transaction_number')
+    readonly_fields = ('created_at',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('report', 'transaction')
@@ -0,0 +1,130 @@
+"""
+Payment completion path
+Shared by gateway callbacks, status polls, webhooks and the reconciler so a
+transaction is completed (and its policy advanced) exactly once.
+"""
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .models import Transaction, PaymentSchedule
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('pending', 'processing')
+
+
+def advance_policy_after_payment(transaction):
+    """
+    Called whenever a transaction moves to 'completed'.
+    Marks the matching PaymentSchedule as paid and advances the Policy payment_stage.
+    """
+    policy = transaction.policy
+    if not policy:
+        return
+
+    now = timezone.now()
+
+    # Find and mark the pending schedule that matches this transaction's amount
+    schedule = (
+        PaymentSchedule.objects.filter(policy=policy, status='pending')
+        .order_by('installment_number')
+        .first()
+    )
+    if schedule:
+        schedule.status = 'paid'
+        schedule.paid_at = now
+        schedule.transaction = transaction
+        schedule.save(update_fields=['status', 'paid_at', 'transaction'])
+
+    stage = policy.payment_stage
+
+    if stage == 'initial_pending':
+        # 40% paid → activate 1-month cover, move to valuation pending
+        policy.payment_stage = 'valuation_pending'
+        policy.status = 'active'
+        policy.activated_at = now
+        policy.cover_expires_at = now + timezone.timedelta(days=30)
+        policy.save(update_fields=['payment_stage', 'status', 'activated_at', 'cover_expires_at'])
+
+    elif stage == 'installment_1_pending':
+        policy.payment_stage = 'installment_2_pending'
+        policy.save(update_fields=['payment_stage'])
+
+    elif stage == 'installment_2_pending':
+        policy.payment_stage = 'fully_paid'
+        # Extend cover to full policy term
+        policy.save(update_fields=['payment_stage'])
+
+    elif stage == 'not_applicable':
+        # Flat/TPO — single payment; activate policy
+        policy.status = 'active'
+        policy.activated_at = now
+        policy.save(update_fields=['status', 'activated_at'])
+
+
+def complete_transaction(transaction, reference_number=None, mpesa_receipt=None, metadata=None):
+    """
+    Mark a transaction completed and advance its policy.
+
+    The row is locked first so a callback racing a status poll or the
+    reconciler cannot complete the same payment twice.
+
+    Returns:
+        tuple: (transaction, changed) — changed is False if it was already completed
+    """
+    with db_transaction.atomic():
+        locked = Transaction.objects.select_for_update().select_related('policy').get(pk=transaction.pk)
+        if locked.status == 'completed':
+            return locked, False
+
+        locked.status = 'completed'
+        locked.completed_at = timezone.now()
+        locked.failure_reason = None
+        update_fields = ['status', 'completed_at', 'failure_reason', 'updated_at']
+
+        if reference_number:
+            locked.reference_number = reference_number
+            update_fields.append('reference_number')
+        if mpesa_receipt:
+            locked.mpesa_receipt = mpesa_receipt
+            update_fields.append('mpesa_receipt')
+        if metadata:
+            locked.metadata.update(metadata)
+            update_fields.append('metadata')
+
+        locked.save(update_fields=update_fields)
+        advance_policy_after_payment(locked)
+
+        from .tasks import generate_receipt_pdf
+        transaction_id = str(locked.pk)
+        db_transaction.on_commit(lambda: generate_receipt_pdf.delay(transaction_id))
+
+    logger.info(f"Transaction {locked.transaction_number} completed")
+    return locked, True
+
+
+def fail_transaction(transaction, reason, metadata=None):
+    """
+    Mark an open transaction failed. Completed or already-closed
+    transactions are left untouched.
+
+    Returns:
+        tuple: (transaction, changed)
+    """
+    with db_transaction.atomic():
+        locked = Transaction.objects.select_for_update().get(pk=transaction.pk)
+        if locked.status not in OPEN_STATUSES:
+            return locked, False
+
+        locked.status = 'failed'
+        locked.failure_reason = reason
+        update_fields = ['status', 'failure_reason', 'updated_at']
+        if metadata:
+            locked.metadata.update(metadata)
+            update_fields.append('metadata')
+        locked.save(update_fields=update_fields)
+
+    return locked, True
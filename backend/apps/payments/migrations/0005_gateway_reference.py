@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:29
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def backfill_gateway_references(apps, schema_editor):
+    """Index gateway ids previously stored only in Transaction.metadata"""
+    Transaction = apps.get_model('payments', 'Transaction')
+    GatewayReference = apps.get_model('payments', 'GatewayReference')
+
+    batch = []
+    queryset = Transaction.objects.exclude(metadata={}).only('id', 'metadata', 'paystack_reference')
+    for txn in queryset.iterator(chunk_size=2000):
+        metadata = txn.metadata or {}
+        checkout_id = metadata.get('mpesa_checkout_request_id')
+        paystack_ref = metadata.get('paystack_reference') or txn.paystack_reference
+        if checkout_id:
+            batch.append(GatewayReference(transaction_id=txn.id, gateway='mpesa', external_id=checkout_id))
+        if paystack_ref:
+            batch.append(GatewayReference(transaction_id=txn.id, gateway='paystack', external_id=paystack_ref))
+        if len(batch) >= 2000:
+            GatewayReference.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        GatewayReference.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_comprehensive_payment_flow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GatewayReference',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('gateway', models.CharField(choices=[('mpesa', 'M-Pesa'), ('paystack', 'Paystack')], max_length=20)),
+                ('external_id', models.CharField(help_text='CheckoutRequestID (M-Pesa) or reference (Paystack)', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gateway_references', to='payments.transaction')),
+            ],
+            options={
+                'db_table': 'gateway_references',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['transaction', 'gateway'], name='gateway_ref_transac_c773d8_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gatewayreference',
+            constraint=models.UniqueConstraint(fields=('gateway', 'external_id'), name='unique_gateway_external_id'),
+        ),
+        migrations.RunPython(backfill_gateway_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_gateway_reference'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationReport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('gateway', models.CharField(choices=[('mpesa', 'M-Pesa'), ('paystack', 'Paystack')], default='paystack', max_length=20)),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='running', max_length=20)),
+                ('last_page', models.IntegerField(default=0)),
+                ('remote_count', models.IntegerField(default=0, help_text='Gateway transactions examined')),
+                ('matched_count', models.IntegerField(default=0)),
+                ('mismatch_count', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliation_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reconciliation_reports',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReconciliationMismatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('missing', 'Missing Locally'), ('amount_diff', 'Amount Differs'), ('status_diff', 'Status Differs')], db_index=True, max_length=20)),
+                ('reference', models.CharField(db_index=True, max_length=100)),
+                ('remote_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('local_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('remote_status', models.CharField(blank=True, max_length=20)),
+                ('local_status', models.CharField(blank=True, max_length=20)),
+                ('remote_paid_at', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconciliation_mismatches', to='payments.transaction')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mismatches', to='payments.reconciliationreport')),
+            ],
+            options={
+                'db_table': 'reconciliation_mismatches',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['report', 'kind'], name='reconciliat_report__c1d061_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_reconciliation_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='receipt_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='receipt_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
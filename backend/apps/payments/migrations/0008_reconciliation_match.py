@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_transaction_receipt'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reconciliationmismatch',
+            name='kind',
+            field=models.CharField(choices=[('missing', 'Missing Locally'), ('missing_remote', 'Missing at Gateway'), ('amount_diff', 'Amount Differs'), ('status_diff', 'Status Differs')], db_index=True, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ReconciliationMatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='payments.reconciliationreport')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='payments.transaction')),
+            ],
+            options={
+                'db_table': 'reconciliation_matches',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reconciliationmatch',
+            constraint=models.UniqueConstraint(fields=('report', 'transaction'), name='unique_reconciliation_match'),
+        ),
+    ]
@@ -4,6 +4,10 @@ from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class Transaction(models.Model):
     """Payment transactions"""
@@ -44,6 +48,10 @@ class Transaction(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     failure_reason = models.TextField(blank=True, null=True)
 
+    # Pre-rendered receipt PDF (content-addressed storage key)
+    receipt_key = models.CharField(max_length=255, blank=True)
+    receipt_sha256 = models.CharField(max_length=64, blank=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -71,6 +79,79 @@ class Transaction(models.Model):
         return self.status in ['failed', 'cancelled']
 
 
+class GatewayReference(models.Model):
+    """
+    Maps a payment gateway's external identifier to a transaction.
+    Callbacks, status polls and reconciliation resolve transactions through
+    the unique (gateway, external_id) index instead of scanning metadata.
+    """
+
+    GATEWAY_CHOICES = [
+        ('mpesa', 'M-Pesa'),
+        ('paystack', 'Paystack'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='gateway_references')
+    gateway = models.CharField(max_length=20, choices=GATEWAY_CHOICES)
+    external_id = models.CharField(max_length=100, help_text='CheckoutRequestID (M-Pesa) or reference (Paystack)')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'gateway_references'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['gateway', 'external_id'], name='unique_gateway_external_id'),
+        ]
+        indexes = [
+            models.Index(fields=['transaction', 'gateway']),
+        ]
+
+    def __str__(self):
+        return f"{self.gateway}:{self.external_id} → {self.transaction_id}"
+
+    @classmethod
+    def record(cls, transaction, gateway, external_id):
+        """
+        Attach an external reference to a transaction (idempotent).
+
+        Raises:
+            ValueError: If the reference is already mapped to another transaction
+        """
+        reference, _ = cls.objects.get_or_create(
+            gateway=gateway,
+            external_id=external_id,
+            defaults={'transaction': transaction}
+        )
+        if reference.transaction_id != transaction.pk:
+            logger.error(
+                f"Gateway reference {gateway}:{external_id} already maps to transaction "
+                f"{reference.transaction_id}, refusing to map it to {transaction.pk}"
+            )
+            raise ValueError(f"{gateway} reference {external_id} belongs to another transaction")
+        return reference
+
+    @classmethod
+    def resolve(cls, gateway, external_id):
+        """Return the transaction for an external reference, or None"""
+        reference = (
+            cls.objects.select_related('transaction')
+            .filter(gateway=gateway, external_id=external_id)
+            .first()
+        )
+        return reference.transaction if reference else None
+
+    @classmethod
+    def latest_for(cls, transaction, gateway):
+        """Most recent external id issued for a transaction on a gateway"""
+        return (
+            cls.objects.filter(transaction=transaction, gateway=gateway)
+            .order_by('-created_at')
+            .values_list('external_id', flat=True)
+            .first()
+        )
+
+
 class PaymentSchedule(models.Model):
     """Payment schedule for installment policies"""
 
@@ -169,3 +250,109 @@ class Refund(models.Model):
 
     def __str__(self):
         return f"Refund {self.refund_number} - {self.amount}"
+
+
+class ReconciliationReport(models.Model):
+    """Gateway ledger reconciliation run for a settlement period"""
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    GATEWAY_CHOICES = GatewayReference.GATEWAY_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    gateway = models.CharField(max_length=20, choices=GATEWAY_CHOICES, default='paystack')
+    from_date = models.DateField()
+    to_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', db_index=True)
+
+    # Resume cursor: last gateway page fully processed
+    last_page = models.IntegerField(default=0)
+
+    # Totals
+    remote_count = models.IntegerField(default=0, help_text='Gateway transactions examined')
+    matched_count = models.IntegerField(default=0)
+    mismatch_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reconciliation_reports'
+    )
+
+    # Timestamps
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'reconciliation_reports'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.gateway} reconciliation {self.from_date} – {self.to_date} ({self.status})"
+
+
+class ReconciliationMismatch(models.Model):
+    """A single discrepancy between the gateway ledger and local transactions"""
+
+    KIND_CHOICES = [
+        ('missing', 'Missing Locally'),
+        ('missing_remote', 'Missing at Gateway'),
+        ('amount_diff', 'Amount Differs'),
+        ('status_diff', 'Status Differs'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.ForeignKey(ReconciliationReport, on_delete=models.CASCADE, related_name='mismatches')
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reconciliation_mismatches'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, db_index=True)
+    reference = models.CharField(max_length=100, db_index=True)
+
+    remote_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    local_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    remote_status = models.CharField(max_length=20, blank=True)
+    local_status = models.CharField(max_length=20, blank=True)
+    remote_paid_at = models.CharField(max_length=50, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reconciliation_mismatches'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['report', 'kind']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.reference}"
+
+
+class ReconciliationMatch(models.Model):
+    """
+    Local transaction returned by the gateway ledger during a reconciliation
+    run. Kept only until the run's final pass reports local transactions the
+    ledger never returned.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.ForeignKey(ReconciliationReport, on_delete=models.CASCADE, related_name='matches')
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        db_table = 'reconciliation_matches'
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'transaction'], name='unique_reconciliation_match'),
+        ]
@@ -6,6 +6,8 @@ Handles STK Push, payment callbacks, and transaction verification
 import base64
 import hmac
 import hashlib
+import threading
+import time
 import requests
 from datetime import datetime
 from django.conf import settings
@@ -32,13 +34,36 @@ class MpesaService:
         self.environment = getattr(settings, 'MPESA_ENVIRONMENT', 'sandbox')
         self.callback_secret = getattr(settings, 'MPESA_CALLBACK_SECRET', '')
 
+        # OAuth tokens are valid for ~1 hour; reuse them across calls and threads
+        self._token_lock = threading.Lock()
+        self._access_token = None
+        self._token_expires_at = 0.0
+
     def _generate_access_token(self) -> Optional[str]:
         """
-        Generate OAuth access token for API authentication
+        Return a cached OAuth access token, refreshing it shortly before expiry
 
         Returns:
             str: Access token or None if failed
         """
+        with self._token_lock:
+            if self._access_token and time.monotonic() < self._token_expires_at:
+                return self._access_token
+
+            token, expires_in = self._request_access_token()
+            if token:
+                self._access_token = token
+                # Refresh a minute early so in-flight requests never carry a stale token
+                self._token_expires_at = time.monotonic() + max(expires_in - 60, 0)
+            return token
+
+    def _request_access_token(self):
+        """
+        Request a new OAuth access token from Daraja
+
+        Returns:
+            tuple: (access_token or None, expires_in seconds)
+        """
         try:
             api_url = f"{self.api_url}/oauth/v1/generate?grant_type=client_credentials"
 
@@ -54,11 +79,11 @@ class MpesaService:
             response.raise_for_status()
 
             result = response.json()
-            return result.get('access_token')
+            return result.get('access_token'), int(result.get('expires_in', 3599))
 
         except Exception as e:
             logger.error(f"Failed to generate M-Pesa access token: {str(e)}")
-            return None
+            return None, 0
 
     def _generate_password(self) -> str:
         """
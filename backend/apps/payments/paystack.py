@@ -6,13 +6,18 @@ Handles card payment initialization, verification, and webhooks
 import requests
 import hmac
 import hashlib
+from decimal import Decimal
 from django.conf import settings
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple, List
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class PaystackAPIError(Exception):
+    """Raised by streaming helpers when a Paystack page cannot be fetched"""
+
+
 class PaystackService:
     """
     Service class for Paystack payment integration
@@ -139,6 +144,7 @@ class PaystackService:
                 return {
                     'success': True,
                     'verified': data.get('status') == 'success',
+                    'status': data.get('status'),
                     'amount': data.get('amount', 0) / 100,  # Convert from kobo to KES
                     'reference': data.get('reference'),
                     'paid_at': data.get('paid_at'),
@@ -164,6 +170,24 @@ class PaystackService:
                 'message': f'Verification failed: {str(e)}'
             }
 
+    def amount_matches(self, result: Dict[str, Any], expected_amount, currency: str = 'KES') -> bool:
+        """
+        Check that a verified charge paid exactly the expected amount
+
+        Args:
+            result: verify_transaction() or process_webhook() result
+            expected_amount: Local transaction amount in KES
+            currency: Currency the transaction was charged in
+
+        Returns:
+            bool: True if the currencies agree and the amounts agree to the cent
+        """
+        if (result.get('currency') or currency) != currency:
+            return False
+        cent = Decimal('0.01')
+        paid = Decimal(str(result.get('amount') or 0)).quantize(cent)
+        return paid == Decimal(str(expected_amount)).quantize(cent)
+
     def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """
         Verify webhook signature to ensure it's from Paystack
@@ -385,8 +409,8 @@ class PaystackService:
             per_page: Results per page
             customer: Filter by customer ID
             status: Filter by status (success, failed, abandoned)
-            from_date: Start date (YYYY-MM-DD)
-            to_date: End date (YYYY-MM-DD)
+            from_date: Start date (YYYY-MM-DD) or ISO-8601 timestamp
+            to_date: End date (YYYY-MM-DD) or ISO-8601 timestamp
 
         Returns:
             dict: List of transactions
@@ -430,7 +454,8 @@ class PaystackService:
                     'transactions': data,
                     'total': meta.get('total', 0),
                     'page': meta.get('page', 1),
-                    'per_page': meta.get('perPage', per_page)
+                    'per_page': meta.get('perPage', per_page),
+                    'page_count': meta.get('pageCount')
                 }
             else:
                 return {
@@ -445,6 +470,53 @@ class PaystackService:
                 'message': f'Failed to fetch transactions: {str(e)}'
             }
 
+    def iter_transaction_pages(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        status: Optional[str] = None,
+        per_page: int = 100,
+        start_page: int = 1
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Walk every page of the transaction ledger, one page in memory at a time
+
+        Args:
+            from_date: Start date (YYYY-MM-DD) or ISO-8601 timestamp
+            to_date: End date (YYYY-MM-DD) or ISO-8601 timestamp
+            status: Filter by status (success, failed, abandoned)
+            per_page: Results per page
+            start_page: Page to resume from
+
+        Yields:
+            tuple: (page number, list of transactions on that page)
+
+        Raises:
+            PaystackAPIError: If a page cannot be fetched; resume from the last yielded page
+        """
+        page = start_page
+        while True:
+            result = self.list_transactions(
+                page=page,
+                per_page=per_page,
+                status=status,
+                from_date=from_date,
+                to_date=to_date
+            )
+            if not result['success']:
+                raise PaystackAPIError(result.get('message', f'Failed to fetch page {page}'))
+
+            transactions = result['transactions']
+            if not transactions:
+                return
+
+            yield page, transactions
+
+            page_count = result.get('page_count')
+            if (page_count and page >= page_count) or len(transactions) < per_page:
+                return
+            page += 1
+
 
 # Singleton instance
 paystack_service = PaystackService()
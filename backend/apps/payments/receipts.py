@@ -0,0 +1,180 @@
+"""
+Payment Receipt Rendering
+Renders receipt PDFs once per completed transaction and stores them under a
+content-addressed key, so repeat downloads are served straight from storage.
+"""
+
+import hashlib
+import io
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPANY_NAME = 'Bowman Insurance'
+RECEIPT_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def build_receipt_data(transaction):
+    """Receipt fields for a completed transaction"""
+    user = transaction.user
+    return {
+        'transaction_number': transaction.transaction_number,
+        'policy_number': transaction.policy.policy_number if transaction.policy else 'N/A',
+        'customer_name': f"{user.first_name} {user.last_name}",
+        'customer_email': user.email,
+        'amount': transaction.amount,
+        'currency': 'KES',
+        'payment_method': transaction.get_payment_method_display(),
+        'reference_number': transaction.reference_number or transaction.mpesa_receipt or '',
+        'payment_date': transaction.completed_at or transaction.created_at,
+        'description': transaction.metadata.get('description') or 'Insurance Payment',
+        'company_name': COMPANY_NAME,
+    }
+
+
+def render_receipt_pdf(data):
+    """
+    Render receipt data to PDF bytes.
+
+    The canvas is rendered in invariant mode (no timestamps or random
+    document ids) so the same receipt always produces the same bytes.
+    """
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+    pdf.setTitle(f"Receipt {data['transaction_number']}")
+    width, height = A4
+
+    pdf.setFont('Helvetica-Bold', 18)
+    pdf.drawString(20 * mm, height - 25 * mm, data['company_name'])
+    pdf.setFont('Helvetica', 12)
+    pdf.drawString(20 * mm, height - 33 * mm, 'Payment Receipt')
+    pdf.line(20 * mm, height - 37 * mm, width - 20 * mm, height - 37 * mm)
+
+    rows = [
+        ('Receipt No.', data['transaction_number']),
+        ('Policy No.', data['policy_number']),
+        ('Customer', data['customer_name']),
+        ('Email', data['customer_email']),
+        ('Amount', f"{data['currency']} {data['amount']:,.2f}"),
+        ('Payment Method', data['payment_method']),
+        ('Reference', data['reference_number'] or '-'),
+        ('Payment Date', data['payment_date'].strftime('%d %b %Y %H:%M')),
+        ('Description', data['description']),
+    ]
+    y = height - 50 * mm
+    for label, value in rows:
+        pdf.setFont('Helvetica-Bold', 10)
+        pdf.drawString(20 * mm, y, label)
+        pdf.setFont('Helvetica', 10)
+        pdf.drawString(65 * mm, y, str(value))
+        y -= 8 * mm
+
+    pdf.setFont('Helvetica-Oblique', 8)
+    pdf.drawString(20 * mm, 20 * mm, 'This is a computer generated receipt and does not require a signature.')
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def store_receipt(transaction):
+    """
+    Render and store the receipt PDF for a completed transaction.
+
+    Receipts are stored at receipts/<aa>/<sha256>.pdf; identical content is
+    never written twice.
+
+    Returns:
+        str: Storage key of the receipt
+    """
+    content = render_receipt_pdf(build_receipt_data(transaction))
+    digest = hashlib.sha256(content).hexdigest()
+    key = f"receipts/{digest[:2]}/{digest}.pdf"
+
+    if not default_storage.exists(key):
+        default_storage.save(key, ContentFile(content))
+
+    transaction.receipt_key = key
+    transaction.receipt_sha256 = digest
+    transaction.save(update_fields=['receipt_key', 'receipt_sha256'])
+    return key
+
+
+def ensure_receipt(transaction):
+    """Return the receipt key, rendering it now if the background task has not run yet"""
+    if transaction.receipt_key and default_storage.exists(transaction.receipt_key):
+        return transaction.receipt_key
+    return store_receipt(transaction)
+
+
+def remote_receipt_url(key):
+    """
+    Presigned URL for a receipt when storage is remote (S3), else None
+    so the caller serves the file itself.
+    """
+    try:
+        url = default_storage.url(key)
+    except NotImplementedError:
+        return None
+    return url if url.startswith(('http://', 'https://')) else None
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only sink that hands written bytes back to a streaming response"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        chunk = b''.join(self._chunks)
+        self._chunks = []
+        return chunk
+
+
+def stream_receipts_zip(transactions, chunk_size=64 * 1024):
+    """
+    Yield a zip archive of receipt PDFs chunk by chunk.
+
+    The archive is never held in memory: each PDF is copied from storage in
+    chunk_size pieces and the zip writer's output is yielded as it is produced.
+    """
+    sink = _ZipStreamBuffer()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for transaction in transactions:
+            try:
+                key = ensure_receipt(transaction)
+            except Exception as e:
+                logger.error(f"Receipt unavailable for {transaction.transaction_number}: {str(e)}")
+                continue
+
+            with default_storage.open(key, 'rb') as source, \
+                    archive.open(f"receipt-{transaction.transaction_number}.pdf", mode='w') as target:
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    target.write(data)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Central directory is written when the archive closes
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
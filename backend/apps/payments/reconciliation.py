@@ -0,0 +1,477 @@
+"""
+Payment Reconciliation
+- Resolves pending transactions whose gateway callback never arrived by
+  polling M-Pesa and Paystack concurrently and feeding the results into the
+  normal completion path.
+- Streams the Paystack ledger for a settlement period and records
+  mismatches against local transactions in both directions: ledger entries
+  missing or different locally, and completed local card payments the
+  ledger never returned.
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .completion import complete_transaction, fail_transaction
+from .models import (
+    Transaction, GatewayReference, ReconciliationReport, ReconciliationMismatch, ReconciliationMatch
+)
+from .mpesa import mpesa_service
+from .paystack import paystack_service
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Paystack statuses that will never turn into a successful charge
+PAYSTACK_TERMINAL_FAILURES = ('failed', 'abandoned', 'reversed')
+
+
+class RateLimiter:
+    """
+    Spaces calls so that no more than `rate` start per second.
+    Shared by all worker threads of one gateway.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class StaleTransactionReconciler:
+    """
+    Polls gateways for transactions stuck in 'pending'.
+
+    Each gateway gets its own work queue, worker threads and rate limiter,
+    and results come back on one shared queue, so a slow or throttled
+    gateway never holds up probes to (or results from) the other one.
+    Worker threads only perform HTTP calls; all database writes happen on
+    the calling thread as results arrive.
+    """
+
+    def __init__(
+        self,
+        stale_after_minutes: int = None,
+        batch_size: int = None,
+        max_transactions: int = None,
+        max_age_hours: int = None,
+    ):
+        self.stale_after = timedelta(minutes=stale_after_minutes or getattr(
+            settings, 'PAYMENT_RECONCILE_STALE_MINUTES', 15
+        ))
+        self.max_age = timedelta(hours=max_age_hours or getattr(
+            settings, 'PAYMENT_RECONCILE_MAX_AGE_HOURS', 48
+        ))
+        self.batch_size = batch_size or getattr(settings, 'PAYMENT_RECONCILE_BATCH_SIZE', 200)
+        self.max_transactions = max_transactions or getattr(settings, 'PAYMENT_RECONCILE_MAX_TRANSACTIONS', 5000)
+        max_workers = getattr(settings, 'PAYMENT_RECONCILE_MAX_WORKERS', 8)
+
+        self.gateways = {
+            'mpesa': {
+                'probe': self._probe_mpesa,
+                'limiter': RateLimiter(getattr(settings, 'MPESA_QUERY_RATE_LIMIT', 5)),
+                'workers': max_workers,
+            },
+            'paystack': {
+                'probe': self._probe_paystack,
+                'limiter': RateLimiter(getattr(settings, 'PAYSTACK_QUERY_RATE_LIMIT', 10)),
+                'workers': max_workers,
+            },
+        }
+
+    # ------------------------------------------------------------------ probes
+
+    def _probe_mpesa(self, ref):
+        """
+        Returns:
+            tuple: (outcome, detail) where outcome is completed/failed/pending
+        """
+        result = mpesa_service.query_transaction_status(ref['external_id'])
+        if not result.get('success') or result.get('result_code') is None:
+            # Daraja answers with an error while the STK push is still in flight
+            return 'pending', result.get('message', '')
+        if str(result['result_code']) == '0':
+            return 'completed', result.get('result_desc', '')
+        return 'failed', result.get('result_desc') or 'Payment was not completed'
+
+    def _probe_paystack(self, ref):
+        result = paystack_service.verify_transaction(ref['external_id'])
+        if result.get('verified'):
+            if not paystack_service.amount_matches(result, ref['transaction__amount']):
+                return 'failed', (
+                    f"Paid amount {result.get('amount')} does not match "
+                    f"transaction amount {ref['transaction__amount']}"
+                )
+            return 'completed', result
+        if result.get('status') in PAYSTACK_TERMINAL_FAILURES:
+            return 'failed', f"Paystack status: {result['status']}"
+        return 'pending', result.get('message', '')
+
+    def _worker(self, gateway, work, results):
+        """Probe references from one gateway's queue until the None sentinel"""
+        config = self.gateways[gateway]
+        while True:
+            ref = work.get()
+            if ref is None:
+                return
+            try:
+                config['limiter'].wait()
+                results.put((ref, config['probe'](ref), None))
+            except Exception as e:
+                results.put((ref, None, e))
+
+    # --------------------------------------------------------------- batching
+
+    def _stale_references(self):
+        """
+        Yield batches of gateway references for stale pending transactions,
+        oldest first, using keyset pagination so each batch is an index range scan.
+
+        Transactions older than max_age are left out, so references that keep
+        probing as pending cannot crowd newer stale transactions out of a run.
+        """
+        now = timezone.now()
+        cutoff = now - self.stale_after
+        # Only the latest reference per gateway counts: an abandoned earlier
+        # STK push must not fail a transaction the customer retried.
+        superseded = GatewayReference.objects.filter(
+            transaction=OuterRef('transaction'),
+            gateway=OuterRef('gateway'),
+            created_at__gt=OuterRef('created_at'),
+        )
+        queryset = (
+            GatewayReference.objects.filter(
+                transaction__status='pending',
+                transaction__created_at__lt=cutoff,
+                transaction__created_at__gte=now - self.max_age,
+            )
+            .exclude(Exists(superseded))
+            .order_by('transaction__created_at', 'id')
+            .values(
+                'id', 'gateway', 'external_id', 'transaction_id',
+                'transaction__created_at', 'transaction__amount',
+            )
+        )
+
+        last = None
+        fetched = 0
+        while fetched < self.max_transactions:
+            page = queryset
+            if last is not None:
+                page = page.filter(
+                    transaction__created_at__gte=last['transaction__created_at']
+                ).exclude(
+                    transaction__created_at=last['transaction__created_at'],
+                    id__lte=last['id'],
+                )
+            batch = list(page[:self.batch_size])
+            if not batch:
+                return
+            fetched += len(batch)
+            last = batch[-1]
+            yield batch
+
+    def _apply(self, transaction_id, gateway, outcome, detail, stats):
+        if outcome == 'pending':
+            stats['pending'] += 1
+            return
+
+        transaction = Transaction(pk=transaction_id)
+        if outcome == 'completed':
+            metadata = {'reconciled_at': timezone.now().isoformat(), 'reconciled_via': gateway}
+            reference_number = None
+            if gateway == 'paystack' and isinstance(detail, dict):
+                reference_number = detail.get('reference')
+                metadata.update({
+                    'paystack_verified': True,
+                    'paystack_paid_at': detail.get('paid_at'),
+                    'paystack_channel': detail.get('channel'),
+                })
+            _, changed = complete_transaction(transaction, reference_number=reference_number, metadata=metadata)
+            stats['completed' if changed else 'unchanged'] += 1
+        else:
+            _, changed = fail_transaction(transaction, detail)
+            stats['failed' if changed else 'unchanged'] += 1
+
+    def _collect(self, ref, probed, error, stats):
+        stats['checked'] += 1
+        try:
+            if error is not None:
+                raise error
+            outcome, detail = probed
+            self._apply(ref['transaction_id'], ref['gateway'], outcome, detail, stats)
+        except Exception as e:
+            stats['errors'] += 1
+            logger.error(
+                f"Reconciliation failed for {ref['gateway']}:{ref['external_id']}: {str(e)}"
+            )
+
+    def run(self):
+        """
+        Reconcile stale pending transactions.
+
+        Returns:
+            dict: Counts of checked, completed, failed, still pending and errored probes
+        """
+        stats = {'checked': 0, 'completed': 0, 'failed': 0, 'pending': 0, 'unchanged': 0, 'errors': 0}
+        results = queue.Queue()
+        work = {name: queue.Queue() for name in self.gateways}
+        threads = [
+            threading.Thread(
+                target=self._worker, args=(name, work[name], results),
+                name=f'reconcile-{name}-{index}', daemon=True,
+            )
+            for name, config in self.gateways.items()
+            for index in range(config['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+
+        outstanding = 0
+        try:
+            for batch in self._stale_references():
+                for ref in batch:
+                    if ref['gateway'] in work:
+                        work[ref['gateway']].put(ref)
+                        outstanding += 1
+                # Apply whatever has finished so far without waiting on the slowest probe
+                while True:
+                    try:
+                        item = results.get_nowait()
+                    except queue.Empty:
+                        break
+                    outstanding -= 1
+                    self._collect(*item, stats)
+        finally:
+            for name, config in self.gateways.items():
+                for _ in range(config['workers']):
+                    work[name].put(None)
+
+        while outstanding:
+            outstanding -= 1
+            self._collect(*results.get(), stats)
+        for thread in threads:
+            thread.join()
+
+        logger.info(f"Stale transaction reconciliation finished: {stats}")
+        return stats
+
+
+class PaystackLedgerReconciler:
+    """
+    Walks the Paystack ledger page by page and hash-joins each page against
+    local transactions by reference.
+
+    Only one page is held in memory at a time. Progress is checkpointed on
+    the report after every page, so a failed run resumes where it stopped.
+    Matched transaction ids are saved with each page; once the ledger is
+    exhausted, one anti-join reports completed local card payments in the
+    period that Paystack never returned.
+    """
+
+    # Local statuses that agree with each Paystack status
+    EXPECTED_LOCAL_STATUSES = {
+        'success': {'completed', 'refunded'},
+        'reversed': {'refunded'},
+        'failed': {'failed', 'cancelled', 'pending'},
+        'abandoned': {'failed', 'cancelled', 'pending'},
+    }
+
+    def __init__(self, report: ReconciliationReport, per_page: int = None):
+        self.report = report
+        self.per_page = per_page or getattr(settings, 'PAYSTACK_RECONCILE_PAGE_SIZE', 100)
+
+    def _local_transactions(self, references):
+        """
+        Resolve a page of references to local transactions with two indexed
+        IN-queries, returning {reference: transaction values}.
+        """
+        fields = ('id', 'transaction_number', 'amount', 'status')
+        by_reference = {}
+
+        indexed = dict(
+            GatewayReference.objects.filter(gateway='paystack', external_id__in=references)
+            .values_list('external_id', 'transaction_id')
+        )
+        if indexed:
+            by_id = {
+                row['id']: row
+                for row in Transaction.objects.filter(id__in=indexed.values()).values(*fields)
+            }
+            for reference, transaction_id in indexed.items():
+                if transaction_id in by_id:
+                    by_reference[reference] = by_id[transaction_id]
+
+        unresolved = [ref for ref in references if ref not in by_reference]
+        if unresolved:
+            for row in Transaction.objects.filter(transaction_number__in=unresolved).values(*fields):
+                by_reference[row['transaction_number']] = row
+
+        return by_reference
+
+    def _compare(self, remote, local):
+        """Return a list of unsaved mismatches for one ledger entry"""
+        reference = remote.get('reference') or ''
+        remote_amount = Decimal(str(remote.get('amount', 0))).quantize(Decimal('0.01'))
+        remote_status = remote.get('status') or ''
+        common = {
+            'report': self.report,
+            'reference': reference,
+            'remote_amount': remote_amount,
+            'remote_status': remote_status,
+            'remote_paid_at': remote.get('paid_at') or remote.get('paidAt') or '',
+        }
+
+        if local is None:
+            # Only money that actually moved matters when missing locally
+            if remote_status == 'success':
+                return [ReconciliationMismatch(kind='missing', **common)]
+            return []
+
+        common.update({
+            'transaction_id': local['id'],
+            'local_amount': local['amount'],
+            'local_status': local['status'],
+        })
+        mismatches = []
+        if remote_status == 'success' and local['amount'] != remote_amount:
+            mismatches.append(ReconciliationMismatch(kind='amount_diff', **common))
+        expected = self.EXPECTED_LOCAL_STATUSES.get(remote_status)
+        if expected and local['status'] not in expected:
+            mismatches.append(ReconciliationMismatch(kind='status_diff', **common))
+        return mismatches
+
+    def _process_page(self, page, entries):
+        references = [entry['reference'] for entry in entries if entry.get('reference')]
+        local = self._local_transactions(references)
+
+        mismatches = []
+        seen = {}
+        matched = 0
+        for entry in entries:
+            row = local.get(entry.get('reference'))
+            if row is not None:
+                matched += 1
+                seen[row['id']] = ReconciliationMatch(report=self.report, transaction_id=row['id'])
+            mismatches.extend(self._compare(entry, row))
+
+        with db_transaction.atomic():
+            ReconciliationMismatch.objects.bulk_create(mismatches)
+            ReconciliationMatch.objects.bulk_create(seen.values(), ignore_conflicts=True)
+            ReconciliationReport.objects.filter(pk=self.report.pk).update(
+                last_page=page,
+                remote_count=F('remote_count') + len(entries),
+                matched_count=F('matched_count') + matched,
+                mismatch_count=F('mismatch_count') + len(mismatches),
+                updated_at=timezone.now(),
+            )
+
+    def _period(self):
+        """
+        The report period as an aware [start, end) range: local midnight of
+        from_date up to local midnight after to_date. Both the ledger fetch
+        and the local anti-join use this range so their edges agree.
+        """
+        start = timezone.make_aware(datetime.combine(self.report.from_date, datetime.min.time()))
+        end = timezone.make_aware(
+            datetime.combine(self.report.to_date + timedelta(days=1), datetime.min.time())
+        )
+        return start, end
+
+    @staticmethod
+    def _paystack_timestamp(value):
+        return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def _report_missing_remote(self, batch_size=500):
+        """Record completed local card payments in the period absent from the ledger"""
+        report = self.report
+        start, end = self._period()
+        seen = ReconciliationMatch.objects.filter(report=report, transaction=OuterRef('pk'))
+        unseen = (
+            Transaction.objects
+            .filter(
+                payment_method='card',
+                status='completed',
+                created_at__gte=start,
+                created_at__lt=end,
+            )
+            .filter(~Exists(seen))
+            .values('id', 'transaction_number', 'paystack_reference', 'amount', 'status')
+            .order_by()
+        )
+
+        with db_transaction.atomic():
+            created, batch = 0, []
+            for row in unseen.iterator(chunk_size=batch_size):
+                batch.append(ReconciliationMismatch(
+                    report=report,
+                    kind='missing_remote',
+                    transaction_id=row['id'],
+                    reference=row['paystack_reference'] or row['transaction_number'],
+                    local_amount=row['amount'],
+                    local_status=row['status'],
+                ))
+                if len(batch) >= batch_size:
+                    ReconciliationMismatch.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            ReconciliationMismatch.objects.bulk_create(batch)
+            created += len(batch)
+
+            ReconciliationMatch.objects.filter(report=report).delete()
+            ReconciliationReport.objects.filter(pk=report.pk).update(
+                mismatch_count=F('mismatch_count') + created,
+                updated_at=timezone.now(),
+            )
+
+    def run(self):
+        """
+        Process every ledger page after the report's resume cursor.
+
+        Returns:
+            ReconciliationReport: The refreshed report
+        """
+        report = self.report
+        ReconciliationReport.objects.filter(pk=report.pk).update(status='running', error_message='')
+
+        start, end = self._period()
+        try:
+            pages = paystack_service.iter_transaction_pages(
+                from_date=self._paystack_timestamp(start),
+                to_date=self._paystack_timestamp(end),
+                per_page=self.per_page,
+                start_page=report.last_page + 1,
+            )
+            for page, entries in pages:
+                self._process_page(page, entries)
+            self._report_missing_remote()
+        except Exception as e:
+            logger.error(f"Paystack reconciliation {report.pk} stopped: {str(e)}")
+            ReconciliationReport.objects.filter(pk=report.pk).update(
+                status='failed', error_message=str(e)
+            )
+        else:
+            ReconciliationReport.objects.filter(pk=report.pk).update(
+                status='completed', finished_at=timezone.now()
+            )
+
+        report.refresh_from_db()
+        return report
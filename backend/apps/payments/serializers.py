@@ -278,3 +278,4 @@ class ReceiptSerializer(serializers.Serializer):
     company_address = serializers.CharField(required=False)
     company_phone = serializers.CharField(required=False)
     company_email = serializers.EmailField(required=False)
+    pdf_url = serializers.CharField(required=False)
@@ -0,0 +1,75 @@
+"""Payment Celery tasks"""
+import uuid
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LOCK_KEY = 'payments:reconcile-stale:lock'
+
+
+@shared_task
+def reconcile_stale_transactions():
+    """
+    Poll gateways for pending transactions whose callback never arrived.
+    A cache lock keeps beat runs from overlapping when one outlasts the interval.
+    """
+    from .reconciliation import StaleTransactionReconciler
+
+    token = uuid.uuid4().hex
+    ttl = getattr(settings, 'PAYMENT_RECONCILE_LOCK_SECONDS', 1800)
+    if not cache.add(RECONCILE_LOCK_KEY, token, ttl):
+        logger.info("Stale transaction reconciliation already running, skipping")
+        return None
+    try:
+        return StaleTransactionReconciler().run()
+    finally:
+        if cache.get(RECONCILE_LOCK_KEY) == token:
+            cache.delete(RECONCILE_LOCK_KEY)
+
+
+@shared_task
+def reconcile_paystack_ledger(report_id=None, from_date=None, to_date=None):
+    """
+    Reconcile the Paystack ledger against local transactions.
+
+    Pass report_id to resume an interrupted run. Otherwise a new report is
+    created for from_date..to_date (YYYY-MM-DD), defaulting to last month.
+    """
+    from datetime import date, timedelta
+    from .models import ReconciliationReport
+    from .reconciliation import PaystackLedgerReconciler
+
+    if report_id:
+        report = ReconciliationReport.objects.get(pk=report_id)
+        if report.status == 'completed':
+            return str(report.pk)
+    else:
+        if from_date and to_date:
+            start, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+        else:
+            end = date.today().replace(day=1) - timedelta(days=1)
+            start = end.replace(day=1)
+        report = ReconciliationReport.objects.create(gateway='paystack', from_date=start, to_date=end)
+
+    PaystackLedgerReconciler(report).run()
+    return str(report.pk)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_receipt_pdf(self, transaction_id):
+    """Render and store the receipt PDF for a completed transaction"""
+    from .models import Transaction
+    from .receipts import store_receipt
+
+    transaction = Transaction.objects.select_related('user', 'policy').get(pk=transaction_id)
+    if transaction.status != 'completed' or transaction.receipt_key:
+        return transaction.receipt_key
+    try:
+        return store_receipt(transaction)
+    except Exception as exc:
+        raise self.retry(exc=exc)
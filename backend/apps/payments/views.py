@@ -7,20 +7,25 @@ from rest_framework import generics, status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.throttling import UserRateThrottle
+from bowman_insurance.throttling import UserTokenBucketThrottle
 
 
-class PaymentRateThrottle(UserRateThrottle):
+class PaymentRateThrottle(UserTokenBucketThrottle):
     """Stricter rate limit for payment initiation endpoints (20 per hour per user)."""
     scope = 'payment_initiate'
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Sum, Count, Q
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+)
 import json
+import uuid
 
-from .models import Transaction, PaymentSchedule, Refund
+from .models import Transaction, GatewayReference, PaymentSchedule, Refund
 from apps.policies.models import Policy
 from .serializers import (
     TransactionSerializer,
@@ -33,7 +38,11 @@ from .serializers import (
     PaymentSummarySerializer,
     ReceiptSerializer
 )
+from .completion import complete_transaction, fail_transaction
 from .mpesa import mpesa_service
+from .receipts import (
+    RECEIPT_CACHE_CONTROL, build_receipt_data, ensure_receipt, remote_receipt_url, stream_receipts_zip
+)
 from .paystack import paystack_service
 
 import logging
@@ -42,55 +51,6 @@ from decimal import Decimal
 logger = logging.getLogger(__name__)
 
 
-def _advance_policy_after_payment(transaction):
-    """
-    Called whenever a transaction moves to 'completed'.
-    Marks the matching PaymentSchedule as paid and advances the Policy payment_stage.
-    """
-    policy = transaction.policy
-    if not policy:
-        return
-
-    now = timezone.now()
-
-    # Find and mark the pending schedule that matches this transaction's amount
-    schedule = (
-        PaymentSchedule.objects.filter(policy=policy, status='pending')
-        .order_by('installment_number')
-        .first()
-    )
-    if schedule:
-        schedule.status = 'paid'
-        schedule.paid_at = now
-        schedule.transaction = transaction
-        schedule.save(update_fields=['status', 'paid_at', 'transaction'])
-
-    stage = policy.payment_stage
-
-    if stage == 'initial_pending':
-        # 40% paid → activate 1-month cover, move to valuation pending
-        policy.payment_stage = 'valuation_pending'
-        policy.status = 'active'
-        policy.activated_at = now
-        policy.cover_expires_at = now + timezone.timedelta(days=30)
-        policy.save(update_fields=['payment_stage', 'status', 'activated_at', 'cover_expires_at'])
-
-    elif stage == 'installment_1_pending':
-        policy.payment_stage = 'installment_2_pending'
-        policy.save(update_fields=['payment_stage'])
-
-    elif stage == 'installment_2_pending':
-        policy.payment_stage = 'fully_paid'
-        # Extend cover to full policy term
-        policy.save(update_fields=['payment_stage'])
-
-    elif stage == 'not_applicable':
-        # Flat/TPO — single payment; activate policy
-        policy.status = 'active'
-        policy.activated_at = now
-        policy.save(update_fields=['status', 'activated_at'])
-
-
 class TransactionViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing transactions
@@ -145,22 +105,96 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        receipt_data = {
-            'transaction_number': transaction.transaction_number,
-            'policy_number': transaction.policy.policy_number if transaction.policy else 'N/A',
-            'customer_name': f"{transaction.user.first_name} {transaction.user.last_name}",
-            'customer_email': transaction.user.email,
-            'amount': transaction.amount,
-            'currency': transaction.currency,
-            'payment_method': transaction.get_payment_method_display(),
-            'reference_number': transaction.reference_number,
-            'payment_date': transaction.processed_at or transaction.created_at,
-            'description': transaction.description or 'Insurance Payment'
-        }
+        receipt_data = build_receipt_data(transaction)
+        receipt_data['pdf_url'] = request.build_absolute_uri('pdf/')
 
         serializer = ReceiptSerializer(receipt_data)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='receipt/pdf')
+    def receipt_pdf(self, request, pk=None):
+        """Download the pre-rendered receipt PDF"""
+        transaction = self.get_object()
+
+        if transaction.status != 'completed':
+            return Response(
+                {'error': 'Receipt only available for completed transactions'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        key = ensure_receipt(transaction)
+
+        # S3: hand out a presigned URL instead of proxying the bytes
+        remote_url = remote_receipt_url(key)
+        if remote_url:
+            return HttpResponseRedirect(remote_url)
+
+        etag = f'"{transaction.receipt_sha256}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                default_storage.open(key, 'rb'),
+                content_type='application/pdf',
+                as_attachment=True,
+                filename=f"receipt-{transaction.transaction_number}.pdf"
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = RECEIPT_CACHE_CONTROL
+        return response
+
+    @action(detail=False, methods=['get'], url_path='receipts/archive')
+    def receipts_archive(self, request):
+        """
+        Download all receipts for a policy and/or year as a zip
+        GET /api/v1/payments/transactions/receipts/archive/?policy=<id>&year=<yyyy>
+
+        Admin/staff see every customer's transactions, so they must name a policy.
+        """
+        policy_id = request.query_params.get('policy')
+        year = request.query_params.get('year')
+
+        if not policy_id and not year:
+            return Response(
+                {'error': 'policy or year is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not policy_id and request.user.role in ['admin', 'staff']:
+            return Response(
+                {'error': 'policy is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_queryset().filter(status='completed').select_related('user', 'policy')
+        if policy_id:
+            try:
+                policy_id = str(uuid.UUID(policy_id))
+            except ValueError:
+                return Response({'error': 'policy must be a valid id'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(policy_id=policy_id)
+        if year:
+            if not year.isdigit():
+                return Response({'error': 'year must be numeric'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(created_at__year=int(year))
+
+        max_receipts = getattr(settings, 'RECEIPT_ARCHIVE_MAX_RECEIPTS', 500)
+        if queryset.count() > max_receipts:
+            return Response(
+                {'error': f'Archives are limited to {max_receipts} receipts; narrow the policy or year'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        label = '-'.join(filter(None, [
+            f"policy-{policy_id}" if policy_id else '',
+            year or ''
+        ]))
+        response = StreamingHttpResponse(
+            stream_receipts_zip(queryset.order_by('created_at').iterator(chunk_size=200)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="receipts-{label}.zip"'
+        return response
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -236,13 +270,21 @@ def mpesa_initiate(request):
     )
 
     if result['success']:
-        # Update transaction with checkout request ID
-        transaction.gateway_reference = result['checkout_request_id']
+        # Index the checkout request ID so the callback resolves in one probe
+        try:
+            GatewayReference.record(transaction, 'mpesa', result['checkout_request_id'])
+        except ValueError as e:
+            logger.error(f"M-Pesa initiate for transaction {transaction.id} rejected: {str(e)}")
+            fail_transaction(transaction, 'Gateway reference already belongs to another transaction')
+            return Response({
+                'success': False,
+                'message': 'Payment gateway returned a conflicting reference'
+            }, status=status.HTTP_409_CONFLICT)
         transaction.metadata.update({
             'mpesa_checkout_request_id': result['checkout_request_id'],
             'mpesa_merchant_request_id': result['merchant_request_id']
         })
-        transaction.save()
+        transaction.save(update_fields=['metadata', 'updated_at'])
 
         return Response({
             'success': True,
@@ -281,30 +323,25 @@ def mpesa_callback(request):
             return JsonResponse({'ResultCode': 1, 'ResultDesc': 'Invalid callback data'})
 
         # Find transaction
-        try:
-            transaction = Transaction.objects.get(
-                gateway_reference=processed['checkout_request_id']
-            )
-        except Transaction.DoesNotExist:
+        transaction = GatewayReference.resolve('mpesa', processed['checkout_request_id'])
+        if transaction is None:
             logger.error(f"Transaction not found for checkout request: {processed['checkout_request_id']}")
             return JsonResponse({'ResultCode': 1, 'ResultDesc': 'Transaction not found'})
 
         # Update transaction based on result
         if processed['success']:
-            transaction.status = 'completed'
-            transaction.reference_number = processed.get('mpesa_receipt', '')
-            transaction.processed_at = timezone.now()
-            transaction.metadata.update({
-                'mpesa_receipt': processed.get('mpesa_receipt'),
-                'transaction_date': str(processed.get('transaction_date')),
-                'phone_number': processed.get('phone_number')
-            })
-            transaction.save()
-            _advance_policy_after_payment(transaction)
+            complete_transaction(
+                transaction,
+                reference_number=processed.get('mpesa_receipt', ''),
+                mpesa_receipt=processed.get('mpesa_receipt'),
+                metadata={
+                    'mpesa_receipt': processed.get('mpesa_receipt'),
+                    'transaction_date': str(processed.get('transaction_date')),
+                    'phone_number': processed.get('phone_number')
+                }
+            )
         else:
-            transaction.status = 'failed'
-            transaction.failure_reason = processed.get('result_desc', 'Payment failed')
-            transaction.save()
+            fail_transaction(transaction, processed.get('result_desc', 'Payment failed'))
 
         return JsonResponse({'ResultCode': 0, 'ResultDesc': 'Success'})
 
@@ -323,22 +360,20 @@ def mpesa_status(request, transaction_id):
         user=request.user
     )
 
-    if not transaction.gateway_reference:
+    checkout_request_id = GatewayReference.latest_for(transaction, 'mpesa')
+    if not checkout_request_id:
         return Response(
             {'error': 'No M-Pesa reference found for this transaction'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
     # Query M-Pesa API
-    result = mpesa_service.query_transaction_status(transaction.gateway_reference)
+    result = mpesa_service.query_transaction_status(checkout_request_id)
 
     if result['success']:
-        # Update transaction if needed
-        if result['result_code'] == 0 and transaction.status == 'pending':
-            transaction.status = 'completed'
-            transaction.processed_at = timezone.now()
-            transaction.save()
-            _advance_policy_after_payment(transaction)
+        # Update transaction if needed (Daraja returns ResultCode as a string)
+        if str(result['result_code']) == '0' and transaction.status == 'pending':
+            transaction, _ = complete_transaction(transaction)
 
         return Response({
             'transaction_id': str(transaction.id),
@@ -387,13 +422,22 @@ def paystack_initialize(request):
     )
 
     if result['success']:
-        # Update transaction
-        transaction.gateway_reference = result['reference']
+        # Update transaction and index the Paystack reference
+        try:
+            GatewayReference.record(transaction, 'paystack', result['reference'])
+        except ValueError as e:
+            logger.error(f"Paystack initialize for transaction {transaction.id} rejected: {str(e)}")
+            fail_transaction(transaction, 'Gateway reference already belongs to another transaction')
+            return Response({
+                'success': False,
+                'message': 'Payment gateway returned a conflicting reference'
+            }, status=status.HTTP_409_CONFLICT)
+        transaction.paystack_reference = result['reference']
         transaction.metadata.update({
             'paystack_access_code': result['access_code'],
             'paystack_reference': result['reference']
         })
-        transaction.save()
+        transaction.save(update_fields=['paystack_reference', 'metadata', 'updated_at'])
 
         return Response({
             'success': True,
@@ -414,26 +458,40 @@ def paystack_initialize(request):
 def paystack_verify(request, reference):
     """Verify Paystack payment"""
     # Find transaction
-    transaction = get_object_or_404(
-        Transaction,
-        transaction_number=reference,
-        user=request.user
-    )
+    transaction = GatewayReference.resolve('paystack', reference)
+    if transaction is None or transaction.user_id != request.user.id:
+        transaction = get_object_or_404(
+            Transaction,
+            transaction_number=reference,
+            user=request.user
+        )
 
     # Verify with Paystack
     result = paystack_service.verify_transaction(reference)
 
+    if result['success'] and result['verified'] and not paystack_service.amount_matches(result, transaction.amount):
+        logger.warning(
+            f"Paystack amount mismatch for {transaction.transaction_number}: "
+            f"paid {result.get('amount')}, expected {transaction.amount}"
+        )
+        if transaction.status == 'pending':
+            fail_transaction(transaction, 'Paid amount does not match transaction amount')
+
+        return Response({
+            'success': False,
+            'message': 'Paid amount does not match transaction amount'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     if result['success'] and result['verified']:
-        transaction.status = 'completed'
-        transaction.reference_number = reference
-        transaction.processed_at = timezone.now()
-        transaction.metadata.update({
-            'paystack_verified': True,
-            'paystack_paid_at': result.get('paid_at'),
-            'paystack_channel': result.get('channel')
-        })
-        transaction.save()
-        _advance_policy_after_payment(transaction)
+        complete_transaction(
+            transaction,
+            reference_number=reference,
+            metadata={
+                'paystack_verified': True,
+                'paystack_paid_at': result.get('paid_at'),
+                'paystack_channel': result.get('channel')
+            }
+        )
 
         return Response({
             'success': True,
@@ -443,9 +501,7 @@ def paystack_verify(request, reference):
         })
     else:
         if transaction.status == 'pending':
-            transaction.status = 'failed'
-            transaction.failure_reason = 'Payment verification failed'
-            transaction.save()
+            fail_transaction(transaction, 'Payment verification failed')
 
         return Response({
             'success': False,
@@ -473,20 +529,40 @@ def paystack_webhook(request):
 
         if processed.get('reference'):
             try:
-                transaction = Transaction.objects.get(
-                    transaction_number=processed['reference']
-                )
-
-                if processed.get('transaction_completed'):
-                    transaction.status = 'completed'
-                    transaction.reference_number = processed['reference']
-                    transaction.processed_at = timezone.now()
+                transaction = GatewayReference.resolve('paystack', processed['reference'])
+                if transaction is None:
+                    transaction = Transaction.objects.get(
+                        transaction_number=processed['reference']
+                    )
+
+                if processed.get('transaction_completed') and not paystack_service.amount_matches(
+                    processed, transaction.amount
+                ):
+                    logger.warning(
+                        f"Paystack webhook amount mismatch for {transaction.transaction_number}: "
+                        f"paid {processed.get('amount')} {processed.get('currency')}, "
+                        f"expected {transaction.amount}"
+                    )
+                    fail_transaction(
+                        transaction,
+                        'Paid amount does not match transaction amount',
+                        metadata=processed
+                    )
+                elif processed.get('transaction_completed'):
+                    complete_transaction(
+                        transaction,
+                        reference_number=processed['reference'],
+                        metadata=processed
+                    )
                 elif processed.get('success') is False:
-                    transaction.status = 'failed'
-                    transaction.failure_reason = processed.get('failure_reason', 'Payment failed')
-
-                transaction.metadata.update(processed)
-                transaction.save()
+                    fail_transaction(
+                        transaction,
+                        processed.get('failure_reason', 'Payment failed'),
+                        metadata=processed
+                    )
+                else:
+                    transaction.metadata.update(processed)
+                    transaction.save(update_fields=['metadata', 'updated_at'])
 
             except Transaction.DoesNotExist:
                 logger.error(f"Transaction not found: {processed['reference']}")
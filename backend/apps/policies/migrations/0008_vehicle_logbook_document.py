@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_content_addressed_blobs'),
+        ('policies', '0007_tpo_and_tor_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='logbook_document',
+            field=models.ForeignKey(blank=True, help_text='Uploaded logbook; reuses the stored document instead of a separate copy', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='vehicles', to='documents.document'),
+        ),
+    ]
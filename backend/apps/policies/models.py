@@ -308,6 +308,14 @@ class Vehicle(models.Model):
         max_digits=15, decimal_places=2, help_text='Current market value in KES'
     )
     logbook_url = models.URLField(blank=True, null=True, help_text='S3 URL of uploaded logbook')
+    logbook_document = models.ForeignKey(
+        'documents.Document',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='vehicles',
+        help_text='Uploaded logbook; reuses the stored document instead of a separate copy'
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
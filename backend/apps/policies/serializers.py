@@ -344,10 +344,22 @@ class VehicleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'make', 'model', 'year', 'registration_number',
             'chassis_number', 'engine_number', 'body_type', 'color',
-            'value', 'logbook_url', 'is_active', 'created_at', 'updated_at'
+            'value', 'logbook_url', 'logbook_document', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate_logbook_document(self, value):
+        if value is not None and value.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError('Document not found')
+        return value
+
+    def validate(self, data):
+        document = data.get('logbook_document')
+        if document is not None:
+            request = self.context.get('request')
+            data['logbook_url'] = request.build_absolute_uri(document.file_url) if request else document.file_url
+        return data
+
     def validate_year(self, value):
         from django.utils import timezone
         current_year = timezone.now().year
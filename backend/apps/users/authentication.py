@@ -0,0 +1,95 @@
+"""
+Cached JWT Authentication
+JWTAuthentication without the per-request User lookup. A slim snapshot of
+the user (no password hash) is kept in the shared cache; request.user is
+rebuilt from it as a User instance whose other fields are deferred and
+load on first access.
+
+Snapshots are keyed by user id and a per-user version. User.save() and
+delete() bump the version once the transaction commits, so suspending
+or editing a user takes effect on their next request. A reader that
+loaded the row before the bump stores its snapshot under the old
+version, where nothing will read it.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+SNAPSHOT_FIELDS = [
+    'id', 'email', 'first_name', 'last_name', 'phone', 'role',
+    'is_active', 'is_staff', 'is_superuser', 'is_verified',
+]
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def _snapshot_key(user_id, version):
+    return f'auth:user:{user_id}:v{version}'
+
+
+def _current_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), 1, None)
+        version = cache.get(_version_key(user_id)) or 1
+    return version
+
+
+def _from_snapshot(user_model, snapshot):
+    field_names = [field.attname for field in user_model._meta.concrete_fields if field.attname in snapshot]
+    return user_model.from_db('default', field_names, [snapshot[name] for name in field_names])
+
+
+def get_cached_user(user_id):
+    """User rebuilt from the cached snapshot, or None if no such user"""
+    from .models import User
+
+    version = _current_version(user_id)
+    key = _snapshot_key(user_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        cache.set(key, snapshot, getattr(settings, 'AUTH_USER_CACHE_TTL', 300))
+    return _from_snapshot(User, snapshot)
+
+
+def invalidate_cached_user(user_id):
+    """Retire the user's snapshot once the current transaction commits"""
+    def bump():
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            # No version yet (or evicted): readers restart from version 1
+            cache.delete(_snapshot_key(user_id, 1))
+
+    db_transaction.on_commit(bump)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication backed by the user snapshot cache"""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which is never cached
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
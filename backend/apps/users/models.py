@@ -76,6 +76,29 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .authentication import SNAPSHOT_FIELDS, invalidate_cached_user
+        update_fields = kwargs.get('update_fields')
+        # last_login-only saves (every login) leave the auth snapshot valid
+        if update_fields is None or set(update_fields) & set(SNAPSHOT_FIELDS):
+            invalidate_cached_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        from .authentication import invalidate_cached_user
+        invalidate_cached_user(user_id)
+        return result
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # A user rebuilt from the auth cache (all but a few fields deferred)
+        # loads every deferred field on first access, not one query per field
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -0,0 +1,9 @@
+"""Users Celery tasks"""
+from celery import shared_task
+
+
+@shared_task
+def cleanup_expired_tokens():
+    """Purge expired refresh tokens and their blacklist entries"""
+    from .tokens import purge_expired_tokens
+    return purge_expired_tokens()
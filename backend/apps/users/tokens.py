@@ -0,0 +1,89 @@
+"""
+Token Maintenance
+Set-based operations on SimpleJWT's outstanding/blacklisted token tables.
+
+- blacklist_user_tokens(): revokes every live refresh token of some users
+  with one INSERT ... SELECT instead of a blacklist() call per token
+- purge_expired_tokens(): deletes expired tokens (and their blacklist
+  entries) in bounded chunks, so the daily job never holds long locks
+"""
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import DateTimeField, Value
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def blacklist_user_tokens(user_ids):
+    """
+    Blacklist all unexpired, not yet blacklisted refresh tokens of the given users.
+
+    Returns:
+        int: Tokens blacklisted
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+
+    now = timezone.now()
+    # The ORM builds the SELECT (and adapts the UUIDs per backend); the INSERT wraps it
+    source = (
+        OutstandingToken.objects
+        .filter(user_id__in=user_ids, expires_at__gt=now, blacklistedtoken__isnull=True)
+        .annotate(blacklisted_at_value=Value(now, output_field=DateTimeField()))
+        .values_list('id', 'blacklisted_at_value')
+        .order_by()
+    )
+    select_sql, params = source.query.sql_with_params()
+    with db_transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {BlacklistedToken._meta.db_table} (token_id, blacklisted_at) {select_sql}",
+            params
+        )
+        return cursor.rowcount
+
+
+def purge_expired_tokens(chunk_size=None):
+    """
+    Delete outstanding tokens that expired before now, with their blacklist rows.
+    An expired refresh token is rejected on its exp claim alone, so neither
+    row is needed any more.
+
+    Returns:
+        dict: {'outstanding': rows deleted, 'blacklisted': rows deleted}
+    """
+    chunk_size = chunk_size or getattr(settings, 'TOKEN_PURGE_CHUNK_SIZE', 5000)
+    outstanding = OutstandingToken._meta.db_table
+    blacklisted = BlacklistedToken._meta.db_table
+    now = timezone.now()
+    purged = {'outstanding': 0, 'blacklisted': 0}
+
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        with db_transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {blacklisted} WHERE token_id IN ({_placeholders(ids)})", ids)
+            purged['blacklisted'] += cursor.rowcount
+            cursor.execute(f"DELETE FROM {outstanding} WHERE id IN ({_placeholders(ids)})", ids)
+            purged['outstanding'] += cursor.rowcount
+        if len(ids) < chunk_size:
+            break
+
+    logger.info(
+        f"Purged {purged['outstanding']} expired outstanding token(s) "
+        f"and {purged['blacklisted']} blacklist entr{'y' if purged['blacklisted'] == 1 else 'ies'}"
+    )
+    return purged
@@ -15,10 +15,17 @@ from .serializers import (
     BeneficiarySerializer
 )
 from .models import NotificationPreference, Beneficiary
+from bowman_insurance.throttling import AnonTokenBucketThrottle, ScopedIPTokenBucketThrottle
+from apps.analytics.activity import record_activity
 
 User = get_user_model()
 
 
+class LoginRateThrottle(ScopedIPTokenBucketThrottle):
+    """Limits login attempts per client IP to slow down credential stuffing."""
+    scope = 'login'
+
+
 class UserRegistrationView(generics.CreateAPIView):
     """
     API endpoint for user registration
@@ -52,6 +59,8 @@ class UserLoginView(APIView):
     POST /api/v1/auth/login/
     """
     permission_classes = [permissions.AllowAny]
+    # The login bucket caps bursts; the default anon rate still caps the hourly total
+    throttle_classes = [AnonTokenBucketThrottle, LoginRateThrottle]
 
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
@@ -61,6 +70,7 @@ class UserLoginView(APIView):
 
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
+        record_activity('login', user=user, request=request)
 
         return Response({
             'user': UserSerializer(user).data,
@@ -85,6 +95,7 @@ class UserLogoutView(APIView):
             if refresh_token:
                 token = RefreshToken(refresh_token)
                 token.blacklist()
+            record_activity('logout', request=request)
             return Response({
                 'message': 'Logout successful'
             }, status=status.HTTP_200_OK)
@@ -308,12 +319,8 @@ def delete_account(request):
     user.save(update_fields=['is_active'])
 
     # Blacklist all tokens
-    try:
-        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
-        for token in OutstandingToken.objects.filter(user=user):
-            token.blacklist()
-    except Exception:
-        pass
+    from .tokens import blacklist_user_tokens
+    blacklist_user_tokens([user.pk])
 
     return Response({
         'message': 'Account deletion request submitted. Your account has been deactivated.'
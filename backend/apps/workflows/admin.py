@@ -7,8 +7,8 @@ class WorkflowStageAdmin(admin.ModelAdmin):
     """Admin interface for WorkflowStage model"""
 
     list_display = (
-        'policy', 'stage_name', 'status',
-        'assigned_to', 'created_at', 'completed_at'
+        'policy', 'stage_name', 'status', 'priority',
+        'assigned_to', 'due_at', 'escalation_level', 'created_at', 'completed_at'
     )
     list_filter = ('stage_name', 'status', 'created_at', 'completed_at')
     search_fields = (
@@ -19,8 +19,9 @@ class WorkflowStageAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
     fieldsets = (
-        (None, {'fields': ('policy', 'stage_name', 'status')}),
-        ('Assignment', {'fields': ('assigned_to',)}),
+        (None, {'fields': ('policy', 'stage_name', 'status', 'priority')}),
+        ('Assignment', {'fields': ('assigned_to', 'lease_expires_at', 'attempts')}),
+        ('SLA', {'fields': ('due_at', 'escalation_level', 'escalated_at')}),
         ('Details', {'fields': ('notes', 'metadata')}),
         ('Timestamps', {'fields': (
             'created_at', 'updated_at', 'started_at', 'completed_at'
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0008_vehicle_logbook_document'),
+        ('workflows', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstage',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflowstage',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowstage',
+            name='priority',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='workflowstage',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-priority', 'created_at'], name='workflow_stage_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workflowstage',
+            index=models.Index(condition=models.Q(('lease_expires_at__isnull', False), ('status', 'in_progress')), fields=['lease_expires_at'], name='workflow_stage_lease_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0008_vehicle_logbook_document'),
+        ('workflows', '0002_work_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstage',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowstage',
+            name='escalated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workflowstage',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='workflowstage',
+            index=models.Index(condition=models.Q(('due_at__isnull', False), ('status__in', ['pending', 'in_progress'])), fields=['due_at'], name='workflow_stage_due_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 17:20
+
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_due_at(apps, schema_editor):
+    """Give stages opened before SLAs existed a deadline counted from their creation"""
+    from apps.workflows.sla import OPEN_STATUSES, stage_sla
+
+    WorkflowStage = apps.get_model('workflows', 'WorkflowStage')
+    open_stages = WorkflowStage.objects.filter(status__in=OPEN_STATUSES, due_at__isnull=True)
+    for stage_name in open_stages.order_by().values_list('stage_name', flat=True).distinct():
+        sla = stage_sla(stage_name)
+        if sla is not None:
+            open_stages.filter(stage_name=stage_name).update(due_at=F('created_at') + sla)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_stage_sla'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_due_at, migrations.RunPython.noop),
+    ]
@@ -40,6 +40,19 @@ class WorkflowStage(models.Model):
         related_name='assigned_workflow_stages'
     )
 
+    # Work queue: higher priority is pulled first, then oldest.
+    # lease_expires_at is set while a staff member holds the stage; an
+    # expired lease returns the stage to the queue.
+    priority = models.SmallIntegerField(default=0)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    # SLA: due_at is the next deadline for an open stage. The escalation
+    # task reads only overdue rows through a partial index on this column.
+    due_at = models.DateTimeField(null=True, blank=True)
+    escalation_level = models.PositiveSmallIntegerField(default=0)
+    escalated_at = models.DateTimeField(null=True, blank=True)
+
     # Notes and metadata
     notes = models.TextField(blank=True)
     metadata = models.JSONField(default=dict, blank=True)
@@ -56,25 +69,52 @@ class WorkflowStage(models.Model):
         indexes = [
             models.Index(fields=['policy', 'status']),
             models.Index(fields=['assigned_to', 'status']),
+            models.Index(
+                fields=['-priority', 'created_at'],
+                condition=models.Q(status='pending'),
+                name='workflow_stage_queue_idx'
+            ),
+            models.Index(
+                fields=['lease_expires_at'],
+                condition=models.Q(status='in_progress', lease_expires_at__isnull=False),
+                name='workflow_stage_lease_idx'
+            ),
+            models.Index(
+                fields=['due_at'],
+                condition=models.Q(status__in=['pending', 'in_progress'], due_at__isnull=False),
+                name='workflow_stage_due_idx'
+            ),
         ]
 
     def __str__(self):
         return f"{self.policy.policy_number} - {self.stage_name} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.due_at is None:
+            from .sla import stage_due_at
+            self.due_at = stage_due_at(self.stage_name)
+        super().save(*args, **kwargs)
+
     def mark_completed(self, notes=''):
         """Mark stage as completed"""
         from django.utils import timezone
         self.status = 'completed'
         self.completed_at = timezone.now()
+        self.due_at = None
+        self.lease_expires_at = None
+        fields = ['status', 'completed_at', 'due_at', 'lease_expires_at', 'updated_at']
         if notes:
             self.notes = notes
-        self.save()
+            fields.append('notes')
+        self.save(update_fields=fields)
 
     def assign_to_user(self, user):
         """Assign stage to user"""
         from django.utils import timezone
         self.assigned_to = user
+        fields = ['assigned_to', 'updated_at']
         if self.status == 'pending':
             self.status = 'in_progress'
             self.started_at = timezone.now()
-        self.save()
+            fields += ['status', 'started_at']
+        self.save(update_fields=fields)
@@ -0,0 +1,115 @@
+"""
+Workflow Work Queue
+Staff pull pending workflow stages with SELECT ... FOR UPDATE SKIP LOCKED,
+so concurrent callers never wait on each other or receive the same stage.
+
+A pulled stage is leased to the caller for WORKFLOW_LEASE_SECONDS and the
+lease is extended by heartbeats. Stages whose lease runs out are returned
+to the queue by release_expired_leases().
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import WorkflowStage
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseError(Exception):
+    """Raised when the caller no longer holds the stage's lease"""
+
+
+def lease_duration():
+    return timedelta(seconds=getattr(settings, 'WORKFLOW_LEASE_SECONDS', 900))
+
+
+def claim_next(user, count=1, stage_names=None):
+    """
+    Lease up to count pending stages to user, highest priority then oldest first.
+
+    Returns:
+        list: Leased WorkflowStage instances
+    """
+    count = max(1, min(count, getattr(settings, 'WORKFLOW_CLAIM_MAX', 50)))
+    now = timezone.now()
+
+    with db_transaction.atomic():
+        queue = WorkflowStage.objects.select_for_update(skip_locked=True).filter(status='pending')
+        if stage_names:
+            queue = queue.filter(stage_name__in=stage_names)
+        stage_ids = list(queue.order_by('-priority', 'created_at').values_list('pk', flat=True)[:count])
+        if not stage_ids:
+            return []
+
+        WorkflowStage.objects.filter(pk__in=stage_ids).update(
+            status='in_progress',
+            assigned_to=user,
+            lease_expires_at=now + lease_duration(),
+            started_at=Coalesce('started_at', now),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+
+    return list(
+        WorkflowStage.objects.filter(pk__in=stage_ids)
+        .select_related('policy', 'assigned_to')
+        .order_by('-priority', 'created_at')
+    )
+
+
+def _held(stage_id, user):
+    """Stages the user currently leases; the conditional UPDATEs below are the ownership check"""
+    return WorkflowStage.objects.filter(
+        pk=stage_id, assigned_to=user, status='in_progress', lease_expires_at__gt=timezone.now()
+    )
+
+
+def heartbeat(stage_id, user):
+    """
+    Extend the caller's lease.
+
+    Returns:
+        datetime: New lease expiry
+    """
+    now = timezone.now()
+    expires_at = now + lease_duration()
+    if not _held(stage_id, user).update(lease_expires_at=expires_at, updated_at=now):
+        raise LeaseError('Lease expired or stage is held by someone else')
+    return expires_at
+
+
+def complete(stage_id, user, notes=''):
+    now = timezone.now()
+    fields = {'status': 'completed', 'completed_at': now, 'lease_expires_at': None, 'updated_at': now}
+    if notes:
+        fields['notes'] = notes
+    if not _held(stage_id, user).update(**fields):
+        raise LeaseError('Lease expired or stage is held by someone else')
+
+
+def release(stage_id, user):
+    """Hand a leased stage back to the queue"""
+    now = timezone.now()
+    if not _held(stage_id, user).update(
+        status='pending', assigned_to=None, lease_expires_at=None, updated_at=now
+    ):
+        raise LeaseError('Lease expired or stage is held by someone else')
+
+
+def release_expired_leases():
+    """Return stages with expired leases to the queue (run periodically)"""
+    now = timezone.now()
+    released = WorkflowStage.objects.filter(
+        status='in_progress', lease_expires_at__lt=now
+    ).update(status='pending', assigned_to=None, lease_expires_at=None, updated_at=now)
+    if released:
+        logger.info(f"Returned {released} workflow stages with expired leases to the queue")
+    return released
@@ -0,0 +1,35 @@
+"""
+Serializers for Workflows App
+"""
+from rest_framework import serializers
+from .models import WorkflowStage
+
+
+class WorkflowStageSerializer(serializers.ModelSerializer):
+    """Serializer for workflow stages"""
+    policy_number = serializers.CharField(source='policy.policy_number', read_only=True)
+    assigned_to_name = serializers.CharField(source='assigned_to.full_name', read_only=True, allow_null=True)
+
+    class Meta:
+        model = WorkflowStage
+        fields = [
+            'id', 'policy', 'policy_number', 'stage_name', 'status',
+            'priority', 'assigned_to', 'assigned_to_name', 'lease_expires_at',
+            'attempts', 'due_at', 'escalation_level', 'escalated_at', 'notes', 'metadata', 'created_at', 'started_at',
+            'completed_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class ClaimNextSerializer(serializers.Serializer):
+    """Request for the next stages from the work queue"""
+    count = serializers.IntegerField(min_value=1, max_value=50, default=1)
+    stage_names = serializers.ListField(
+        child=serializers.ChoiceField(choices=WorkflowStage.STAGE_CHOICES),
+        required=False,
+        allow_empty=False
+    )
+
+
+class CompleteStageSerializer(serializers.Serializer):
+    notes = serializers.CharField(required=False, allow_blank=True)
@@ -0,0 +1,139 @@
+"""
+Workflow SLA Escalation
+Each open stage carries its next deadline in due_at. A periodic task
+drains overdue stages through a partial index on due_at, so a run costs
+work proportional to the stages that are due, not to the table size.
+
+Overdue stages are escalated in bulk:
+- pending stages are bumped up the work queue
+- in-progress stages are taken back from their assignee and re-queued
+  (reassigned to whoever pulls them next)
+- both get a fresh deadline; after WORKFLOW_MAX_ESCALATIONS the deadline
+  is cleared and staff are notified instead
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import WorkflowStage
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hours allowed per stage before it is overdue
+DEFAULT_STAGE_SLA_HOURS = {
+    'quote_generated': 72,
+    'payment_pending': 72,
+    'payment_received': 4,
+    'underwriting': 24,
+    'document_verification': 8,
+    'approval': 24,
+    'policy_issuance': 4,
+    'certificate_generation': 2,
+}
+
+ESCALATION_PRIORITY_STEP = 10
+OPEN_STATUSES = ['pending', 'in_progress']
+
+
+def stage_sla(stage_name):
+    """SLA for a stage, or None when the stage has no deadline"""
+    hours = getattr(settings, 'WORKFLOW_STAGE_SLA_HOURS', DEFAULT_STAGE_SLA_HOURS).get(stage_name)
+    return timedelta(hours=hours) if hours else None
+
+
+def stage_due_at(stage_name, start=None):
+    sla = stage_sla(stage_name)
+    if sla is None:
+        return None
+    return (start or timezone.now()) + sla
+
+
+def escalate_overdue_stages(batch_size=None):
+    """
+    Escalate every stage whose deadline has passed.
+
+    Returns:
+        dict: {'escalated': int, 'requeued': int, 'exhausted': int}
+    """
+    batch_size = batch_size or getattr(settings, 'WORKFLOW_ESCALATION_BATCH_SIZE', 500)
+    max_escalations = getattr(settings, 'WORKFLOW_MAX_ESCALATIONS', 3)
+    totals = {'escalated': 0, 'requeued': 0, 'exhausted': 0}
+
+    while True:
+        now = timezone.now()
+        with db_transaction.atomic():
+            due = list(
+                WorkflowStage.objects.select_for_update(skip_locked=True)
+                .filter(status__in=OPEN_STATUSES, due_at__lte=now)
+                .order_by('due_at')
+                .values('pk', 'stage_name', 'status', 'escalation_level')[:batch_size]
+            )
+            if not due:
+                break
+            _escalate(due, now, max_escalations, totals)
+
+        if len(due) < batch_size:
+            break
+
+    if totals['escalated']:
+        logger.info(
+            f"Escalated {totals['escalated']} overdue workflow stages "
+            f"({totals['requeued']} re-queued, {totals['exhausted']} sent to staff)"
+        )
+    return totals
+
+
+def _escalate(due, now, max_escalations, totals):
+    """Apply one batch with one UPDATE per (stage, status, exhausted) group"""
+    groups = {}
+    exhausted = []
+    for row in due:
+        is_exhausted = row['escalation_level'] + 1 >= max_escalations
+        groups.setdefault((row['stage_name'], row['status'], is_exhausted), []).append(row['pk'])
+        if is_exhausted:
+            exhausted.append(row['pk'])
+
+    for (stage_name, status, is_exhausted), stage_ids in groups.items():
+        fields = {
+            'priority': F('priority') + ESCALATION_PRIORITY_STEP,
+            'escalation_level': F('escalation_level') + 1,
+            'escalated_at': now,
+            'due_at': None if is_exhausted else stage_due_at(stage_name, now),
+            'updated_at': now,
+        }
+        if status == 'in_progress':
+            fields.update(status='pending', assigned_to=None, lease_expires_at=None)
+            totals['requeued'] += len(stage_ids)
+        WorkflowStage.objects.filter(pk__in=stage_ids).update(**fields)
+
+    totals['escalated'] += len(due)
+    totals['exhausted'] += len(exhausted)
+    if exhausted:
+        db_transaction.on_commit(lambda: _notify_staff(exhausted))
+
+
+def _notify_staff(stage_ids):
+    """One summary notification per staff member, not one per stage"""
+    from apps.notifications.models import Notification
+    from apps.users.models import User
+
+    count = len(stage_ids)
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            type='system_message',
+            title=f"{count} workflow stage{'s' if count != 1 else ''} past SLA",
+            message=(
+                f"{count} policy workflow stage{'s have' if count != 1 else ' has'} missed "
+                f"the SLA after repeated escalation and need{'' if count != 1 else 's'} attention."
+            ),
+            action_url='/admin/workflows',
+        )
+        for user_id in User.objects.filter(role__in=['admin', 'staff'], is_active=True).values_list('pk', flat=True)
+    ])
@@ -0,0 +1,16 @@
+"""Workflow Celery tasks"""
+from celery import shared_task
+
+
+@shared_task
+def release_expired_leases():
+    """Return workflow stages with expired leases to the work queue"""
+    from .queue import release_expired_leases as release
+    return release()
+
+
+@shared_task
+def escalate_overdue_stages():
+    """Escalate workflow stages past their SLA deadline"""
+    from .sla import escalate_overdue_stages as escalate
+    return escalate()
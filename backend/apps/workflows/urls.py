@@ -1,7 +1,11 @@
 """URL configuration for Workflows app"""
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'stages', views.WorkflowStageViewSet, basename='workflow-stage')
 
 urlpatterns = [
-    # Workflows will be implemented later
-    # For now, empty to prevent URL errors
+    path('', include(router.urls)),
 ]
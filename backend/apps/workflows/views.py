@@ -0,0 +1,110 @@
+"""
+Views for Workflows App
+"""
+import uuid
+
+from rest_framework import viewsets, status, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from .models import WorkflowStage
+from .queue import LeaseError, claim_next, complete, heartbeat, release
+from .serializers import WorkflowStageSerializer, ClaimNextSerializer, CompleteStageSerializer
+
+
+class IsStaff(IsAuthenticated):
+    """Only staff and admin users work the queue"""
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and request.user.role in ['admin', 'staff']
+
+
+class WorkflowStageViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Work queue over policy workflow stages (staff only)
+    GET /api/v1/workflows/stages/ - List stages (?status, ?stage_name, ?mine=true, ?overdue=true)
+    POST /api/v1/workflows/stages/claim-next/ - Lease the next N pending stages
+    POST /api/v1/workflows/stages/:id/heartbeat/ - Extend the lease
+    POST /api/v1/workflows/stages/:id/complete/ - Complete a leased stage
+    POST /api/v1/workflows/stages/:id/release/ - Return a leased stage to the queue
+    """
+    permission_classes = [IsStaff]
+    serializer_class = WorkflowStageSerializer
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['priority', 'created_at', 'lease_expires_at', 'due_at']
+    ordering = ['-priority', 'created_at']
+
+    def get_queryset(self):
+        queryset = WorkflowStage.objects.select_related('policy', 'assigned_to')
+
+        params = self.request.query_params
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('stage_name'):
+            queryset = queryset.filter(stage_name=params['stage_name'])
+        if params.get('mine') == 'true':
+            queryset = queryset.filter(assigned_to=self.request.user)
+        if params.get('overdue') == 'true':
+            queryset = queryset.filter(status__in=['pending', 'in_progress'], due_at__lte=timezone.now())
+        return queryset
+
+    @action(detail=False, methods=['post'], url_path='claim-next')
+    def claim_next(self, request):
+        """Lease the next pending stages, highest priority and oldest first"""
+        serializer = ClaimNextSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        stages = claim_next(
+            request.user,
+            count=serializer.validated_data['count'],
+            stage_names=serializer.validated_data.get('stage_names'),
+        )
+        return Response({
+            'count': len(stages),
+            'results': WorkflowStageSerializer(stages, many=True).data
+        })
+
+    def _stage_id(self, pk):
+        """The stage id from the URL, or None if it is not a UUID"""
+        try:
+            return uuid.UUID(str(pk))
+        except ValueError:
+            return None
+
+    def _not_found(self):
+        return Response({'error': 'Stage not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=True, methods=['post'])
+    def heartbeat(self, request, pk=None):
+        stage_id = self._stage_id(pk)
+        if stage_id is None:
+            return self._not_found()
+        try:
+            expires_at = heartbeat(stage_id, request.user)
+        except LeaseError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({'lease_expires_at': expires_at})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        stage_id = self._stage_id(pk)
+        if stage_id is None:
+            return self._not_found()
+        serializer = CompleteStageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            complete(stage_id, request.user, notes=serializer.validated_data.get('notes', ''))
+        except LeaseError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({'message': 'Stage completed'})
+
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        stage_id = self._stage_id(pk)
+        if stage_id is None:
+            return self._not_found()
+        try:
+            release(stage_id, request.user)
+        except LeaseError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({'message': 'Stage returned to the queue'})
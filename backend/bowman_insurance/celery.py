@@ -23,6 +23,34 @@ app.conf.beat_schedule = {
         'task': 'apps.payments.tasks.send_payment_reminders',
         'schedule': crontab(hour=9, minute=0),  # Run daily at 9:00 AM
     },
+    'reconcile-stale-transactions': {
+        'task': 'apps.payments.tasks.reconcile_stale_transactions',
+        'schedule': crontab(minute='*/10'),  # Run every 10 minutes
+    },
+    'reconcile-paystack-ledger-monthly': {
+        'task': 'apps.payments.tasks.reconcile_paystack_ledger',
+        'schedule': crontab(day_of_month=1, hour=4, minute=0),  # Previous month, on the 1st at 4:00 AM
+    },
+    'auto-assign-claims': {
+        'task': 'apps.claims.tasks.auto_assign_claims',
+        'schedule': crontab(minute='*/15'),  # Run every 15 minutes
+    },
+    'expire-upload-sessions': {
+        'task': 'apps.documents.tasks.expire_upload_sessions',
+        'schedule': crontab(minute=30),  # Run hourly
+    },
+    'collect-unreferenced-blobs': {
+        'task': 'apps.documents.tasks.collect_unreferenced_blobs',
+        'schedule': crontab(hour=3, minute=30),  # Run daily at 3:30 AM
+    },
+    'release-expired-workflow-leases': {
+        'task': 'apps.workflows.tasks.release_expired_leases',
+        'schedule': crontab(),  # Run every minute
+    },
+    'escalate-overdue-workflow-stages': {
+        'task': 'apps.workflows.tasks.escalate_overdue_stages',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
     'check-expiring-policies': {
         'task': 'apps.policies.tasks.check_expiring_policies',
         'schedule': crontab(hour=8, minute=0),  # Run daily at 8:00 AM
@@ -35,6 +63,22 @@ app.conf.beat_schedule = {
         'task': 'apps.notifications.tasks.cleanup_old_notifications',
         'schedule': crontab(day_of_week=0, hour=3, minute=0),  # Run weekly on Sunday at 3:00 AM
     },
+    'flush-notification-digests': {
+        'task': 'apps.notifications.tasks.flush_notification_digests',
+        'schedule': crontab(),  # Run every minute
+    },
+    'deliver-pending-emails': {
+        'task': 'apps.notifications.tasks.deliver_pending_emails',
+        'schedule': crontab(),  # Run every minute (picks up retries and missed kicks)
+    },
+    'deliver-pending-sms': {
+        'task': 'apps.notifications.tasks.deliver_pending_sms',
+        'schedule': crontab(),  # Run every minute
+    },
+    'maintain-activity-partitions': {
+        'task': 'apps.analytics.tasks.maintain_activity_partitions',
+        'schedule': crontab(day_of_week=0, hour=3, minute=15),  # Run weekly on Sunday at 3:15 AM
+    },
 }
 
 @app.task(bind=True, ignore_result=True)
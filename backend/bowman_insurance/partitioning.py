@@ -0,0 +1,322 @@
+"""
+Monthly table partitioning (PostgreSQL)
+Append-heavy tables are range-partitioned by month on their timestamp
+column. Retention drops whole partitions, which is O(1) and leaves no
+dead tuples behind, and queries filtered on a recent window only touch
+the matching partitions.
+
+- convert_to_partitioned(): one-off online conversion, run from a migration
+- ensure_partitions(): creates the current and upcoming months
+- drop_expired_partitions(): detaches and drops months past retention
+
+On other databases (SQLite in development) retention falls back to
+deleting rows in small batches.
+"""
+
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# table -> (partition column, retention setting, default retention in months)
+PARTITIONED_TABLES = {
+    'user_activities': ('timestamp', 'ACTIVITY_RETENTION_MONTHS', 13),
+    'notifications': ('created_at', 'NOTIFICATION_RETENTION_MONTHS', 6),
+}
+
+_PARTITION_RE = re.compile(r'_y(\d{4})m(\d{2})$')
+
+DELETE_BATCH_SIZE = 5000
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_postgres(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def is_partitioned(table, conn=None):
+    conn = conn or connection
+    if not is_postgres(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def _create_partition(cursor, table, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" '
+        f'PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+        [month.isoformat(), _add_months(month, 1).isoformat()]
+    )
+
+
+def _copy_in_batches(conn, table, shadow, column, batch_size):
+    """
+    Copy rows into the shadow table in keyset order, one short transaction per batch.
+
+    Source rows are read FOR SHARE, so a concurrent UPDATE of a row waits for
+    its batch to commit and the sync trigger then replaces the copied version.
+    """
+    copied = 0
+    last = None
+    while True:
+        after = 'WHERE ("{0}", "id") > (%s, %s)'.format(column) if last else ''
+        params = list(last) if last else []
+        with db_transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+            cursor.execute(
+                f'SELECT "{column}", "id" FROM "{table}" {after} '
+                f'ORDER BY "{column}", "id" OFFSET %s LIMIT 1',
+                params + [batch_size - 1]
+            )
+            upper = cursor.fetchone()
+            bounds = [after or 'WHERE TRUE']
+            if upper:
+                bounds.append(f'("{column}", "id") <= (%s, %s)')
+            cursor.execute(
+                f'INSERT INTO "{shadow}" SELECT * FROM "{table}" {" AND ".join(bounds)} '
+                f'ORDER BY "{column}", "id" FOR SHARE ON CONFLICT DO NOTHING',
+                params + (list(upper) if upper else [])
+            )
+            copied += cursor.rowcount
+        if not upper:
+            return copied
+        last = upper
+        logger.info(f"Copied {copied} rows of {table} into {shadow}")
+
+
+def convert_to_partitioned(table, conn=None, batch_size=None):
+    """
+    Rebuild an existing table as a monthly-partitioned table, copying its rows.
+
+    The primary key becomes (id, <partition column>) because PostgreSQL
+    requires the partition key in every unique constraint; ids are UUIDs,
+    so they stay unique in practice.
+
+    The table stays writable while it is copied: a partitioned shadow table
+    is built next to it, a trigger mirrors writes into the shadow, and rows
+    are copied in batches that each commit on their own. Only the final
+    rename swap takes an ACCESS EXCLUSIVE lock. Must run outside a
+    transaction (a non-atomic migration); an interrupted run starts over.
+    """
+    conn = conn or connection
+    if not is_postgres(conn) or is_partitioned(table, conn):
+        return
+
+    column = PARTITIONED_TABLES[table][0]
+    batch_size = batch_size or getattr(settings, 'PARTITION_COPY_BATCH_SIZE', 10000)
+    shadow = f"{table}_partitioned"
+    old = f"{table}_unpartitioned"
+    sync = f"{table}_partition_sync"
+
+    with db_transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        # Leftovers from an interrupted run
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{sync}" ON "{table}"')
+        cursor.execute(f'DROP FUNCTION IF EXISTS "{sync}"()')
+        cursor.execute(f'DROP TABLE IF EXISTS "{shadow}" CASCADE')
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [table]
+        )
+        primary_key = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [table, primary_key]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN("{column}") FROM "{table}"')
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(
+            f'CREATE TABLE "{shadow}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ("{column}")'
+        )
+        # Shadow objects get temporary names until the swap frees the originals
+        cursor.execute(
+            f'ALTER TABLE "{shadow}" ADD CONSTRAINT "{primary_key}_p" PRIMARY KEY ("id", "{column}")'
+        )
+        for name, definition in indexes:
+            unique = 'UNIQUE ' if definition.startswith('CREATE UNIQUE') else ''
+            columns = definition[definition.index(' USING '):]
+            cursor.execute(f'CREATE {unique}INDEX "{name}_p" ON "{shadow}"{columns}')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{shadow}" ADD CONSTRAINT "{name}_p" {definition}')
+
+        this_month = _month_start(timezone.now().date())
+        month = _month_start(oldest.date()) if oldest else this_month
+        while month <= _add_months(this_month, getattr(settings, 'PARTITION_PREMAKE_MONTHS', 3)):
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(table, month)}" '
+                f'PARTITION OF "{shadow}" FOR VALUES FROM (%s) TO (%s)',
+                [month.isoformat(), _add_months(month, 1).isoformat()]
+            )
+            month = _add_months(month, 1)
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{shadow}" DEFAULT')
+
+        cursor.execute(f"""
+            CREATE FUNCTION "{sync}"() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM "{shadow}" WHERE "id" = OLD."id" AND "{column}" = OLD."{column}";
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO "{shadow}" VALUES (NEW.*) ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """)
+        cursor.execute(
+            f'CREATE TRIGGER "{sync}" AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+            f'FOR EACH ROW EXECUTE FUNCTION "{sync}"()'
+        )
+
+    copied = _copy_in_batches(conn, table, shadow, column, batch_size)
+
+    with db_transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'DROP TRIGGER "{sync}" ON "{table}"')
+        cursor.execute(f'DROP FUNCTION "{sync}"()')
+
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+        cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{primary_key}" TO "{primary_key}_old"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{old}" RENAME CONSTRAINT "{name}" TO "{name}_old"')
+
+        cursor.execute(f'ALTER TABLE "{shadow}" RENAME TO "{table}"')
+        cursor.execute(f'ALTER TABLE "{table}" RENAME CONSTRAINT "{primary_key}_p" TO "{primary_key}"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}_p" RENAME TO "{name}"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{table}" RENAME CONSTRAINT "{name}_p" TO "{name}"')
+
+        cursor.execute(f'DROP TABLE "{old}"')
+
+    logger.info(f"Converted {table} to monthly partitions ({copied} rows copied)")
+
+
+def list_partitions(table):
+    """{month: partition name} for the table's monthly partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partitions(table, months_ahead=None):
+    """Create partitions for this month and the next months_ahead months"""
+    months_ahead = months_ahead if months_ahead is not None else getattr(settings, 'PARTITION_PREMAKE_MONTHS', 3)
+    existing = list_partitions(table)
+    this_month = _month_start(timezone.now().date())
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = _add_months(this_month, offset)
+        if month in existing:
+            continue
+        try:
+            with db_transaction.atomic(), connection.cursor() as cursor:
+                _create_partition(cursor, table, month)
+            created.append(partition_name(table, month))
+        except Exception as e:
+            # Usually rows for that month already landed in the default partition
+            logger.error(f"Could not create partition {partition_name(table, month)}: {str(e)}")
+    return created
+
+
+def drop_expired_partitions(table, retention_months):
+    """Detach and drop partitions that end before the retention cutoff"""
+    cutoff = _add_months(_month_start(timezone.now().date()), -retention_months)
+    dropped = []
+    for month, name in sorted(list_partitions(table).items()):
+        if _add_months(month, 1) > cutoff:
+            continue
+        with db_transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+        dropped.append(name)
+    return dropped
+
+
+def _delete_in_batches(table, column, retention_months):
+    """Fallback retention for unpartitioned tables: small DELETEs, no long locks"""
+    cutoff = _add_months(_month_start(timezone.now().date()), -retention_months)
+    deleted = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                f'DELETE FROM "{table}" WHERE "id" IN '
+                f'(SELECT "id" FROM "{table}" WHERE "{column}" < %s LIMIT {DELETE_BATCH_SIZE})',
+                [cutoff.isoformat()]
+            )
+            deleted += cursor.rowcount
+            if cursor.rowcount < DELETE_BATCH_SIZE:
+                break
+    return deleted
+
+
+def maintain_table(table):
+    """
+    Create upcoming partitions and apply retention for one table.
+
+    Returns:
+        dict: {'created': [...], 'dropped': [...], 'deleted_rows': int}
+    """
+    column, setting, default_retention = PARTITIONED_TABLES[table]
+    retention_months = getattr(settings, setting, default_retention)
+
+    if not is_partitioned(table):
+        return {'created': [], 'dropped': [], 'deleted_rows': _delete_in_batches(table, column, retention_months)}
+
+    result = {
+        'created': ensure_partitions(table),
+        'dropped': drop_expired_partitions(table, retention_months),
+        'deleted_rows': 0,
+    }
+    if result['created'] or result['dropped']:
+        logger.info(f"Partition maintenance for {table}: {result}")
+    return result
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     # Third-party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'django_filters',
     'drf_spectacular',
@@ -66,6 +67,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.analytics.middleware.ActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.gzip.GZipMiddleware',
@@ -160,7 +162,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -180,6 +182,7 @@ REST_FRAMEWORK = {
         'anon': '100/hour',
         'user': '1000/hour',
         'payment_initiate': '20/hour',
+        'login': '10/min',
     },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -196,6 +199,12 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Expired refresh tokens deleted per statement by the nightly cleanup
+TOKEN_PURGE_CHUNK_SIZE = int(os.getenv('TOKEN_PURGE_CHUNK_SIZE', 5000))
+
+# Seconds an authenticated user's snapshot is served from cache (invalidated on save)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 300))
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [origin.rstrip('/') for origin in os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')]
 CORS_ALLOW_CREDENTIALS = True
@@ -231,6 +240,58 @@ AWS_S3_FILE_OVERWRITE = False
 AWS_QUERYSTRING_AUTH = True
 AWS_S3_SIGNATURE_VERSION = 's3v4'
 
+# User activity recording (buffered per process, see apps/analytics/activity.py)
+ACTIVITY_RECORDING_ENABLED = os.getenv('ACTIVITY_RECORDING_ENABLED', 'True') == 'True'
+ACTIVITY_FLUSH_SIZE = int(os.getenv('ACTIVITY_FLUSH_SIZE', 100))
+ACTIVITY_FLUSH_INTERVAL_MS = int(os.getenv('ACTIVITY_FLUSH_INTERVAL_MS', 2000))
+ACTIVITY_BUFFER_CAPACITY = int(os.getenv('ACTIVITY_BUFFER_CAPACITY', 10000))
+# Reverse proxies (nginx) in front of the app; X-Forwarded-For is ignored when 0
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+
+# Cached unread-notification counters (seconds before a rebuild from the DB)
+NOTIFICATION_UNREAD_COUNT_TTL = int(os.getenv('NOTIFICATION_UNREAD_COUNT_TTL', 3600))
+
+# Notification stream (SSE). Without a pub/sub URL events fan out in-process only
+NOTIFICATION_PUBSUB_URL = os.getenv('NOTIFICATION_PUBSUB_URL', '')
+# Public base URL of the ASGI events service; empty when a proxy routes the stream path to it
+NOTIFICATION_STREAM_BASE_URL = os.getenv('NOTIFICATION_STREAM_BASE_URL', '')
+NOTIFICATION_STREAM_TICKET_TTL = int(os.getenv('NOTIFICATION_STREAM_TICKET_TTL', 60))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = int(os.getenv('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15))
+NOTIFICATION_STREAM_MAX_SECONDS = int(os.getenv('NOTIFICATION_STREAM_MAX_SECONDS', 300))
+NOTIFICATION_STREAM_REPLAY_LIMIT = int(os.getenv('NOTIFICATION_STREAM_REPLAY_LIMIT', 100))
+
+# Broadcast fan-out: recipients written per COPY/bulk INSERT
+NOTIFICATION_BROADCAST_BATCH_SIZE = int(os.getenv('NOTIFICATION_BROADCAST_BATCH_SIZE', 5000))
+
+# Monthly partitions for user_activities / notifications (PostgreSQL)
+PARTITION_PREMAKE_MONTHS = int(os.getenv('PARTITION_PREMAKE_MONTHS', 3))
+# Rows per transaction when the migration copies a table into partitions
+PARTITION_COPY_BATCH_SIZE = int(os.getenv('PARTITION_COPY_BATCH_SIZE', 10000))
+ACTIVITY_RETENTION_MONTHS = int(os.getenv('ACTIVITY_RETENTION_MONTHS', 13))
+NOTIFICATION_RETENTION_MONTHS = int(os.getenv('NOTIFICATION_RETENTION_MONTHS', 6))
+
+# Workflow work queue
+WORKFLOW_LEASE_SECONDS = int(os.getenv('WORKFLOW_LEASE_SECONDS', 900))
+WORKFLOW_CLAIM_MAX = int(os.getenv('WORKFLOW_CLAIM_MAX', 50))
+WORKFLOW_MAX_ESCALATIONS = int(os.getenv('WORKFLOW_MAX_ESCALATIONS', 3))
+WORKFLOW_ESCALATION_BATCH_SIZE = int(os.getenv('WORKFLOW_ESCALATION_BATCH_SIZE', 500))
+
+# Presigned download URLs are cached until REFRESH_MARGIN seconds before expiry
+PRESIGNED_URL_EXPIRY = int(os.getenv('PRESIGNED_URL_EXPIRY', 3600))  # seconds
+PRESIGNED_URL_REFRESH_MARGIN = int(os.getenv('PRESIGNED_URL_REFRESH_MARGIN', 300))  # seconds
+
+# Document processing: cap on extracted text stored per file
+DOCUMENT_TEXT_MAX_CHARS = int(os.getenv('DOCUMENT_TEXT_MAX_CHARS', 100000))
+
+# Unreferenced content-addressed blobs are deleted after this grace period
+BLOB_RELEASE_GRACE_HOURS = int(os.getenv('BLOB_RELEASE_GRACE_HOURS', 24))
+
+# Direct-to-storage upload sessions
+DOCUMENT_UPLOAD_MAX_BYTES = int(os.getenv('DOCUMENT_UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+CLAIM_EVIDENCE_UPLOAD_MAX_BYTES = int(os.getenv('CLAIM_EVIDENCE_UPLOAD_MAX_BYTES', 200 * 1024 * 1024))
+UPLOAD_PART_SIZE = int(os.getenv('UPLOAD_PART_SIZE', 8 * 1024 * 1024))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 6 * 3600))  # seconds
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.sendgrid.net'
@@ -255,10 +316,59 @@ PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_CALLBACK_URL = os.getenv('PAYSTACK_CALLBACK_URL')
 
+# Stale payment reconciliation (apps.payments.tasks.reconcile_stale_transactions)
+PAYMENT_RECONCILE_STALE_MINUTES = int(os.getenv('PAYMENT_RECONCILE_STALE_MINUTES', 15))
+PAYMENT_RECONCILE_BATCH_SIZE = int(os.getenv('PAYMENT_RECONCILE_BATCH_SIZE', 200))
+PAYMENT_RECONCILE_MAX_TRANSACTIONS = int(os.getenv('PAYMENT_RECONCILE_MAX_TRANSACTIONS', 5000))
+PAYMENT_RECONCILE_MAX_WORKERS = int(os.getenv('PAYMENT_RECONCILE_MAX_WORKERS', 8))
+# Pending transactions older than this are no longer polled
+PAYMENT_RECONCILE_MAX_AGE_HOURS = int(os.getenv('PAYMENT_RECONCILE_MAX_AGE_HOURS', 48))
+# Upper bound on one run; a crashed worker's lock expires after this
+PAYMENT_RECONCILE_LOCK_SECONDS = int(os.getenv('PAYMENT_RECONCILE_LOCK_SECONDS', 1800))
+# Gateway query rate limits (requests per second)
+MPESA_QUERY_RATE_LIMIT = float(os.getenv('MPESA_QUERY_RATE_LIMIT', 5))
+PAYSTACK_QUERY_RATE_LIMIT = float(os.getenv('PAYSTACK_QUERY_RATE_LIMIT', 10))
+# Ledger page size for apps.payments.tasks.reconcile_paystack_ledger
+PAYSTACK_RECONCILE_PAGE_SIZE = int(os.getenv('PAYSTACK_RECONCILE_PAGE_SIZE', 100))
+# Most receipts streamed into one zip archive
+RECEIPT_ARCHIVE_MAX_RECEIPTS = int(os.getenv('RECEIPT_ARCHIVE_MAX_RECEIPTS', 500))
+
+# Claim auto-assignment
+CLAIM_ASSESSOR_MAX_OPEN = int(os.getenv('CLAIM_ASSESSOR_MAX_OPEN', 25))
+CLAIM_AUTO_ASSIGN_BATCH_SIZE = int(os.getenv('CLAIM_AUTO_ASSIGN_BATCH_SIZE', 500))
+
+# Claim duplicate detection
+CLAIM_DUPLICATE_WINDOW_DAYS = int(os.getenv('CLAIM_DUPLICATE_WINDOW_DAYS', 3))
+CLAIM_DUPLICATE_DESCRIPTION_SIMILARITY = float(os.getenv('CLAIM_DUPLICATE_DESCRIPTION_SIMILARITY', 0.6))
+CLAIM_DUPLICATE_FLAG_SCORE = float(os.getenv('CLAIM_DUPLICATE_FLAG_SCORE', 0.6))
+CLAIM_DUPLICATE_DESCRIPTION_WINDOW_DAYS = int(os.getenv('CLAIM_DUPLICATE_DESCRIPTION_WINDOW_DAYS', 365))
+CLAIM_DUPLICATE_MAX_CANDIDATES = int(os.getenv('CLAIM_DUPLICATE_MAX_CANDIDATES', 200))
+
 # Africa's Talking Configuration
 AFRICASTALKING_USERNAME = os.getenv('AFRICASTALKING_USERNAME')
 AFRICASTALKING_API_KEY = os.getenv('AFRICASTALKING_API_KEY')
 AFRICASTALKING_SENDER_ID = os.getenv('AFRICASTALKING_SENDER_ID', 'BOWMAN')
+AFRICASTALKING_API_URL = os.getenv('AFRICASTALKING_API_URL', 'https://api.africastalking.com/version1/messaging')
+SMS_BACKEND = os.getenv('SMS_BACKEND', 'apps.notifications.sms.AfricasTalkingBackend')
+SMS_BULK_MAX_RECIPIENTS = int(os.getenv('SMS_BULK_MAX_RECIPIENTS', 1000))
+# Country code given to stored numbers in local format (0712...) before sending
+SMS_DEFAULT_COUNTRY_CODE = os.getenv('SMS_DEFAULT_COUNTRY_CODE', '254')
+
+# Email/SMS outbox delivery (see apps.notifications.delivery)
+NOTIFICATION_DELIVERY_BATCH_SIZE = int(os.getenv('NOTIFICATION_DELIVERY_BATCH_SIZE', 200))
+NOTIFICATION_DELIVERY_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_DELIVERY_MAX_ATTEMPTS', 5))
+NOTIFICATION_DELIVERY_RETRY_SECONDS = int(os.getenv('NOTIFICATION_DELIVERY_RETRY_SECONDS', 60))
+NOTIFICATION_DELIVERY_LEASE_SECONDS = int(os.getenv('NOTIFICATION_DELIVERY_LEASE_SECONDS', 300))
+NOTIFICATION_DELIVERY_TIME_BUDGET = int(os.getenv('NOTIFICATION_DELIVERY_TIME_BUDGET', 50))
+NOTIFICATION_DELIVERY_DEBOUNCE_SECONDS = int(os.getenv('NOTIFICATION_DELIVERY_DEBOUNCE_SECONDS', 5))
+
+# Notification digests: seconds events are held per user and channel before merging (0 = send at once)
+NOTIFICATION_DIGEST_WINDOWS = {
+    'in_app': int(os.getenv('NOTIFICATION_DIGEST_WINDOW_IN_APP', 60)),
+    'email': int(os.getenv('NOTIFICATION_DIGEST_WINDOW_EMAIL', 300)),
+    'sms': int(os.getenv('NOTIFICATION_DIGEST_WINDOW_SMS', 300)),
+}
+NOTIFICATION_DIGEST_BATCH_SIZE = int(os.getenv('NOTIFICATION_DIGEST_BATCH_SIZE', 500))
 
 # API Documentation
 SPECTACULAR_SETTINGS = {
@@ -16,6 +16,7 @@ INTERNAL_IPS = ['127.0.0.1']
 
 # Use console email backend in development
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+SMS_BACKEND = os.getenv('SMS_BACKEND', 'apps.notifications.sms.ConsoleBackend')
 
 # Disable HTTPS redirects in development
 SECURE_SSL_REDIRECT = False
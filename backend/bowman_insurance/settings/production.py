@@ -55,6 +55,9 @@ CACHES = {
     }
 }
 
+# Notification stream fan-out across web workers
+NOTIFICATION_PUBSUB_URL = os.getenv('NOTIFICATION_PUBSUB_URL', os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'))
+
 # Static files (WhiteNoise)
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = '/static/'
@@ -0,0 +1,178 @@
+"""
+Token-bucket throttling
+DRF's SimpleRateThrottle stores a list of request timestamps per client and
+rewrites it on every request, which is a non-atomic read-modify-write that
+lets concurrent workers over-admit. These throttles keep one bucket per
+client instead (tokens + last refill time) and update it atomically:
+- Redis (django-redis cache): a Lua script, so the check is a single round trip
+- Any other cache: an in-process bucket table guarded by a lock
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket key
+# ARGV[1] = capacity, ARGV[2] = refill rate (tokens/second), ARGV[3] = ttl (ms)
+# Returns {allowed (0/1), seconds until the next token as a string}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ttl)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisTokenBucket:
+    """Token buckets stored as Redis hashes, updated by a Lua script"""
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self._script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, duration):
+        """
+        Take one token from the bucket.
+
+        Returns:
+            tuple: (allowed, wait) — wait is seconds until a token is available
+        """
+        rate = capacity / duration
+        allowed, wait = self._script(keys=[key], args=[capacity, rate, int(duration * 1000)])
+        return bool(int(allowed)), float(wait)
+
+
+class MemoryTokenBucket:
+    """
+    In-process token buckets for development and tests.
+    Only correct within one process; production uses RedisTokenBucket.
+    """
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, capacity, duration):
+        rate = capacity / duration
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, ts, _ = self._buckets.get(key, (capacity, now, duration))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                allowed, wait = True, 0.0
+            else:
+                allowed, wait = False, (1 - tokens) / rate
+
+            self._buckets[key] = (tokens, now, duration)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+
+        return allowed, wait
+
+    def _prune(self, now):
+        """Drop buckets idle long enough to have refilled completely"""
+        stale = [key for key, (_, ts, duration) in self._buckets.items() if now - ts > duration]
+        for key in stale:
+            del self._buckets[key]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_token_bucket_backend():
+    """Redis buckets when the default cache is django-redis, otherwise in-memory"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                cache_backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+                if cache_backend.startswith('django_redis.'):
+                    _backend = RedisTokenBucket()
+                else:
+                    _backend = MemoryTokenBucket()
+    return _backend
+
+
+class TokenBucketThrottleMixin:
+    """
+    Replaces SimpleRateThrottle's timestamp history with a token bucket.
+
+    A rate of N/period gives a bucket of N tokens refilled at N/period per
+    second, so bursts up to N are allowed and the sustained rate is N/period.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        try:
+            allowed, self._wait = get_token_bucket_backend().consume(
+                f"tb:{self.key}", self.num_requests, self.duration
+            )
+        except Exception as e:
+            # A throttle outage must not take the endpoint down with it
+            logger.error(f"Token bucket check failed for {self.key}: {str(e)}")
+            return True
+        return allowed
+
+    def wait(self):
+        return getattr(self, '_wait', None) or None
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottleMixin, AnonRateThrottle):
+    """Per-IP token bucket for anonymous requests, using the 'anon' rate"""
+
+
+class UserTokenBucketThrottle(TokenBucketThrottleMixin, UserRateThrottle):
+    """Per-user (or per-IP for anonymous requests) token bucket"""
+
+
+class ScopedIPTokenBucketThrottle(TokenBucketThrottleMixin, SimpleRateThrottle):
+    """Per-IP token bucket applied whether or not the request is authenticated"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }